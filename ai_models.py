@@ -1,70 +1,406 @@
 """
 Modelos de Inteligência Artificial para Gestão de Estoque
-Implementa 5 modelos principais:
-1. Previsão de Demanda (ARIMA/Prophet)
+Implementa 6 modelos principais:
+1. Previsão de Demanda (Holt-Winters)
 2. Manutenção Preditiva (Random Forest)
 3. Classificação de Estado (K-Means)
 4. Detecção de Anomalias (Isolation Forest)
 5. Otimização de Estoque (Regressão)
+6. Tempo até Falha (Gradient Boosting)
 """
 
+import os
+import hashlib
+import multiprocessing
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from importlib.metadata import version
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, IsolationForest
-from sklearn.cluster import KMeans
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
-from sklearn.preprocessing import StandardScaler
+# scikit-learn, joblib e statsmodels são importados só quando usados: importar este
+# módulo (ex: para OtimizacaoEstoque) não carrega as bibliotecas de aprendizado
 import warnings
 warnings.filterwarnings('ignore')
 
-class ManutencaoPreditiva:
+from instrumentacao import instrumentar
+from pipeline_features import PipelineFeatures
+from armazem_features import ArmazemFeatures, EscalaFeatures
+
+# Versão do formato dos artefatos salvos; incremente ao mudar atributos dos modelos
+VERSAO_MODELOS = 11
+
+# Features de telemetria usadas pelos modelos
+FEATURES = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent',
+            'disco_uso_percent', 'num_falhas']
+
+
+@lru_cache(maxsize=None)
+def versao_sklearn():
+    """Versão instalada do scikit-learn, lida dos metadados sem importar a biblioteca"""
+    return version('scikit-learn')
+
+
+# Pipeline (e cache) de features temporais compartilhado por todos os classificadores
+PIPELINE_FEATURES = PipelineFeatures(FEATURES)
+
+# Matrizes padronizadas (float32) compartilhadas por manutenção, anomalias e classificação
+ARMAZEM_FEATURES = ArmazemFeatures(PIPELINE_FEATURES)
+
+
+def preparar_features(df_metricas):
+    """Leituras completas e sua matriz de features (pontuais + temporais), via pipeline compartilhado"""
+    df = df_metricas.dropna(subset=FEATURES)
+    return df, PIPELINE_FEATURES.transformar(df)
+
+
+def _matriz_features(dados, colunas=FEATURES):
+    """Converte um DataFrame ou ndarray de leituras na matriz de features
+    
+    DataFrames sem as colunas temporais passam pelo pipeline; leituras sem histórico
+    do equipamento recebem defasagens e médias iguais ao valor atual e inclinação
+    zero (para pontuar com o histórico, use HistoricoRecente). Arrays têm todas as
+    colunas, na ordem de colunas, ou só as das leituras brutas
+    (PIPELINE_FEATURES.colunas_entrada); outros formatos levantam ValueError.
+    """
+    if not isinstance(dados, pd.DataFrame):
+        dados = PIPELINE_FEATURES.de_array(dados, colunas)
+        if isinstance(dados, np.ndarray):
+            return dados
+    if not all(coluna in dados for coluna in colunas):
+        features = PIPELINE_FEATURES.transformar(dados, usar_cache=False)
+        # Colunas de fora do pipeline (ex: idade_meses) vêm das próprias leituras
+        extras = [coluna for coluna in colunas if coluna not in features.columns]
+        dados = pd.concat([features, dados[extras]], axis=1) if extras else features
+    return dados[colunas].to_numpy(dtype=float)
+
+
+def _colunas_treino(X, colunas):
+    """Nomes das colunas de uma matriz de treino (padrão: FEATURES)"""
+    colunas = list(colunas if colunas is not None else FEATURES)
+    if X.shape[1] != len(colunas):
+        raise ValueError(f"Matriz com {X.shape[1]} colunas, esperadas {len(colunas)}")
+    return colunas
+
+
+def _escalar_treino(X, colunas, escala=None):
+    """Escala e matriz padronizada de treino; sem escala, ajusta uma sobre X"""
+    if escala is None:
+        escala = EscalaFeatures.ajustar(X, colunas)
+        return escala, escala.aplicar(X)
+    if escala.colunas != colunas:
+        raise ValueError("Escala ajustada para outras colunas")
+    return escala, X
+
+
+class ModeloPersistente:
+    """Salvamento e carregamento dos modelos em disco (escala, estimador e metadados)"""
+    
+    # Atributos que referenciam outros modelos: não entram no artefato e voltam como None
+    ATRIBUTOS_TRANSIENTES = ()
+    
+    def salvar(self, caminho):
+        """Salva o modelo (sem os atributos transientes) em um arquivo joblib"""
+        import joblib
+        
+        artefato = {
+            'classe': type(self).__name__,
+            'versao': VERSAO_MODELOS,
+            'sklearn': versao_sklearn(),
+            'estado': {nome: valor for nome, valor in self.__dict__.items()
+                       if nome not in self.ATRIBUTOS_TRANSIENTES},
+        }
+        # Sem compressão, para que os arrays possam ser mapeados em memória na carga
+        joblib.dump(artefato, caminho)
+    
+    @classmethod
+    def carregar(cls, caminho, mmap_mode='r'):
+        """Carrega um modelo salvo, mapeando os arrays em memória quando possível"""
+        import joblib
+        
+        artefato = joblib.load(caminho, mmap_mode=mmap_mode)
+        
+        if artefato['classe'] != cls.__name__:
+            raise ValueError(f"Artefato de {artefato['classe']}, esperado {cls.__name__}")
+        if artefato['versao'] != VERSAO_MODELOS:
+            raise ValueError(f"Artefato na versão {artefato['versao']}, esperada {VERSAO_MODELOS}")
+        
+        modelo = cls.__new__(cls)
+        modelo.__dict__.update(dict.fromkeys(cls.ATRIBUTOS_TRANSIENTES))
+        modelo.__dict__.update(artefato['estado'])
+        return modelo
+
+
+class RepositorioModelos:
+    """Repositório versionado de modelos treinados em disco"""
+    
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modelos')
+        
+    def caminho(self, nome):
+        """Caminho do artefato de um modelo na versão atual do formato"""
+        # A versão do scikit-learn entra no nome: artefatos de outra versão não são reaproveitados
+        return os.path.join(self.diretorio, f'{nome}-v{VERSAO_MODELOS}-sklearn{versao_sklearn()}.joblib')
+    
+    def salvar(self, nome, modelo):
+        """Salva o modelo no repositório, substituindo o artefato anterior de forma atômica"""
+        os.makedirs(self.diretorio, exist_ok=True)
+        destino = self.caminho(nome)
+        temporario = f'{destino}.{os.getpid()}.tmp'
+        modelo.salvar(temporario)
+        os.replace(temporario, destino)
+        
+    def carregar(self, nome, classe):
+        """Carrega um modelo compatível, ou retorna None se não houver artefato utilizável"""
+        caminho = self.caminho(nome)
+        if not os.path.exists(caminho):
+            return None
+        
+        try:
+            modelo = classe.carregar(caminho)
+        except Exception as erro:
+            print(f"⚠ Artefato {caminho} ignorado: {erro}")
+            return None
+        
+        print(f"✓ Modelo {nome} carregado de {caminho}")
+        return modelo
+
+
+class BufferTreinamento:
+    """Buffer de tamanho fixo com amostras de telemetria para retreinamento incremental
+    
+    No modo 'reservatorio' mantém uma amostra uniforme de todo o histórico visto;
+    no modo 'janela' mantém as leituras mais recentes. Adicionar N leituras custa
+    O(N), independentemente do histórico acumulado.
+    """
+    
+    def __init__(self, capacidade=50_000, modo='reservatorio', seed=42):
+        if modo not in ('reservatorio', 'janela'):
+            raise ValueError(f"Modo de buffer inválido: {modo}")
+        self.capacidade = capacidade
+        self.modo = modo
+        self.rng = np.random.default_rng(seed)
+        self.dados = None
+        self.tamanho = 0
+        self.vistos = 0
+        self.posicao = 0
+        
+    def adicionar(self, X):
+        """Adiciona um bloco de leituras (ndarray N x features) ao buffer"""
+        X = np.asarray(X, dtype=float)
+        num_leituras = len(X)
+        if num_leituras == 0:
+            return
+        
+        if self.dados is None:
+            self.dados = np.empty((self.capacidade, X.shape[1]))
+        elif not self.dados.flags.writeable:
+            # Buffers carregados de disco vêm mapeados em memória somente leitura
+            self.dados = np.array(self.dados)
+        
+        if self.modo == 'janela':
+            X = X[-self.capacidade:]
+            indices = (self.posicao + np.arange(len(X))) % self.capacidade
+            self.dados[indices] = X
+            self.posicao = (self.posicao + len(X)) % self.capacidade
+            self.tamanho = min(self.capacidade, self.tamanho + len(X))
+        else:
+            # Preenche as posições livres e depois aplica a amostragem de reservatório
+            livres = min(self.capacidade - self.tamanho, len(X))
+            self.dados[self.tamanho:self.tamanho + livres] = X[:livres]
+            self.tamanho += livres
+            
+            resto = X[livres:]
+            if len(resto):
+                contagem = self.vistos + livres + np.arange(1, len(resto) + 1)
+                sorteio = (self.rng.random(len(resto)) * contagem).astype(np.int64)
+                aceitos = sorteio < self.capacidade
+                self.dados[sorteio[aceitos]] = resto[aceitos]
+        
+        self.vistos += num_leituras
+        
+    def amostras(self):
+        """Retorna as leituras atualmente no buffer"""
+        if self.dados is None:
+            return np.empty((0, len(PIPELINE_FEATURES.colunas)))
+        return self.dados[:self.tamanho]
+
+
+def _ajustar_serie(valores, dias_futuros=30, periodo_sazonal=7):
+    """Ajusta um modelo de suavização exponencial a uma série diária e prevê o horizonte
+    
+    Usa Holt-Winters aditivo com sazonalidade quando há ao menos dois ciclos
+    completos, suavização simples com histórico mais curto e a média como último
+    recurso. Função de módulo para poder ser enviada a processos de trabalho.
+    """
+    valores = np.asarray(valores, dtype=float)
+    
+    if len(valores) == 0 or valores.sum() == 0:
+        return {'demanda_prevista': 0, 'ic_min': 0, 'ic_max': 0, 'modelo': 'sem_demanda'}
+    
+    previsao_diaria = None
+    residuos = valores - valores.mean()
+    modelo = 'media'
+    
+    if len(valores) >= 3:
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        
+        sazonal = len(valores) >= 2 * periodo_sazonal
+        try:
+            ajuste = ExponentialSmoothing(
+                valores,
+                seasonal='add' if sazonal else None,
+                seasonal_periods=periodo_sazonal if sazonal else None,
+                initialization_method='estimated'
+            ).fit()
+            previsao_diaria = ajuste.forecast(dias_futuros)
+            residuos = ajuste.resid
+            modelo = 'holt_winters' if sazonal else 'suavizacao_simples'
+        except (ValueError, np.linalg.LinAlgError):
+            previsao_diaria = None
+    
+    if previsao_diaria is None:
+        previsao_diaria = np.full(dias_futuros, valores.mean())
+    
+    # Demanda não é negativa; o intervalo de 95% soma o erro dos dias do horizonte
+    previsao_total = int(np.clip(previsao_diaria, 0, None).sum())
+    margem_erro = int(1.96 * np.sqrt(np.mean(residuos ** 2)) * np.sqrt(dias_futuros))
+    
+    return {
+        'demanda_prevista': previsao_total,
+        'ic_min': max(0, previsao_total - margem_erro),
+        'ic_max': previsao_total + margem_erro,
+        'modelo': modelo,
+    }
+
+
+def _impressao_serie(valores, dias_futuros, periodo_sazonal):
+    """Chave de cache de um ajuste: conteúdo da série e parâmetros da previsão"""
+    resumo = hashlib.sha1(np.ascontiguousarray(valores, dtype=float).tobytes())
+    resumo.update(f'{dias_futuros}:{periodo_sazonal}'.encode())
+    return resumo.hexdigest()
+
+
+def _ajustar_em_pool(executor, argumentos, n_processos):
+    """Ajusta as séries de argumentos no pool, em blocos que equilibram a carga entre os processos"""
+    return list(executor.map(
+        _ajustar_serie, *zip(*argumentos),
+        chunksize=max(1, len(argumentos) // (4 * n_processos))
+    ))
+
+
+def prever_series(series, dias_futuros=30, periodo_sazonal=7, n_processos=1, cache=None,
+                  capacidade_cache=256, executor=None):
+    """Ajusta e prevê várias séries diárias (colunas de um DataFrame data × série)
+    
+    Séries já ajustadas com o mesmo conteúdo são lidas do cache (OrderedDict
+    impressão -> resultado, LRU com até capacidade_cache ajustes). As demais são
+    ajustadas em paralelo no executor informado (um pool reaproveitado entre
+    chamadas) ou, sem ele, em um pool de n_processos processos criado para a
+    chamada (n_processos=1 ajusta no processo atual).
+    """
+    n_processos = n_processos or os.cpu_count() or 1
+    cache = cache if cache is not None else OrderedDict()
+    impressoes = {
+        nome: _impressao_serie(series[nome].to_numpy(), dias_futuros, periodo_sazonal)
+        for nome in series.columns
+    }
+    resultados_por_impressao = {}
+    for impressao in impressoes.values():
+        if impressao in cache:
+            cache.move_to_end(impressao)
+            resultados_por_impressao[impressao] = cache[impressao]
+    pendentes = [nome for nome in series.columns if impressoes[nome] not in resultados_por_impressao]
+    
+    if pendentes:
+        argumentos = [
+            (series[nome].to_numpy(dtype=float), dias_futuros, periodo_sazonal) for nome in pendentes
+        ]
+        if len(pendentes) == 1 or (executor is None and n_processos == 1):
+            resultados = [_ajustar_serie(*args) for args in argumentos]
+        elif executor is not None:
+            resultados = _ajustar_em_pool(executor, argumentos, n_processos)
+        else:
+            with ProcessPoolExecutor(max_workers=n_processos) as executor:
+                resultados = _ajustar_em_pool(executor, argumentos, n_processos)
+        for nome, resultado in zip(pendentes, resultados):
+            resultados_por_impressao[impressoes[nome]] = resultado
+            cache[impressoes[nome]] = resultado
+        while len(cache) > capacidade_cache:
+            cache.popitem(last=False)
+    
+    previsoes = pd.DataFrame([resultados_por_impressao[impressoes[nome]] for nome in series.columns])
+    previsoes.insert(0, 'serie', list(series.columns))
+    return previsoes
+
+
+class ManutencaoPreditiva(ModeloPersistente):
     """Modelo de Manutenção Preditiva usando Random Forest"""
     
-    def __init__(self):
+    # O TempoAteFalha tem artefato próprio; é associado de novo após a carga
+    ATRIBUTOS_TRANSIENTES = ('modelo_tempo',)
+    
+    def __init__(self, modelo_tempo=None):
+        from sklearn.ensemble import RandomForestClassifier
+        
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.scaler = StandardScaler()
+        # Padronização das features (EscalaFeatures), em geral a ajustada pelo ArmazemFeatures
+        self.escala = None
+        self.features = list(FEATURES)
+        # TempoAteFalha treinado à parte, usado por prever_horas_ate_falha
+        self.modelo_tempo = modelo_tempo
         self.is_trained = False
+        self.metadados = {}
         
     def preparar_dados(self, df_metricas):
         """Prepara dados para treinamento"""
-        # Features para predição
-        features = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 
-                   'disco_uso_percent', 'num_falhas']
-        
-        # Remove linhas com valores nulos
-        df = df_metricas[features + ['estado']].dropna()
-        
-        # Cria target binário: 0 = Bom/Novo, 1 = Atenção/Crítico (precisa manutenção)
-        df['precisa_manutencao'] = df['estado'].apply(
-            lambda x: 1 if x in ['Atenção', 'Crítico'] else 0
-        )
-        
-        X = df[features]
-        y = df['precisa_manutencao']
-        
-        return X, y
+        # Remove linhas com valores nulos; features pontuais e temporais vêm do pipeline compartilhado
+        df, X = preparar_features(df_metricas.dropna(subset=['estado']))
+        return X, self._alvo(df)
+    
+    def preparar_dados_escalados(self, df_metricas):
+        """Como preparar_dados, mas com a matriz padronizada (float32) do armazém compartilhado e sua escala"""
+        df, X, escala = ARMAZEM_FEATURES.preparar(df_metricas.dropna(subset=['estado']))
+        return X, self._alvo(df), escala
+    
+    @staticmethod
+    def _alvo(df):
+        # Target binário: 0 = Bom/Novo, 1 = Atenção/Crítico (precisa manutenção)
+        return df['estado'].isin(['Atenção', 'Crítico']).astype(int).rename('precisa_manutencao')
     
     def treinar(self, df_metricas):
         """Treina o modelo de manutenção preditiva"""
-        print("Treinando modelo de Manutenção Preditiva...")
+        X, y, escala = self.preparar_dados_escalados(df_metricas)
+        return self.treinar_arrays(X, y.to_numpy(), escala.colunas, escala=escala)
+    
+    @instrumentar('manutencao_treinar')
+    def treinar_arrays(self, X, y, colunas=None, escala=None):
+        """Treina a partir da matriz de features e do alvo (colunas padrão: FEATURES)
         
-        X, y = self.preparar_dados(df_metricas)
+        Com escala, X já vem padronizada por ela (ex: do ArmazemFeatures) e não é
+        padronizada de novo; train_test_split ainda copia as partições de treino e teste.
+        """
+        from sklearn.metrics import classification_report, accuracy_score
+        from sklearn.model_selection import train_test_split
+        
+        print("Treinando modelo de Manutenção Preditiva...")
+        self.features = _colunas_treino(X, colunas)
+        # Normalização
+        self.escala, X = _escalar_treino(X, self.features, escala)
         
         # Split treino/teste
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
         
-        # Normalização
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
         # Treinamento
-        self.model.fit(X_train_scaled, y_train)
+        self.model.fit(X_train, y_train)
         
         # Avaliação
-        y_pred = self.model.predict(X_test_scaled)
+        y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         
         print(f"✓ Modelo treinado com acurácia: {accuracy:.2%}")
@@ -74,40 +410,76 @@ class ManutencaoPreditiva:
         
         # Feature importance
         importances = pd.DataFrame({
-            'feature': X.columns,
+            'feature': self.features,
             'importance': self.model.feature_importances_
         }).sort_values('importance', ascending=False)
         
         print("\nImportância das Features:")
         print(importances)
         
+        self.metadados = {
+            'treinado_em': datetime.now().isoformat(),
+            'num_amostras': len(X),
+            'features': self.features,
+            'acuracia': float(accuracy),
+        }
         self.is_trained = True
         return accuracy
     
     def prever(self, metricas):
-        """Prevê se equipamento precisa de manutenção"""
+        """Prevê se equipamento precisa de manutenção
+        
+        Uma leitura avulsa não tem histórico: as features temporais repetem o valor
+        atual. Para leituras contínuas de um equipamento, passe o resultado de
+        HistoricoRecente.transformar para prever_lote.
+        """
+        resultado = self.prever_lote(pd.DataFrame([metricas])).iloc[0]
+        
+        return {
+            'precisa_manutencao': bool(resultado['precisa_manutencao']),
+            'probabilidade_falha': float(resultado['probabilidade_falha']),
+            'nivel_risco': resultado['nivel_risco']
+        }
+    
+    @instrumentar('manutencao_prever', contar_itens=True)
+    def prever_lote(self, leituras):
+        """Prevê a necessidade de manutenção para N leituras de uma vez
+        
+        Aceita um DataFrame de leituras ou um ndarray com as colunas de
+        self.features (ou só as leituras brutas, N x 5) e retorna um DataFrame
+        com uma linha por leitura.
+        """
         if not self.is_trained:
             raise Exception("Modelo não treinado. Execute treinar() primeiro.")
         
-        # Prepara features
-        features = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 
-                   'disco_uso_percent', 'num_falhas']
-        
-        X = pd.DataFrame([metricas])[features]
-        X_scaled = self.scaler.transform(X)
+        X_scaled = ARMAZEM_FEATURES.matriz(leituras, self.escala)
         
-        # Predição
-        predicao = self.model.predict(X_scaled)[0]
-        probabilidade = self.model.predict_proba(X_scaled)[0]
+        # Predição (a classe 1 é "precisa manutenção")
+        probabilidade = self.model.predict_proba(X_scaled)[:, 1]
         
-        return {
-            'precisa_manutencao': bool(predicao),
-            'probabilidade_falha': float(probabilidade[1]),
-            'nivel_risco': 'Alto' if probabilidade[1] > 0.7 else 'Médio' if probabilidade[1] > 0.4 else 'Baixo'
-        }
+        return pd.DataFrame({
+            'precisa_manutencao': probabilidade > 0.5,
+            'probabilidade_falha': probabilidade,
+            'nivel_risco': np.select(
+                [probabilidade > 0.7, probabilidade > 0.4], ['Alto', 'Médio'], 'Baixo'
+            )
+        }, index=leituras.index if isinstance(leituras, pd.DataFrame) else None)
+    
+    def prever_horas_ate_falha(self, metricas, idade_meses):
+        """Estima tempo até falha (horas) com o TempoAteFalha de modelo_tempo"""
+        if self.modelo_tempo is None:
+            raise Exception("Sem modelo de tempo até falha. Informe um TempoAteFalha treinado em modelo_tempo.")
+        return self.modelo_tempo.prever({**metricas, 'idade_meses': idade_meses})
     
     def prever_tempo_ate_falha(self, metricas, idade_meses):
-        """Estima tempo até falha baseado em métricas atuais"""
+        """Estima tempo até falha em meses (inteiro)
+        
+        Com modelo_tempo, converte prever_horas_ate_falha (meses de 30 dias, mínimo 1);
+        sem ele, usa a estimativa simplificada pela probabilidade de falha.
+        """
+        if self.modelo_tempo is not None:
+            return max(1, int(round(self.prever_horas_ate_falha(metricas, idade_meses) / (24 * 30))))
+        
         prob_falha = self.prever(metricas)['probabilidade_falha']
         
         # Estimativa simplificada: quanto maior a probabilidade, menor o tempo
@@ -124,11 +496,168 @@ class ManutencaoPreditiva:
         return tempo_meses
 
 
-class PrevisaoDemanda:
-    """Modelo de Previsão de Demanda usando análise de séries temporais"""
+class TempoAteFalha(ModeloPersistente):
+    """Tempo até a próxima falha (horas) por regressão sobre a telemetria
+    
+    O alvo é observado no histórico: as horas entre cada leitura e o próximo aumento
+    de num_falhas do mesmo equipamento. Leituras sem falha posterior no histórico
+    (censuradas) ficam de fora do treinamento.
+    """
     
     def __init__(self):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        
+        self.model = HistGradientBoostingRegressor(max_iter=200, random_state=42)
+        self.features = PIPELINE_FEATURES.colunas + ['idade_meses']
+        self.is_trained = False
+        self.metadados = {}
+        
+    def preparar_dados(self, df_metricas):
+        """Features do pipeline mais a idade, e o alvo: horas até a próxima falha observada"""
+        df, X = preparar_features(df_metricas.dropna(subset=['idade_meses']))
+        X = X.assign(idade_meses=df['idade_meses'].to_numpy(dtype=float))
+        y = PIPELINE_FEATURES.horas_ate_proxima_falha(df).rename('horas_ate_falha')
+        observadas = y.notna()
+        return X[observadas], y[observadas]
+    
+    def treinar(self, df_metricas):
+        """Treina o modelo de tempo até falha"""
+        X, y = self.preparar_dados(df_metricas)
+        return self.treinar_arrays(X.to_numpy(dtype=float), y.to_numpy(dtype=float), list(X.columns))
+    
+    @instrumentar('tempo_falha_treinar')
+    def treinar_arrays(self, X, y, colunas=None):
+        """Treina a partir da matriz de features (com idade_meses) e das horas até a próxima falha"""
+        from sklearn.metrics import mean_absolute_error
+        from sklearn.model_selection import train_test_split
+        
+        print("Treinando modelo de Tempo até Falha...")
+        self.features = _colunas_treino(X, colunas if colunas is not None else self.features)
+        
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        self.model.fit(X_train, y_train)
+        erro = mean_absolute_error(y_test, np.maximum(self.model.predict(X_test), 0))
+        # Referência: prever sempre a média do treino
+        erro_referencia = mean_absolute_error(y_test, np.full(len(y_test), y_train.mean()))
+        
+        print(f"✓ Modelo treinado com erro médio absoluto de {erro:.1f} h "
+              f"(média do treino: {erro_referencia:.1f} h)")
+        
+        self.metadados = {
+            'treinado_em': datetime.now().isoformat(),
+            'num_amostras': len(X),
+            'features': self.features,
+            'erro_medio_horas': float(erro),
+            'erro_referencia_horas': float(erro_referencia),
+        }
+        self.is_trained = True
+        return erro
+    
+    def prever(self, metricas):
+        """Tempo até falha (horas) de uma leitura com idade_meses"""
+        return float(self.prever_lote(pd.DataFrame([metricas]))['tempo_ate_falha_horas'].iloc[0])
+    
+    @instrumentar('tempo_falha_prever', contar_itens=True)
+    def prever_lote(self, leituras):
+        """Tempo até falha de N leituras de uma vez (DataFrame com idade_meses ou ndarray (N, 6) ou (N, 23))"""
+        if not self.is_trained:
+            raise Exception("Modelo não treinado. Execute treinar() primeiro.")
+        
+        horas = np.maximum(self.model.predict(_matriz_features(leituras, self.features)), 0)
+        
+        return pd.DataFrame({
+            'tempo_ate_falha_horas': np.round(horas, 1)
+        }, index=leituras.index if isinstance(leituras, pd.DataFrame) else None)
+
+
+class CacheVidaRestante:
+    """Tempo até falha por equipamento, recalculado no máximo uma vez por janela de validade
+    
+    As leituras mudam a cada varredura, então a chave é o equipamento (e a versão do
+    modelo), não o conteúdo das métricas: dentro da validade a estimativa anterior é
+    reaproveitada; depois dela, ou com um modelo retreinado, é recalculada.
+    """
+    
+    def __init__(self, modelo_tempo, validade=pd.Timedelta(minutes=15)):
+        self.modelo = modelo_tempo
+        self.validade = pd.Timedelta(validade)
+        # Instante do cálculo e previsão de cada equipamento, em arrays paralelos
+        self._ids = pd.Index([], dtype=object)
+        self._calculado_em = np.zeros(0, dtype=np.int64)
+        self._horas = np.zeros(0)
+        self._versao_modelo = None
+        self.acertos = 0
+        self.recalculos = 0
+        self._trava = threading.Lock()
+        
+    def prever_frota(self, leituras, agora=None):
+        """Tempo até falha de cada leitura (com equipamento_id), em uma chamada vetorizada"""
+        agora = pd.Timestamp.now().value if agora is None else pd.Timestamp(agora).value
+        ids = leituras['equipamento_id'].to_numpy(dtype=object)
+        
+        with self._trava:
+            # Modelo retreinado (ou trocado): as estimativas anteriores deixam de valer
+            versao_modelo = (id(self.modelo), self.modelo.metadados.get('treinado_em'))
+            if versao_modelo != self._versao_modelo:
+                self._calculado_em[:] = 0
+                self._versao_modelo = versao_modelo
+            
+            posicoes = self._ids.get_indexer(ids)
+            em_cache = posicoes >= 0
+            validas = np.zeros(len(ids), dtype=bool)
+            validas[em_cache] = agora - self._calculado_em[posicoes[em_cache]] < self.validade.value
+            
+            horas = np.empty(len(ids))
+            horas[validas] = self._horas[posicoes[validas]]
+            recalcular = ~validas
+            if recalcular.any():
+                horas[recalcular] = self.modelo.prever_lote(leituras[recalcular])['tempo_ate_falha_horas'].to_numpy()
+                
+                atualizar = recalcular & em_cache
+                self._calculado_em[posicoes[atualizar]] = agora
+                self._horas[posicoes[atualizar]] = horas[atualizar]
+                
+                novos = ~em_cache
+                if novos.any():
+                    # Equipamento repetido no lote: vale a última leitura
+                    unicos = ~pd.Index(ids[novos]).duplicated(keep='last')
+                    self._ids = self._ids.append(pd.Index(ids[novos][unicos], dtype=object))
+                    self._calculado_em = np.concatenate([self._calculado_em,
+                                                         np.full(int(unicos.sum()), agora, dtype=np.int64)])
+                    self._horas = np.concatenate([self._horas, horas[novos][unicos]])
+            
+            self.acertos += int(validas.sum())
+            self.recalculos += int(recalcular.sum())
+        
+        return pd.Series(horas, index=leituras.index, name='tempo_ate_falha_horas')
+    
+    def estatisticas(self):
+        return {
+            'equipamentos': len(self._ids),
+            'acertos': self.acertos,
+            'recalculos': self.recalculos,
+        }
+
+
+class PrevisaoDemanda(ModeloPersistente):
+    """Modelo de Previsão de Demanda usando análise de séries temporais (Holt-Winters)"""
+    
+    # O pool de processos dos ajustes é recriado no primeiro uso após a carga
+    ATRIBUTOS_TRANSIENTES = ('_executor',)
+    
+    def __init__(self, periodo_sazonal=7, n_processos=None, capacidade_cache=256):
+        # Matriz de demanda (data × categoria) com a contagem diária de saídas
         self.historico_demanda = None
+        # Linhas de movimentações já contadas e a impressão da primeira e da última delas
+        self._linhas_processadas = 0
+        self._marcas = None
+        self.periodo_sazonal = periodo_sazonal
+        # Processos que ajustam as séries (None = um por CPU), em um pool mantido enquanto o modelo existir
+        self.n_processos = n_processos
+        self._executor = None
+        # Ajustes já calculados, indexados pela impressão da série (LRU)
+        self.capacidade_cache = capacidade_cache
+        self._cache_ajustes = OrderedDict()
         
     def preparar_dados(self, df_movimentacoes):
         """Prepara dados de movimentações para análise de demanda"""
@@ -136,10 +665,99 @@ class PrevisaoDemanda:
         df = df_movimentacoes[df_movimentacoes['tipo'] == 'SAIDA'].copy()
         df['data'] = pd.to_datetime(df['timestamp']).dt.date
         
-        demanda_diaria = df.groupby(['data', 'categoria']).size().reset_index(name='quantidade')
+        demanda_diaria = df.groupby(['data', 'categoria'], observed=True).size().reset_index(name='quantidade')
         
         return demanda_diaria
     
+    def _contar_saidas(self, df_movimentacoes):
+        """Conta as saídas por dia e categoria, interpretando os timestamps uma única vez"""
+        saidas = df_movimentacoes[df_movimentacoes['tipo'] == 'SAIDA']
+        datas = pd.to_datetime(saidas['timestamp']).dt.normalize()
+        
+        return saidas.groupby([datas.rename('data'), 'categoria'], observed=True).size().unstack(fill_value=0)
+    
+    @staticmethod
+    def _impressao_linha(df_movimentacoes, posicao):
+        """Impressão digital de uma linha de movimentação (colunas usadas na contagem)"""
+        colunas = [coluna for coluna in ['timestamp', 'equipamento_id', 'tipo', 'categoria'] if coluna in df_movimentacoes]
+        return int(pd.util.hash_pandas_object(df_movimentacoes.iloc[[posicao]][colunas], index=False).iloc[0])
+    
+    def construir_cubo(self, df_movimentacoes):
+        """Monta a matriz de demanda (data × categoria) a partir das movimentações"""
+        self.historico_demanda = self._contar_saidas(df_movimentacoes)
+        self._linhas_processadas = 0
+        self._marcas = None
+        self._avancar(df_movimentacoes)
+        
+        return self.historico_demanda
+    
+    def registrar_movimentacoes(self, df_novas):
+        """Soma novas movimentações à matriz de demanda sem reprocessar o histórico
+        
+        As linhas passam a contar como processadas: um DataFrame com o histórico
+        seguido delas, informado depois a prever_demanda_todas, não é recontado.
+        """
+        novas = self._contar_saidas(df_novas)
+        if self.historico_demanda is None:
+            self.historico_demanda = novas
+        else:
+            # Dia novo sem saída de uma categoria antiga fica sem valor nos dois lados da soma
+            self.historico_demanda = self.historico_demanda.add(novas, fill_value=0).fillna(0).astype(int)
+        self._avancar(df_novas)
+        
+        return self.historico_demanda
+    
+    def _avancar(self, df_novas):
+        """Marca as linhas de df_novas como processadas, logo após as anteriores"""
+        if len(df_novas) == 0:
+            return
+        inicio = self._marcas[0] if self._marcas is not None else self._impressao_linha(df_novas, 0)
+        self._marcas = (inicio, self._impressao_linha(df_novas, len(df_novas) - 1))
+        self._linhas_processadas += len(df_novas)
+    
+    def _sincronizar_cubo(self, df_movimentacoes):
+        """Garante que a matriz reflete df_movimentacoes, processando só as linhas novas
+        
+        As linhas já processadas são reconhecidas pela quantidade e pela impressão da
+        primeira e da última delas: um DataFrame novo com o mesmo histórico mais linhas
+        acrescentadas só tem as novas contadas; qualquer outro refaz a matriz.
+        """
+        n = self._linhas_processadas
+        if n == 0 or len(df_movimentacoes) < n or self._marcas != (
+                self._impressao_linha(df_movimentacoes, 0), self._impressao_linha(df_movimentacoes, n - 1)):
+            self.construir_cubo(df_movimentacoes)
+        elif len(df_movimentacoes) > n:
+            self.registrar_movimentacoes(df_movimentacoes.iloc[n:])
+    
+    def series_diarias(self, ate=None):
+        """Retorna a matriz de demanda com todos os dias do período, zerando dias sem saída
+        
+        O período vai até o dia ate (padrão: hoje), então os últimos dias sem saída
+        também entram como demanda zero.
+        """
+        if self.historico_demanda is None or self.historico_demanda.empty:
+            return self.historico_demanda
+        
+        ate = pd.Timestamp(ate if ate is not None else pd.Timestamp.now()).normalize()
+        dias = pd.date_range(self.historico_demanda.index.min(), max(self.historico_demanda.index.max(), ate),
+                             freq='D')
+        return self.historico_demanda.reindex(dias, fill_value=0)
+    
+    def _pool(self):
+        """Pool de processos dos ajustes, criado no primeiro uso (None com um único processo)"""
+        n_processos = self.n_processos or os.cpu_count() or 1
+        if n_processos > 1 and self._executor is None:
+            # spawn: o pool pode nascer em uma thread do dashboard, e fork com threads ativas pode travar
+            self._executor = ProcessPoolExecutor(max_workers=n_processos,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+    
+    def fechar(self):
+        """Encerra o pool de processos dos ajustes, se houver"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
     def calcular_media_movel(self, df_demanda, categoria, janela=7):
         """Calcula média móvel para suavizar tendências"""
         df_cat = df_demanda[df_demanda['categoria'] == categoria].copy()
@@ -148,62 +766,108 @@ class PrevisaoDemanda:
         
         return df_cat
     
+    @instrumentar('demanda_prever', contar_itens=True)
+    def prever_demanda_todas(self, df_movimentacoes=None, dias_futuros=30, metodo='holt_winters'):
+        """Prevê a demanda de todas as categorias de uma vez a partir da matriz de demanda
+        
+        Se df_movimentacoes for informado, a matriz é sincronizada antes: montada na
+        primeira chamada e, depois, atualizada apenas com as linhas acrescentadas.
+        Com metodo='holt_winters' cada categoria é ajustada sobre a série diária
+        completa; metodo='media' usa a média dos dias com demanda × horizonte.
+        """
+        if df_movimentacoes is not None:
+            self._sincronizar_cubo(df_movimentacoes)
+        if self.historico_demanda is None:
+            raise Exception("Sem histórico de demanda. Informe df_movimentacoes ou execute construir_cubo() primeiro.")
+        
+        if metodo == 'holt_winters':
+            series = self.series_diarias()
+            previsoes = prever_series(series, dias_futuros, self.periodo_sazonal, self.n_processos,
+                                      self._cache_ajustes, self.capacidade_cache, self._pool())
+            return pd.DataFrame({
+                'categoria': previsoes['serie'],
+                'dias_futuros': dias_futuros,
+                'demanda_prevista': previsoes['demanda_prevista'],
+                'ic_min': previsoes['ic_min'],
+                'ic_max': previsoes['ic_max'],
+                'media_diaria': series.mean().round(2).to_numpy(),
+                'desvio_padrao': series.std().fillna(0).round(2).to_numpy(),
+                'modelo': previsoes['modelo'],
+            })
+        
+        # Dias sem saída não entram nas estatísticas
+        demanda = self.historico_demanda.where(self.historico_demanda > 0)
+        media_diaria = demanda.mean()
+        desvio_padrao = demanda.std().fillna(0)
+        
+        # Previsão simples: média diária × horizonte, com intervalo de confiança de 95%
+        previsao_total = (media_diaria * dias_futuros).fillna(0).astype(int)
+        margem_erro = (1.96 * desvio_padrao * np.sqrt(dias_futuros)).astype(int)
+        
+        return pd.DataFrame({
+            'categoria': media_diaria.index,
+            'dias_futuros': dias_futuros,
+            'demanda_prevista': previsao_total.to_numpy(),
+            'ic_min': np.maximum(0, previsao_total - margem_erro).to_numpy(),
+            'ic_max': (previsao_total + margem_erro).to_numpy(),
+            'media_diaria': media_diaria.round(2).to_numpy(),
+            'desvio_padrao': desvio_padrao.round(2).to_numpy(),
+            'modelo': 'media',
+        })
+    
     def prever_demanda(self, df_movimentacoes, categoria, dias_futuros=30):
         """Prevê demanda futura baseada em histórico"""
         print(f"Prevendo demanda para {categoria} nos próximos {dias_futuros} dias...")
         
-        demanda_diaria = self.preparar_dados(df_movimentacoes)
-        df_cat = demanda_diaria[demanda_diaria['categoria'] == categoria]
+        previsoes = self.prever_demanda_todas(df_movimentacoes, dias_futuros)
+        previsao = previsoes[previsoes['categoria'] == categoria]
         
-        if len(df_cat) == 0:
+        if len(previsao) == 0:
             print(f"⚠ Sem dados históricos para {categoria}")
             return None
         
-        # Calcula estatísticas básicas
-        media_diaria = df_cat['quantidade'].mean()
-        desvio_padrao = df_cat['quantidade'].std()
-        
-        # Previsão simples: média + variação aleatória
-        previsao_total = int(media_diaria * dias_futuros)
-        
-        # Intervalo de confiança
-        margem_erro = int(1.96 * desvio_padrao * np.sqrt(dias_futuros))
-        
+        previsao = previsao.iloc[0]
         resultado = {
             'categoria': categoria,
             'dias_futuros': dias_futuros,
-            'demanda_prevista': previsao_total,
-            'intervalo_confianca': (
-                max(0, previsao_total - margem_erro),
-                previsao_total + margem_erro
-            ),
-            'media_diaria': round(media_diaria, 2),
-            'desvio_padrao': round(desvio_padrao, 2)
+            'demanda_prevista': int(previsao['demanda_prevista']),
+            'intervalo_confianca': (int(previsao['ic_min']), int(previsao['ic_max'])),
+            'media_diaria': float(previsao['media_diaria']),
+            'desvio_padrao': float(previsao['desvio_padrao'])
         }
         
-        print(f"✓ Demanda prevista: {previsao_total} unidades")
+        print(f"✓ Demanda prevista: {resultado['demanda_prevista']} unidades")
         print(f"  Intervalo de confiança (95%): {resultado['intervalo_confianca']}")
         
         return resultado
 
 
-class DeteccaoAnomalias:
+class DeteccaoAnomalias(ModeloPersistente):
     """Detecção de Anomalias usando Isolation Forest"""
     
-    def __init__(self):
+    def __init__(self, capacidade_buffer=50_000, modo_buffer='reservatorio'):
+        from sklearn.ensemble import IsolationForest
+        
         self.model = IsolationForest(contamination=0.1, random_state=42)
-        self.scaler = StandardScaler()
+        self.escala = None
+        self.buffer = BufferTreinamento(capacidade_buffer, modo_buffer)
+        self.features = list(FEATURES)
         self.is_trained = False
+        self.metadados = {}
         
     def treinar(self, df_metricas):
         """Treina modelo de detecção de anomalias"""
-        print("Treinando modelo de Detecção de Anomalias...")
+        _, X, escala = ARMAZEM_FEATURES.preparar(df_metricas)
+        self.treinar_arrays(X, colunas=escala.colunas, escala=escala)
         
-        features = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 
-                   'disco_uso_percent', 'num_falhas']
+    @instrumentar('anomalias_treinar')
+    def treinar_arrays(self, X, y=None, colunas=None, escala=None):
+        """Treina a partir da matriz de features (colunas padrão: FEATURES; com escala, já padronizada)"""
+        print("Treinando modelo de Detecção de Anomalias...")
+        self.features = _colunas_treino(X, colunas)
         
-        X = df_metricas[features].dropna()
-        X_scaled = self.scaler.fit_transform(X)
+        ja_escalada = escala is not None
+        self.escala, X_scaled = _escalar_treino(X, self.features, escala)
         
         # Treinamento
         self.model.fit(X_scaled)
@@ -214,30 +878,97 @@ class DeteccaoAnomalias:
         
         print(f"✓ Modelo treinado. Detectadas {num_anomalias} anomalias no dataset ({num_anomalias/len(X):.1%})")
         
+        self.metadados = {
+            'treinado_em': datetime.now().isoformat(),
+            'num_amostras': len(X),
+            'features': self.features,
+            'taxa_anomalias': float(num_anomalias / len(X)),
+        }
+        # O buffer guarda leituras nas unidades originais; a matriz padronizada volta em blocos
+        if ja_escalada:
+            for inicio in range(0, len(X), self.buffer.capacidade):
+                self.buffer.adicionar(self.escala.reverter(X[inicio:inicio + self.buffer.capacidade]))
+        else:
+            self.buffer.adicionar(X)
+        self.is_trained = True
+        
+    def atualizar(self, df_novo, reajustar=True):
+        """Atualiza o modelo com uma nova janela de telemetria, sem revisitar o histórico
+        
+        A escala é atualizada de forma incremental (passando a valer só para este
+        modelo) e a Isolation Forest é reajustada sobre o buffer de treinamento,
+        cujo tamanho é fixo.
+        """
+        X = _matriz_features(preparar_features(df_novo)[1], self.features)
+        if len(X):
+            self.escala = EscalaFeatures.ajustar(X, self.features) if self.escala is None \
+                else self.escala.combinar(X)
+            self.buffer.adicionar(X)
+        
+        if reajustar:
+            self._reajustar()
+            
+    def treinar_em_lotes(self, lotes):
+        """Treina a partir de um iterador de DataFrames com memória limitada ao buffer"""
+        print("Treinando modelo de Detecção de Anomalias em lotes...")
+        for lote in lotes:
+            self.atualizar(lote, reajustar=False)
+        self._reajustar()
+        print(f"✓ Modelo treinado com {self.buffer.tamanho} de {self.buffer.vistos} leituras no buffer")
+        
+    @instrumentar('anomalias_reajustar')
+    def _reajustar(self):
+        """Reajusta a Isolation Forest sobre as amostras do buffer"""
+        amostras = self.buffer.amostras()
+        if len(amostras) == 0:
+            return
+        
+        self.model.fit(self.escala.aplicar(amostras))
+        self.metadados.update({
+            'atualizado_em': datetime.now().isoformat(),
+            'num_amostras': self.buffer.vistos,
+            'features': self.features,
+        })
         self.is_trained = True
         
     def detectar_anomalia(self, metricas):
         """Detecta se métricas são anômalas"""
+        resultado = self.detectar_anomalias_lote(pd.DataFrame([metricas])).iloc[0]
+        
+        return {
+            'eh_anomalia': bool(resultado['eh_anomalia']),
+            'anomaly_score': float(resultado['anomaly_score']),
+            'severidade': resultado['severidade']
+        }
+    
+    @instrumentar('anomalias_detectar', contar_itens=True)
+    def detectar_anomalias_lote(self, leituras):
+        """Detecta anomalias em N leituras de uma vez (DataFrame ou ndarray (N, 5) ou (N, 22))"""
         if not self.is_trained:
             raise Exception("Modelo não treinado. Execute treinar() primeiro.")
         
-        features = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 
-                   'disco_uso_percent', 'num_falhas']
-        
-        X = pd.DataFrame([metricas])[features]
-        X_scaled = self.scaler.transform(X)
+        X_scaled = ARMAZEM_FEATURES.matriz(leituras, self.escala)
         
-        predicao = self.model.predict(X_scaled)[0]
-        score = self.model.score_samples(X_scaled)[0]
+        # predict() equivale a comparar o score com o offset aprendido
+        score = self.model.score_samples(X_scaled)
         
-        return {
-            'eh_anomalia': predicao == -1,
-            'anomaly_score': float(score),
-            'severidade': 'Alta' if score < -0.5 else 'Média' if score < -0.2 else 'Baixa'
-        }
+        return pd.DataFrame({
+            'eh_anomalia': score < self.model.offset_,
+            'anomaly_score': score,
+            'severidade': np.select([score < -0.5, score < -0.2], ['Alta', 'Média'], 'Baixa')
+        }, index=leituras.index if isinstance(leituras, pd.DataFrame) else None)
+
 
+def _validar_coluna(df_itens, coluna, valores, positiva=False):
+    """Levanta ValueError se a coluna tiver valores não finitos, negativos ou (se positiva) zero"""
+    invalidos = ~np.isfinite(valores) | ((valores <= 0) if positiva else (valores < 0))
+    if invalidos.any():
+        exigido = 'maior que zero' if positiva else 'maior ou igual a zero'
+        raise ValueError(f"{coluna} deve ser finito e {exigido}: {int(invalidos.sum())} itens inválidos "
+                         f"(ex: {list(df_itens.index[invalidos][:5])})")
 
-class OtimizacaoEstoque:
+
+class OtimizacaoEstoque(ModeloPersistente):
     """Otimização de níveis de estoque"""
     
     def calcular_ponto_reposicao(self, demanda_media_diaria, lead_time_dias, estoque_seguranca_dias=7):
@@ -276,62 +1007,173 @@ class OtimizacaoEstoque:
             'dias_restantes': round(dias_restantes, 1),
             'acao_recomendada': acao
         }
+    
+    @instrumentar('estoque_otimizar', contar_itens=True)
+    def otimizar_lote(self, df_itens, nivel_servico=0.95, estoque_seguranca_dias=7):
+        """Calcula ponto de reposição, EOQ, cobertura e status para uma tabela inteira
+        
+        df_itens tem uma linha por item (ex: SKU × almoxarifado) com as colunas
+        nivel_atual, demanda_media_diaria, lead_time_dias, custo_pedido e
+        custo_manutencao_anual. Se houver desvio_demanda_diaria e/ou
+        desvio_lead_time_dias, o estoque de segurança vem da variância da demanda
+        durante o lead time para o nível de serviço pedido; sem elas, usa
+        estoque_seguranca_dias de demanda média, como calcular_ponto_reposicao.
+        
+        Levanta ValueError se nivel_servico não estiver em (0, 1), se algum custo de
+        manutenção não for positivo ou se nível atual, demanda, lead time, custo de
+        pedido ou desvios forem negativos ou ausentes.
+        """
+        if not 0 < nivel_servico < 1:
+            raise ValueError(f"nivel_servico deve estar entre 0 e 1 (exclusive), recebido {nivel_servico}")
+        
+        nivel_atual = df_itens['nivel_atual'].to_numpy(dtype=float)
+        demanda = df_itens['demanda_media_diaria'].to_numpy(dtype=float)
+        lead_time = df_itens['lead_time_dias'].to_numpy(dtype=float)
+        custo_pedido = df_itens['custo_pedido'].to_numpy(dtype=float)
+        custo_manutencao = df_itens['custo_manutencao_anual'].to_numpy(dtype=float)
+        _validar_coluna(df_itens, 'nivel_atual', nivel_atual)
+        _validar_coluna(df_itens, 'demanda_media_diaria', demanda)
+        _validar_coluna(df_itens, 'lead_time_dias', lead_time)
+        _validar_coluna(df_itens, 'custo_pedido', custo_pedido)
+        _validar_coluna(df_itens, 'custo_manutencao_anual', custo_manutencao, positiva=True)
+        
+        if 'desvio_demanda_diaria' in df_itens or 'desvio_lead_time_dias' in df_itens:
+            zeros = np.zeros(len(df_itens))
+            desvio_demanda = df_itens.get('desvio_demanda_diaria', zeros)
+            desvio_lead_time = df_itens.get('desvio_lead_time_dias', zeros)
+            desvio_demanda = np.asarray(desvio_demanda, dtype=float)
+            desvio_lead_time = np.asarray(desvio_lead_time, dtype=float)
+            _validar_coluna(df_itens, 'desvio_demanda_diaria', desvio_demanda)
+            _validar_coluna(df_itens, 'desvio_lead_time_dias', desvio_lead_time)
+            
+            # SS = z * sqrt(LT * σd² + d² * σLT²)
+            z = NormalDist().inv_cdf(nivel_servico)
+            estoque_seguranca = z * np.sqrt(lead_time * desvio_demanda ** 2 +
+                                            demanda ** 2 * desvio_lead_time ** 2)
+        else:
+            estoque_seguranca = demanda * estoque_seguranca_dias
+        
+        # Ponto de reposição = (Demanda média * Lead time) + Estoque de segurança
+        ponto_reposicao = np.floor(demanda * lead_time + estoque_seguranca)
+        
+        # EOQ = sqrt((2 * D * S) / H), com D anual (H > 0 já validado)
+        lote_economico = np.floor(np.sqrt(2 * demanda * 365 * custo_pedido / custo_manutencao))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dias_restantes = np.where(demanda > 0, nivel_atual / demanda, np.inf)
+        
+        status = np.select(
+            [nivel_atual <= ponto_reposicao, nivel_atual <= ponto_reposicao * 1.5],
+            ['CRÍTICO - Comprar Urgente', 'ATENÇÃO - Planejar Compra'],
+            'OK'
+        )
+        
+        return pd.DataFrame({
+            'estoque_seguranca': np.round(estoque_seguranca, 1),
+            'ponto_reposicao': ponto_reposicao.astype(int),
+            'lote_economico': lote_economico,
+            'dias_restantes': np.round(dias_restantes, 1),
+            'status': status,
+            'quantidade_pedido': np.where(nivel_atual <= ponto_reposicao, lote_economico, 0),
+        }, index=df_itens.index)
 
 
-class ClassificacaoEstado:
-    """Classificação de estado dos equipamentos usando K-Means"""
+class ClassificacaoEstado(ModeloPersistente):
+    """Classificação de estado dos equipamentos usando K-Means (em mini-lotes)"""
     
     def __init__(self, n_clusters=4):
-        self.model = KMeans(n_clusters=n_clusters, random_state=42)
-        self.scaler = StandardScaler()
+        from sklearn.cluster import MiniBatchKMeans
+        
+        self.model = MiniBatchKMeans(n_clusters=n_clusters, random_state=42)
+        self.escala = None
+        self.features = list(FEATURES)
         self.is_trained = False
+        self.metadados = {}
         
     def treinar(self, df_metricas):
         """Treina modelo de clustering"""
-        print("Treinando modelo de Classificação de Estado (K-Means)...")
+        _, X, escala = ARMAZEM_FEATURES.preparar(df_metricas)
+        self.treinar_arrays(X, colunas=escala.colunas, escala=escala)
         
-        features = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 
-                   'disco_uso_percent', 'num_falhas']
+    @instrumentar('classificacao_treinar')
+    def treinar_arrays(self, X, y=None, colunas=None, escala=None):
+        """Treina a partir da matriz de features (colunas padrão: FEATURES; com escala, já padronizada)"""
+        print("Treinando modelo de Classificação de Estado (K-Means)...")
+        self.features = _colunas_treino(X, colunas)
         
-        X = df_metricas[features].dropna()
-        X_scaled = self.scaler.fit_transform(X)
+        self.escala, X_scaled = _escalar_treino(X, self.features, escala)
         
         # Treinamento
         self.model.fit(X_scaled)
         
-        # Análise dos clusters
-        df_metricas_clean = df_metricas[features].dropna()
-        df_metricas_clean['cluster'] = self.model.labels_
-        
         print(f"✓ Modelo treinado. {self.model.n_clusters} clusters identificados")
         print("\nCentroides dos Clusters:")
         print(pd.DataFrame(
-            self.scaler.inverse_transform(self.model.cluster_centers_),
-            columns=features
-        ).round(2))
+            self.escala.reverter(self.model.cluster_centers_),
+            columns=self.features
+        )[FEATURES].round(2))
         
+        self.metadados = {
+            'treinado_em': datetime.now().isoformat(),
+            'num_amostras': len(X),
+            'features': self.features,
+            'inercia': float(self.model.inertia_),
+        }
         self.is_trained = True
         
+    def atualizar(self, df_novo):
+        """Atualiza os centroides com uma nova janela de telemetria (partial_fit)
+        
+        A escala é definida no primeiro treinamento e mantida fixa, para que os
+        centroides já aprendidos continuem comparáveis.
+        """
+        X = _matriz_features(preparar_features(df_novo)[1], self.features)
+        if len(X) == 0:
+            return
+        
+        if not self.is_trained:
+            self.escala = EscalaFeatures.ajustar(X, self.features)
+        self.model.partial_fit(self.escala.aplicar(X))
+        
+        self.metadados.update({
+            'atualizado_em': datetime.now().isoformat(),
+            'num_amostras': self.metadados.get('num_amostras', 0) + len(X),
+            'features': self.features,
+        })
+        self.is_trained = True
+        
+    def treinar_em_lotes(self, lotes):
+        """Treina a partir de um iterador de DataFrames, um lote por vez"""
+        print("Treinando modelo de Classificação de Estado em lotes...")
+        for lote in lotes:
+            self.atualizar(lote)
+        print(f"✓ Modelo treinado com {self.metadados.get('num_amostras', 0)} leituras")
+        
     def classificar(self, metricas):
         """Classifica estado do equipamento"""
+        resultado = self.classificar_lote(pd.DataFrame([metricas])).iloc[0]
+        
+        return {
+            'cluster': int(resultado['cluster']),
+            'estado_estimado': resultado['estado_estimado']
+        }
+    
+    @instrumentar('classificacao_classificar', contar_itens=True)
+    def classificar_lote(self, leituras):
+        """Classifica o estado de N leituras de uma vez (DataFrame ou ndarray (N, 5) ou (N, 22))"""
         if not self.is_trained:
             raise Exception("Modelo não treinado. Execute treinar() primeiro.")
         
-        features = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 
-                   'disco_uso_percent', 'num_falhas']
+        X_scaled = ARMAZEM_FEATURES.matriz(leituras, self.escala)
         
-        X = pd.DataFrame([metricas])[features]
-        X_scaled = self.scaler.transform(X)
-        
-        cluster = self.model.predict(X_scaled)[0]
+        cluster = self.model.predict(X_scaled)
         
         # Mapeia cluster para estado (simplificado)
-        estados = ['Novo', 'Bom', 'Atenção', 'Crítico']
+        estados = np.array(['Novo', 'Bom', 'Atenção', 'Crítico'])
         
-        return {
-            'cluster': int(cluster),
-            'estado_estimado': estados[min(cluster, len(estados)-1)]
-        }
+        return pd.DataFrame({
+            'cluster': cluster,
+            'estado_estimado': estados[np.minimum(cluster, len(estados) - 1)]
+        }, index=leituras.index if isinstance(leituras, pd.DataFrame) else None)
 
 
 if __name__ == "__main__":
@@ -351,7 +1193,9 @@ if __name__ == "__main__":
     # Teste Manutenção Preditiva
     print("\n1. MANUTENÇÃO PREDITIVA")
     print("-" * 50)
-    modelo_manutencao = ManutencaoPreditiva()
+    modelo_tempo = TempoAteFalha()
+    modelo_tempo.treinar(df_metricas)
+    modelo_manutencao = ManutencaoPreditiva(modelo_tempo=modelo_tempo)
     modelo_manutencao.treinar(df_metricas)
     
     # Teste com um equipamento
@@ -367,6 +1211,7 @@ if __name__ == "__main__":
     print(f"  Precisa manutenção: {resultado['precisa_manutencao']}")
     print(f"  Probabilidade de falha: {resultado['probabilidade_falha']:.1%}")
     print(f"  Nível de risco: {resultado['nivel_risco']}")
+    print(f"  Tempo estimado até falha: {modelo_manutencao.prever_horas_ate_falha(metricas_teste, idade_meses=48)} h")
     
     # Teste Previsão de Demanda
     print("\n\n2. PREVISÃO DE DEMANDA")
@@ -0,0 +1,238 @@
+"""
+Detecção de Anomalias em Fluxo Contínuo
+Mantém, para cada equipamento, média e variância móveis exponenciais (EWMA) de
+temperatura, CPU e RAM em memória constante. Um filtro estatístico barato (z-score
+contra a linha de base do próprio equipamento) roda primeiro em todas as leituras,
+e só as suspeitas seguem para a Isolation Forest.
+"""
+
+import threading
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from instrumentacao import ITENS, instrumentar
+
+# Variáveis acompanhadas pela linha de base de cada equipamento
+VARIAVEIS_BASE = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent']
+
+
+class MotorAnomaliasStreaming:
+    """Pontuação de anomalias leitura a leitura com linha de base móvel por equipamento"""
+
+    COLUNAS_ALERTAS = ['equipamento_id', 'timestamp', 'variavel', 'valor', 'z_score',
+                       'anomaly_score', 'severidade']
+
+    def __init__(self, modelo_anomalias=None, alfa=0.05, limiar_z=3.0, aquecimento=10,
+                 desvio_minimo=0.5, capacidade_alertas=500, capacidade_inicial=1_024):
+        self.modelo = modelo_anomalias
+        # Peso da leitura nova na média móvel (meia-vida de ~ln(2)/alfa leituras)
+        self.alfa = alfa
+        self.limiar_z = limiar_z
+        # Leituras mínimas de um equipamento antes de o filtro passar a valer para ele
+        self.aquecimento = aquecimento
+        # Piso do desvio padrão: evita z-scores enormes em equipamentos muito estáveis
+        self.variancia_minima = desvio_minimo ** 2
+
+        # Estado por equipamento em arrays contíguos, indexados pela posição em self._ids
+        self._ids = pd.Index([], dtype=object)
+        self._media = np.zeros((capacidade_inicial, len(VARIAVEIS_BASE)))
+        self._variancia = np.zeros((capacidade_inicial, len(VARIAVEIS_BASE)))
+        self._leituras = np.zeros(capacidade_inicial, dtype=np.int64)
+
+        self.alertas = deque(maxlen=capacidade_alertas)
+        self.leituras_processadas = 0
+        self.leituras_suspeitas = 0
+        self.anomalias_confirmadas = 0
+        self._trava = threading.Lock()
+
+    @property
+    def num_equipamentos(self):
+        return len(self._ids)
+
+    def _variancia_inicial(self):
+        """Variância global aprendida pelo modelo, usada até o equipamento ter histórico"""
+        escala = getattr(self.modelo, 'escala', None)
+        if self.modelo is None or not self.modelo.is_trained or escala is None:
+            return np.zeros(len(VARIAVEIS_BASE))
+        return escala.variancia[[escala.colunas.index(variavel) for variavel in VARIAVEIS_BASE]]
+
+    def _posicoes(self, equipamento_ids):
+        """Posição de cada equipamento nos arrays de estado, registrando os novos"""
+        posicoes = self._ids.get_indexer(equipamento_ids)
+        novos = posicoes < 0
+        if novos.any():
+            self._ids = self._ids.append(pd.Index(pd.unique(equipamento_ids[novos]), dtype=object))
+            if len(self._ids) > len(self._leituras):
+                capacidade = max(len(self._ids), 2 * len(self._leituras))
+                self._media = np.resize(self._media, (capacidade, len(VARIAVEIS_BASE)))
+                self._variancia = np.resize(self._variancia, (capacidade, len(VARIAVEIS_BASE)))
+                self._leituras = np.concatenate([self._leituras,
+                                                 np.zeros(capacidade - len(self._leituras), dtype=np.int64)])
+            posicoes[novos] = self._ids.get_indexer(equipamento_ids[novos])
+        return posicoes
+
+    def _rodadas(self, posicoes):
+        """Divide o lote em rodadas sem equipamentos repetidos, na ordem de chegada"""
+        if len(np.unique(posicoes)) == len(posicoes):
+            return [np.arange(len(posicoes))]
+        ocorrencia = pd.Series(posicoes).groupby(posicoes).cumcount().to_numpy()
+        return [np.flatnonzero(ocorrencia == rodada) for rodada in range(ocorrencia.max() + 1)]
+
+    def _confirmar(self, leituras, linhas, z):
+        """Passa as leituras suspeitas pela Isolation Forest (ou decide só pelo z-score)"""
+        if self.modelo is not None and self.modelo.is_trained:
+            resultado = self.modelo.detectar_anomalias_lote(leituras.iloc[linhas])
+            return (resultado['eh_anomalia'].to_numpy(), resultado['anomaly_score'].to_numpy(),
+                    resultado['severidade'].to_numpy())
+        maior_z = np.abs(z).max(axis=1)
+        return (np.ones(len(linhas), dtype=bool), np.full(len(linhas), np.nan),
+                np.where(maior_z > 2 * self.limiar_z, 'Alta', 'Média'))
+
+    @instrumentar('anomalias_streaming')
+    def processar(self, leituras):
+        """Pontua um lote de leituras (com equipamento_id) e retorna as anomalias confirmadas
+
+        O z-score de cada leitura é calculado contra a linha de base anterior a ela;
+        leituras confirmadas como anômalas não entram na linha de base.
+        """
+        equipamento_ids = leituras['equipamento_id'].to_numpy(dtype=object)
+        valores = leituras[VARIAVEIS_BASE].to_numpy(dtype=float)
+        validas = np.isfinite(valores).all(axis=1)
+        variancia_inicial = self._variancia_inicial()
+        confirmados = []
+
+        with self._trava:
+            posicoes = self._posicoes(equipamento_ids)
+
+            for linhas in self._rodadas(posicoes):
+                linhas = linhas[validas[linhas]]
+                p = posicoes[linhas]
+                x = valores[linhas]
+                leituras_anteriores = self._leituras[p]
+
+                # A primeira leitura de um equipamento inicia a média; a variância parte da global
+                novos = leituras_anteriores == 0
+                self._media[p[novos]] = x[novos]
+                self._variancia[p[novos]] = variancia_inicial
+
+                media = self._media[p]
+                variancia = self._variancia[p]
+                desvio = x - media
+                z = desvio / np.sqrt(np.maximum(variancia, self.variancia_minima))
+
+                # Filtro barato: só o que foge da linha de base do próprio equipamento segue adiante
+                suspeitas = (leituras_anteriores >= self.aquecimento) & (np.abs(z) > self.limiar_z).any(axis=1)
+                anomalas = np.zeros(len(linhas), dtype=bool)
+                if suspeitas.any():
+                    indices = np.flatnonzero(suspeitas)
+                    eh_anomalia, score, severidade = self._confirmar(leituras, linhas[indices], z[indices])
+                    anomalas[indices] = eh_anomalia
+                    self.leituras_suspeitas += len(indices)
+                    if eh_anomalia.any():
+                        confirmadas = indices[eh_anomalia]
+                        confirmados.append((linhas[confirmadas], z[confirmadas],
+                                            score[eh_anomalia], severidade[eh_anomalia]))
+
+                # Atualização EWMA da média e da variância, fora das anomalias confirmadas
+                normais = ~anomalas
+                incremento = self.alfa * desvio[normais]
+                self._media[p[normais]] = media[normais] + incremento
+                self._variancia[p[normais]] = (1 - self.alfa) * (variancia[normais] + desvio[normais] * incremento)
+                self._leituras[p[normais]] += 1
+
+            self.leituras_processadas += len(leituras)
+            resultado = self._registrar_alertas(leituras, equipamento_ids, valores, confirmados)
+
+        ITENS.incrementar(len(leituras), operacao='anomalias_streaming')
+        return resultado
+
+    def _registrar_alertas(self, leituras, equipamento_ids, valores, confirmados):
+        if not confirmados:
+            return pd.DataFrame(columns=self.COLUNAS_ALERTAS)
+
+        linhas = np.concatenate([item[0] for item in confirmados])
+        z = np.concatenate([item[1] for item in confirmados])
+        variavel = np.abs(z).argmax(axis=1)
+        timestamps = leituras['timestamp'].to_numpy()[linhas] if 'timestamp' in leituras \
+            else np.full(len(linhas), pd.Timestamp.now())
+
+        anomalias = pd.DataFrame({
+            'equipamento_id': equipamento_ids[linhas],
+            'timestamp': timestamps,
+            'variavel': np.asarray(VARIAVEIS_BASE)[variavel],
+            'valor': valores[linhas, variavel],
+            'z_score': np.round(z[np.arange(len(z)), variavel], 2),
+            'anomaly_score': np.concatenate([item[2] for item in confirmados]),
+            'severidade': np.concatenate([item[3] for item in confirmados]),
+        })
+        self.anomalias_confirmadas += len(anomalias)
+        self.alertas.extend(anomalias.itertuples(index=False, name=None))
+        return anomalias
+
+    def linha_base(self, equipamento_id):
+        """Média e desvio padrão móveis de um equipamento
+
+        Lidos sob a trava: processar pode realocar os arrays e os atualiza no lugar.
+        """
+        with self._trava:
+            posicao = self._ids.get_loc(equipamento_id)
+            media = self._media[posicao].copy()
+            variancia = self._variancia[posicao].copy()
+        return pd.DataFrame({
+            'media': media,
+            'desvio': np.sqrt(variancia),
+        }, index=VARIAVEIS_BASE)
+
+    def anomalias_recentes(self, n=None):
+        """Últimas anomalias confirmadas, da mais recente para a mais antiga"""
+        with self._trava:
+            alertas = list(self.alertas)
+        recentes = pd.DataFrame(alertas[::-1], columns=self.COLUNAS_ALERTAS)
+        return recentes if n is None else recentes.head(n)
+
+    def estatisticas(self):
+        """Volume processado e proporção de leituras que passaram pelo filtro"""
+        with self._trava:
+            processadas, suspeitas = self.leituras_processadas, self.leituras_suspeitas
+            estatisticas = {
+                'equipamentos': self.num_equipamentos,
+                'leituras_processadas': processadas,
+                'leituras_suspeitas': suspeitas,
+                'anomalias_confirmadas': self.anomalias_confirmadas,
+            }
+        estatisticas['taxa_filtro'] = round(suspeitas / processadas, 4) if processadas else 0.0
+        return estatisticas
+
+
+if __name__ == "__main__":
+    # Teste do motor de anomalias em fluxo contínuo
+    from iot_simulator import IoTSensorSimulator
+    from ai_models import DeteccaoAnomalias
+
+    print("=== Teste do Motor de Anomalias em Fluxo Contínuo ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=100_000)
+    modelo = DeteccaoAnomalias()
+    modelo.treinar(IoTSensorSimulator(num_equipamentos=200).gerar_dados_historicos(dias=30))
+    motor = MotorAnomaliasStreaming(modelo)
+
+    em_uso = simulator.obter_equipamentos_em_uso()
+    inicio = time.perf_counter()
+    for rodada in range(20):
+        metricas = simulator.gerar_metricas_lote(em_uso)
+        leituras = pd.DataFrame({coluna: valores[0] for coluna, valores in metricas.items()})
+        leituras.insert(0, 'equipamento_id', em_uso['id'].to_numpy())
+        if rodada == 15:
+            # Superaquecimento de alguns equipamentos estáveis
+            leituras.loc[:9, 'temperatura_c'] += 40
+        motor.processar(leituras)
+    duracao = time.perf_counter() - inicio
+
+    print(f"✓ {motor.leituras_processadas:,} leituras em {duracao:.2f} s "
+          f"({motor.leituras_processadas / duracao:,.0f} leituras/s)\n")
+    print(motor.anomalias_recentes(10))
+    print()
+    for chave, valor in motor.estatisticas().items():
+        print(f"  {chave}: {valor}")
@@ -0,0 +1,196 @@
+"""
+Armazém de Features Padronizadas
+Extrai as features do pipeline e as padroniza (média e desvio por coluna) uma única
+vez, em uma matriz float32 contígua e somente leitura. Manutenção preditiva, detecção
+de anomalias e classificação de estado recebem a mesma matriz e a mesma escala, sem
+recalcular nem repadronizar as features (a manutenção ainda copia as partições de
+treino e teste). Matrizes de treino e de pontuação ficam em caches separados.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Linhas por bloco no cálculo da variância (limita a memória temporária)
+LINHAS_POR_BLOCO = 65_536
+
+
+class EscalaFeatures:
+    """Média e desvio padrão por coluna, aplicados em float32"""
+
+    def __init__(self, colunas, media, variancia, num_amostras):
+        self.colunas = list(colunas)
+        self.media = np.asarray(media, dtype=float)
+        self.variancia = np.asarray(variancia, dtype=float)
+        self.num_amostras = int(num_amostras)
+        # Colunas constantes não são divididas (como no StandardScaler)
+        desvio = np.sqrt(self.variancia)
+        desvio[desvio < 10 * np.finfo(float).eps] = 1.0
+        self._media32 = self.media.astype(np.float32)
+        self._desvio32 = desvio.astype(np.float32)
+        # Escalas com os mesmos parâmetros compartilham as matrizes em cache
+        resumo = hashlib.blake2b('|'.join(self.colunas).encode(), digest_size=16)
+        resumo.update(self.media.tobytes())
+        resumo.update(self.variancia.tobytes())
+        self.impressao = resumo.hexdigest()
+
+    @classmethod
+    def ajustar(cls, X, colunas):
+        """Ajusta a escala a uma matriz de features (N x colunas)"""
+        X = np.asarray(X)
+        media = X.mean(axis=0, dtype=float)
+        soma_quadrados = np.zeros(X.shape[1])
+        for inicio in range(0, len(X), LINHAS_POR_BLOCO):
+            desvio = X[inicio:inicio + LINHAS_POR_BLOCO] - media
+            soma_quadrados += np.einsum('ij,ij->j', desvio, desvio)
+        return cls(colunas, media, soma_quadrados / max(len(X), 1), len(X))
+
+    def combinar(self, X):
+        """Nova escala com as leituras de X somadas às já vistas (atualização incremental)"""
+        if len(X) == 0:
+            return self
+        nova = EscalaFeatures.ajustar(X, self.colunas)
+        total = self.num_amostras + nova.num_amostras
+        delta = nova.media - self.media
+        media = self.media + delta * nova.num_amostras / total
+        variancia = (self.variancia * self.num_amostras + nova.variancia * nova.num_amostras
+                     + delta ** 2 * self.num_amostras * nova.num_amostras / total) / total
+        return EscalaFeatures(self.colunas, media, variancia, total)
+
+    def aplicar(self, X, copiar=True):
+        """Matriz padronizada em float32 contígua; com copiar=False, X (float32 gravável) é sobrescrita"""
+        X = np.asarray(X)
+        if copiar or not X.flags.writeable:
+            X = np.array(X, dtype=np.float32, order='C')
+        else:
+            X = np.asarray(X, dtype=np.float32, order='C')
+        X -= self._media32
+        X /= self._desvio32
+        return X
+
+    def reverter(self, X):
+        """Volta uma matriz padronizada para as unidades originais"""
+        return np.asarray(X, dtype=float) * self._desvio32 + self.media
+
+
+def _somente_leitura(X):
+    X.setflags(write=False)
+    return X
+
+
+class ArmazemFeatures:
+    """Matrizes de features padronizadas em float32, calculadas uma vez e compartilhadas pelos modelos"""
+
+    def __init__(self, pipeline, capacidade_cache=4, capacidade_pontuacao=2):
+        self.pipeline = pipeline
+        self.capacidade_cache = capacidade_cache
+        self.capacidade_pontuacao = capacidade_pontuacao
+        # Lotes de pontuação (um por varredura) não expulsam as matrizes de treino
+        self._cache = OrderedDict()
+        self._cache_pontuacao = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos_cache = 0
+        self.faltas_cache = 0
+
+    @property
+    def colunas(self):
+        return self.pipeline.colunas
+
+    def _consultar(self, cache, chave):
+        with self._trava:
+            if chave in cache:
+                cache.move_to_end(chave)
+                self.acertos_cache += 1
+                return cache[chave]
+            self.faltas_cache += 1
+            return None
+
+    def _guardar(self, cache, capacidade, chave, valor):
+        with self._trava:
+            cache[chave] = valor
+            while len(cache) > capacidade:
+                cache.popitem(last=False)
+
+    def preparar(self, df_metricas):
+        """Leituras completas, matriz padronizada e a escala ajustada sobre elas
+
+        Feito uma vez por versão dos dados: os demais modelos treinados sobre o mesmo
+        histórico recebem a mesma matriz (somente leitura) e a mesma escala.
+        """
+        df = df_metricas.dropna(subset=self.pipeline.colunas_base)
+        versao = self.pipeline.versao(df)
+        preparado = self._consultar(self._cache, versao)
+        if preparado is None:
+            X = self.pipeline.transformar(df, versao=versao).to_numpy(dtype=float)
+            escala = EscalaFeatures.ajustar(X, self.colunas)
+            preparado = (_somente_leitura(escala.aplicar(X)), escala)
+            self._guardar(self._cache, self.capacidade_cache, versao, preparado)
+            # A pontuação das mesmas leituras com essa escala reaproveita a matriz
+            self._guardar(self._cache_pontuacao, self.capacidade_pontuacao, (versao, escala.impressao),
+                          preparado[0])
+        return (df, *preparado)
+
+    def matriz(self, dados, escala, usar_cache=True):
+        """Matriz padronizada (float32) de leituras para pontuação
+
+        Aceita um DataFrame (com ou sem as colunas temporais) ou um ndarray com as
+        colunas de escala.colunas ou só as das leituras brutas (ver
+        PipelineFeatures.de_array). Leituras sem as colunas temporais passam pelo
+        pipeline, e a matriz fica em cache pela versão dos dados e pela escala.
+        """
+        if not isinstance(dados, pd.DataFrame):
+            dados = self.pipeline.de_array(dados, escala.colunas)
+            if isinstance(dados, np.ndarray):
+                return escala.aplicar(dados)
+        if all(coluna in dados for coluna in escala.colunas):
+            return escala.aplicar(dados[escala.colunas].to_numpy(dtype=np.float32, copy=True), copiar=False)
+
+        chave = (self.pipeline.versao(dados), escala.impressao) if usar_cache else None
+        X = self._consultar(self._cache_pontuacao, chave) if usar_cache else None
+        if X is None:
+            features = self.pipeline.transformar(dados, usar_cache=False)
+            X = features[escala.colunas].to_numpy(dtype=np.float32, copy=True)
+            X = _somente_leitura(escala.aplicar(X, copiar=False))
+            if usar_cache:
+                self._guardar(self._cache_pontuacao, self.capacidade_pontuacao, chave, X)
+        return X
+
+    def estatisticas(self):
+        return {
+            'entradas_cache': len(self._cache),
+            'entradas_cache_pontuacao': len(self._cache_pontuacao),
+            'acertos_cache': self.acertos_cache,
+            'faltas_cache': self.faltas_cache,
+        }
+
+
+if __name__ == "__main__":
+    # Teste do armazém de features
+    import time
+    from iot_simulator import IoTSensorSimulator
+    from ai_models import ARMAZEM_FEATURES, ManutencaoPreditiva, DeteccaoAnomalias, ClassificacaoEstado
+
+    print("=== Teste do Armazém de Features ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=2_000)
+    df_metricas = simulator.gerar_dados_historicos(dias=90, intervalo_horas=6)
+
+    inicio = time.perf_counter()
+    _, X, escala = ARMAZEM_FEATURES.preparar(df_metricas)
+    print(f"\n✓ {X.shape[0]:,} leituras x {X.shape[1]} features ({X.dtype}, {X.nbytes / 2**20:.1f} MB) "
+          f"em {time.perf_counter() - inicio:.2f} s")
+
+    modelos = [ManutencaoPreditiva(), DeteccaoAnomalias(), ClassificacaoEstado()]
+    for modelo in modelos:
+        modelo.treinar(df_metricas)
+    print(f"\n✓ Mesma matriz e escala nos três modelos: "
+          f"{all(modelo.escala.impressao == escala.impressao for modelo in modelos)}")
+
+    lote = df_metricas.tail(5_000)
+    for modelo, metodo in zip(modelos, ['prever_lote', 'detectar_anomalias_lote', 'classificar_lote']):
+        getattr(modelo, metodo)(lote)
+    print()
+    for chave, valor in ARMAZEM_FEATURES.estatisticas().items():
+        print(f"  {chave}: {valor}")
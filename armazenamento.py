@@ -0,0 +1,160 @@
+"""
+Armazenamento de Séries Temporais da Telemetria
+Persiste métricas de uso, movimentações e leituras de ambiente em Parquet,
+particionado por dia e categoria (ou localização), com gravação apenas por anexação
+e leitura com poda de partições, filtros de tempo/equipamento e seleção de colunas.
+"""
+
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Colunas de partição de cada tipo de dado
+PARTICOES = {
+    'metricas': ['dia', 'categoria'],
+    'movimentacoes': ['dia', 'categoria'],
+    'ambiente': ['dia', 'localizacao'],
+}
+# Formato ISO dos timestamps devolvidos: sempre com microssegundos, como
+# isoformat(timespec='microseconds') no simulador, para que a ordem textual seja a cronológica
+FORMATO_TIMESTAMP = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+class ArmazenamentoTelemetria:
+    """Armazenamento colunar, particionado e somente de anexação para a telemetria"""
+
+    def __init__(self, diretorio=None):
+        self.diretorio = diretorio or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados')
+
+    def _caminho(self, tipo):
+        if tipo not in PARTICOES:
+            raise ValueError(f"Tipo de dado desconhecido: {tipo}")
+        return os.path.join(self.diretorio, tipo)
+
+    def _particionamento(self, tipo):
+        esquema = pa.schema([(coluna, pa.string()) for coluna in PARTICOES[tipo]])
+        return ds.partitioning(esquema, flavor='hive')
+
+    def anexar(self, tipo, df, equipamentos=None):
+        """Anexa um lote de registros ao armazenamento, sem reescrever arquivos existentes
+
+        Métricas de uso não trazem a categoria; informe equipamentos (o DataFrame
+        de cadastro, ex: simulator.equipamentos) para que ela seja incluída.
+        """
+        if len(df) == 0:
+            return 0
+
+        df = df.copy()
+        if 'categoria' in PARTICOES[tipo] and 'categoria' not in df:
+            if equipamentos is None:
+                raise ValueError("Informe equipamentos para obter a categoria das métricas")
+            categorias = equipamentos.set_index('id')['categoria']
+            df['categoria'] = df['equipamento_id'].map(categorias).astype(object).fillna('Desconhecida')
+
+        # Timestamps tipados permitem filtrar por intervalo dentro dos arquivos; ISO8601
+        # aceita lotes que misturam textos com e sem fração de segundo
+        df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601').astype('datetime64[us]')
+        df['dia'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        ds.write_dataset(
+            tabela,
+            self._caminho(tipo),
+            format='parquet',
+            partitioning=self._particionamento(tipo),
+            basename_template=f'parte-{uuid.uuid4().hex}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        return len(df)
+
+    def anexar_lotes(self, tipo, lotes, equipamentos=None):
+        """Anexa cada lote de um iterador (ex: gerar_dados_historicos_em_lotes)"""
+        return sum(self.anexar(tipo, lote, equipamentos) for lote in lotes)
+
+    def _consulta(self, tipo, inicio=None, fim=None, equipamento_ids=None, particoes=None):
+        """Monta o dataset e o filtro (poda de partições + predicados nos arquivos)"""
+        caminho = self._caminho(tipo)
+        if not os.path.exists(caminho):
+            return None, None
+
+        dataset = ds.dataset(caminho, format='parquet', partitioning=self._particionamento(tipo))
+        filtros = []
+
+        if inicio is not None:
+            inicio = pd.Timestamp(inicio)
+            filtros.append(ds.field('dia') >= inicio.strftime('%Y-%m-%d'))
+            filtros.append(ds.field('timestamp') >= pa.scalar(inicio.to_datetime64(), pa.timestamp('us')))
+        if fim is not None:
+            fim = pd.Timestamp(fim)
+            filtros.append(ds.field('dia') <= fim.strftime('%Y-%m-%d'))
+            filtros.append(ds.field('timestamp') <= pa.scalar(fim.to_datetime64(), pa.timestamp('us')))
+        if equipamento_ids is not None:
+            filtros.append(ds.field('equipamento_id').isin(list(equipamento_ids)))
+        for coluna, valores in (particoes or {}).items():
+            filtros.append(ds.field(coluna).isin(list(valores)))
+
+        filtro = None
+        for condicao in filtros:
+            filtro = condicao if filtro is None else filtro & condicao
+        return dataset, filtro
+
+    @staticmethod
+    def _para_pandas(tabela):
+        df = tabela.to_pandas()
+        if 'timestamp' in df:
+            # Devolve os timestamps no mesmo formato ISO gerado pelo simulador
+            df['timestamp'] = df['timestamp'].dt.strftime(FORMATO_TIMESTAMP)
+        return df
+
+    def ler(self, tipo, inicio=None, fim=None, equipamento_ids=None, colunas=None, **particoes):
+        """Lê registros filtrando por intervalo de tempo, equipamentos, colunas e partições
+
+        Exemplo: ler('metricas', inicio='2025-01-01', fim='2025-01-31',
+                     equipamento_ids=['EQ0001'], colunas=['timestamp', 'temperatura_c'],
+                     categoria=['Notebook'])
+        Só as partições e grupos de linhas que podem conter o intervalo são lidos.
+        """
+        dataset, filtro = self._consulta(tipo, inicio, fim, equipamento_ids, particoes)
+        if dataset is None:
+            return pd.DataFrame(columns=colunas)
+
+        return self._para_pandas(dataset.to_table(columns=colunas, filter=filtro))
+
+    def ler_em_lotes(self, tipo, inicio=None, fim=None, equipamento_ids=None, colunas=None,
+                     tamanho_lote=100_000, **particoes):
+        """Como ler(), mas devolve um iterador de DataFrames com memória limitada"""
+        dataset, filtro = self._consulta(tipo, inicio, fim, equipamento_ids, particoes)
+        if dataset is None:
+            return
+
+        for lote in dataset.to_batches(columns=colunas, filter=filtro, batch_size=tamanho_lote):
+            if lote.num_rows:
+                yield self._para_pandas(pa.Table.from_batches([lote]))
+
+
+if __name__ == "__main__":
+    # Teste do armazenamento
+    import tempfile
+    from iot_simulator import IoTSensorSimulator
+
+    print("=== Teste do Armazenamento de Telemetria ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=50)
+    armazenamento = ArmazenamentoTelemetria(tempfile.mkdtemp())
+
+    total = armazenamento.anexar_lotes(
+        'metricas', simulator.gerar_dados_historicos_em_lotes(dias=30, tamanho_lote=2_000),
+        equipamentos=simulator.equipamentos
+    )
+    armazenamento.anexar('movimentacoes', simulator.gerar_movimentacoes_historicas(dias=30))
+    print(f"✓ {total} métricas anexadas em {armazenamento.diretorio}")
+
+    em_uso = simulator.equipamentos[simulator.equipamentos['em_uso'] == True]
+    equipamento_id = em_uso['id'].iloc[0]
+    inicio = pd.Timestamp.now() - pd.Timedelta(days=7)
+    df = armazenamento.ler('metricas', inicio=inicio, equipamento_ids=[equipamento_id],
+                           colunas=['equipamento_id', 'timestamp', 'temperatura_c'])
+    print(f"\nÚltimos 7 dias de {equipamento_id}:")
+    print(df.head())
@@ -0,0 +1,163 @@
+"""
+Avaliação Contínua de Risco da Frota
+Pontua, em segundo plano e em lotes, todos os equipamentos em uso com o modelo de
+manutenção preditiva e mantém o ranking dos N equipamentos de maior risco. As features
+temporais de cada leitura vêm das varreduras anteriores do mesmo equipamento, como no
+treinamento. As mesmas leituras podem alimentar um motor de anomalias em fluxo contínuo e a estimativa de
+tempo até falha.
+"""
+
+import heapq
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+from instrumentacao import ITENS, instrumentar
+from pipeline_features import HistoricoRecente
+
+
+class AvaliadorRisco:
+    """Worker que varre a frota em uso continuamente e publica o top-N em risco"""
+
+    COLUNAS_RANKING = ['id', 'categoria', 'estado', 'idade_meses', 'probabilidade_falha', 'nivel_risco',
+                       'tempo_ate_falha_horas']
+
+    def __init__(self, simulator, modelo_manutencao, top_n=20, tamanho_lote=5_000, intervalo_segundos=5.0,
+                 motor_anomalias=None, vida_restante=None, historico=None):
+        from ai_models import PIPELINE_FEATURES
+
+        self.simulator = simulator
+        self.modelo = modelo_manutencao
+        # Últimas leituras de cada equipamento, para as defasagens, médias e inclinações
+        self.historico = historico if historico is not None else HistoricoRecente(PIPELINE_FEATURES)
+        # Opcional: MotorAnomaliasStreaming que recebe cada lote de leituras da varredura
+        self.motor_anomalias = motor_anomalias
+        # Opcional: CacheVidaRestante que estima o tempo até falha de cada lote
+        self.vida_restante = vida_restante
+        self.top_n = top_n
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_segundos = intervalo_segundos
+        # Gerador próprio: o Generator do simulador não é seguro entre threads
+        self.rng = np.random.default_rng()
+
+        self.ranking = pd.DataFrame(columns=self.COLUNAS_RANKING)
+        self.varreduras = 0
+        self.equipamentos_avaliados = 0
+        self.duracao_ultima_varredura = 0.0
+        self.ultima_varredura = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    @instrumentar('risco_avaliar_frota')
+    def avaliar_frota(self):
+        """Pontua todos os equipamentos em uso, lote a lote, e publica o novo ranking"""
+        inicio = time.perf_counter()
+        equipamentos = self.simulator.obter_equipamentos_em_uso()
+
+        # Heap mínimo com os N maiores riscos vistos até agora: (probabilidade, -posição, nível, horas);
+        # no empate, fica à frente o equipamento que aparece primeiro no cadastro
+        heap = []
+        for comeco in range(0, len(equipamentos), self.tamanho_lote):
+            lote = equipamentos.iloc[comeco:comeco + self.tamanho_lote]
+            metricas = self.simulator.gerar_metricas_lote(
+                lote, rng=self.rng, falhas_iniciais=self.simulator.falhas_atuais(lote['id'], self.rng))
+            leituras = pd.DataFrame({
+                'equipamento_id': lote['id'].to_numpy(),
+                **{coluna: valores[0] for coluna, valores in metricas.items()},
+            })
+            leituras = pd.concat([leituras[['equipamento_id']], self.historico.transformar(leituras)], axis=1)
+            leituras['idade_meses'] = lote['idade_meses'].to_numpy()
+            predicoes = self.modelo.prever_lote(leituras)
+            if self.motor_anomalias is not None:
+                self.motor_anomalias.processar(leituras)
+
+            probabilidade = predicoes['probabilidade_falha'].to_numpy()
+            nivel = predicoes['nivel_risco'].to_numpy()
+            horas = self.vida_restante.prever_frota(leituras).to_numpy() if self.vida_restante is not None \
+                else np.full(len(leituras), np.nan)
+            # Só os N maiores de cada lote podem entrar no ranking
+            candidatos = np.argpartition(-probabilidade, self.top_n - 1)[:self.top_n] \
+                if len(probabilidade) > self.top_n else np.arange(len(probabilidade))
+
+            for indice in candidatos:
+                item = (float(probabilidade[indice]), -(comeco + int(indice)), nivel[indice], float(horas[indice]))
+                if len(heap) < self.top_n:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        ordenados = sorted(heap, reverse=True)
+        posicoes = [-posicao for _, posicao, _, _ in ordenados]
+        ranking = equipamentos.iloc[posicoes][['id', 'categoria', 'estado', 'idade_meses']].reset_index(drop=True)
+        ranking['probabilidade_falha'] = [probabilidade for probabilidade, _, _, _ in ordenados]
+        ranking['nivel_risco'] = [nivel for _, _, nivel, _ in ordenados]
+        ranking['tempo_ate_falha_horas'] = [horas for _, _, _, horas in ordenados]
+
+        # Troca a referência inteira: leitores sempre veem um ranking completo
+        self.ranking = ranking
+        self.varreduras += 1
+        self.equipamentos_avaliados = len(equipamentos)
+        ITENS.incrementar(len(equipamentos), operacao='risco_avaliar_frota')
+        self.duracao_ultima_varredura = time.perf_counter() - inicio
+        self.ultima_varredura = pd.Timestamp.now()
+        return ranking
+
+    def top_em_risco(self, probabilidade_minima=0.0, n=None):
+        """Retorna o ranking publicado (leitura imediata, sem pontuar nada)"""
+        ranking = self.ranking
+        ranking = ranking[ranking['probabilidade_falha'] > probabilidade_minima]
+        return ranking if n is None else ranking.head(n)
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.avaliar_frota()
+            except Exception as erro:
+                print(f"⚠ Falha na avaliação de risco da frota: {erro}")
+            self._parar.wait(self.intervalo_segundos)
+
+    def iniciar(self):
+        """Faz a primeira varredura e inicia a avaliação contínua em segundo plano"""
+        if self.varreduras == 0:
+            self.avaliar_frota()
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='avaliador-risco', daemon=True)
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def estatisticas(self):
+        """Cobertura e custo da última varredura"""
+        return {
+            'varreduras': self.varreduras,
+            'equipamentos_avaliados': self.equipamentos_avaliados,
+            'duracao_ultima_varredura_s': round(self.duracao_ultima_varredura, 3),
+            'equipamentos_por_s': round(self.equipamentos_avaliados / self.duracao_ultima_varredura)
+                                  if self.duracao_ultima_varredura else 0,
+            'ultima_varredura': self.ultima_varredura,
+        }
+
+
+if __name__ == "__main__":
+    # Teste do avaliador de risco
+    from iot_simulator import IoTSensorSimulator
+    from ai_models import ManutencaoPreditiva, TempoAteFalha, CacheVidaRestante
+
+    print("=== Teste do Avaliador de Risco ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=100_000)
+    historico = IoTSensorSimulator(num_equipamentos=200).gerar_dados_historicos(dias=30)
+    modelo_tempo = TempoAteFalha()
+    modelo_tempo.treinar(historico)
+    modelo = ManutencaoPreditiva(modelo_tempo=modelo_tempo)
+    modelo.treinar(historico)
+
+    avaliador = AvaliadorRisco(simulator, modelo, top_n=10, vida_restante=CacheVidaRestante(modelo_tempo))
+    avaliador.avaliar_frota()
+    print(avaliador.top_em_risco())
+    print()
+    for chave, valor in avaliador.estatisticas().items():
+        print(f"  {chave}: {valor}")
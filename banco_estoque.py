@@ -0,0 +1,270 @@
+"""
+Banco de Dados do Estoque
+Cadastro de equipamentos e movimentações em SQLite embutido, com índices por id,
+RFID, localização e categoria, movimentações transacionais e agregados em SQL.
+Um pool de conexões permite compartilhar o banco entre as threads do dashboard.
+"""
+
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+
+COLUNAS_EQUIPAMENTOS = ['id', 'rfid', 'categoria', 'fabricante', 'modelo', 'localizacao',
+                        'estado', 'idade_meses', 'data_aquisicao', 'valor_aquisicao', 'em_uso']
+COLUNAS_MOVIMENTACOES = ['equipamento_id', 'timestamp', 'tipo', 'localizacao_origem', 'localizacao_destino']
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS equipamentos (
+    id TEXT PRIMARY KEY,
+    rfid TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    fabricante TEXT,
+    modelo TEXT,
+    localizacao TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    idade_meses INTEGER,
+    data_aquisicao TEXT,
+    valor_aquisicao INTEGER,
+    em_uso INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_equipamentos_rfid ON equipamentos (rfid);
+CREATE INDEX IF NOT EXISTS idx_equipamentos_localizacao ON equipamentos (localizacao, categoria);
+CREATE INDEX IF NOT EXISTS idx_equipamentos_categoria ON equipamentos (categoria);
+
+CREATE TABLE IF NOT EXISTS movimentacoes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    equipamento_id TEXT NOT NULL REFERENCES equipamentos (id),
+    timestamp TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    localizacao_origem TEXT,
+    localizacao_destino TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_equipamento ON movimentacoes (equipamento_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_movimentacoes_timestamp ON movimentacoes (timestamp);
+"""
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite de tamanho fixo, seguro para uso entre threads"""
+
+    def __init__(self, criar_conexao, tamanho=4, espera_segundos=30.0):
+        self.espera_segundos = espera_segundos
+        self._livres = queue.Queue(maxsize=tamanho)
+        for _ in range(tamanho):
+            self._livres.put(criar_conexao())
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool e a devolve ao final do bloco"""
+        try:
+            conexao = self._livres.get(timeout=self.espera_segundos)
+        except queue.Empty:
+            raise TimeoutError("Nenhuma conexão livre no pool do banco de estoque") from None
+        try:
+            yield conexao
+        finally:
+            self._livres.put(conexao)
+
+    def fechar(self):
+        """Fecha todas as conexões livres do pool"""
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class BancoEstoque:
+    """Cadastro de equipamentos e movimentações em SQLite, com pool de conexões"""
+
+    def __init__(self, caminho=None, tamanho_pool=4):
+        # Sem caminho, usa um arquivo temporário (removido em fechar): em memória com cache
+        # compartilhado o SQLite recusa acessos concorrentes em vez de esperar pelo timeout
+        self._diretorio_temporario = None
+        if caminho is None:
+            self._diretorio_temporario = tempfile.mkdtemp(prefix='estoque-')
+            caminho = os.path.join(self._diretorio_temporario, 'estoque.db')
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self.caminho = caminho
+
+        self.pool = PoolConexoes(self._criar_conexao, tamanho_pool)
+        with self.pool.conexao() as conexao:
+            conexao.executescript(ESQUEMA)
+
+    def _criar_conexao(self):
+        conexao = sqlite3.connect(self.caminho, timeout=30.0, check_same_thread=False, isolation_level=None)
+        conexao.row_factory = sqlite3.Row
+        conexao.execute('PRAGMA foreign_keys = ON')
+        # WAL: leituras do dashboard não bloqueiam as movimentações em andamento
+        conexao.execute('PRAGMA journal_mode = WAL')
+        conexao.execute('PRAGMA synchronous = NORMAL')
+        return conexao
+
+    @contextmanager
+    def transacao(self):
+        """Executa o bloco em uma transação, com rollback em caso de erro"""
+        with self.pool.conexao() as conexao:
+            conexao.execute('BEGIN IMMEDIATE')
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute('ROLLBACK')
+                raise
+            conexao.execute('COMMIT')
+
+    def consultar(self, sql, parametros=()):
+        """Executa uma consulta somente leitura e retorna um DataFrame"""
+        with self.pool.conexao() as conexao:
+            cursor = conexao.execute(sql, parametros)
+            colunas = [descricao[0] for descricao in cursor.description]
+            return pd.DataFrame(cursor.fetchall(), columns=colunas)
+
+    def fechar(self):
+        self.pool.fechar()
+        if self._diretorio_temporario is not None:
+            shutil.rmtree(self._diretorio_temporario, ignore_errors=True)
+
+    # Carga de dados
+
+    def carregar_equipamentos(self, df_equipamentos):
+        """Insere ou atualiza o cadastro a partir de um DataFrame (ex: simulator.equipamentos)"""
+        registros = df_equipamentos[COLUNAS_EQUIPAMENTOS].astype(object).itertuples(index=False, name=None)
+        with self.transacao() as conexao:
+            conexao.executemany(
+                f"INSERT OR REPLACE INTO equipamentos ({', '.join(COLUNAS_EQUIPAMENTOS)}) "
+                f"VALUES ({', '.join('?' * len(COLUNAS_EQUIPAMENTOS))})",
+                ((*registro[:-1], int(bool(registro[-1]))) for registro in registros)
+            )
+        return len(df_equipamentos)
+
+    def registrar_movimentacoes(self, df_movimentacoes):
+        """Anexa movimentações históricas (ex: gerar_movimentacoes_historicas)"""
+        # O histórico gerado não traz a origem; colunas ausentes ficam nulas
+        df = df_movimentacoes.reindex(columns=COLUNAS_MOVIMENTACOES).astype(object)
+        registros = df.where(df.notna(), None).itertuples(index=False, name=None)
+        with self.transacao() as conexao:
+            conexao.executemany(
+                f"INSERT INTO movimentacoes ({', '.join(COLUNAS_MOVIMENTACOES)}) "
+                f"VALUES ({', '.join('?' * len(COLUNAS_MOVIMENTACOES))})",
+                registros
+            )
+        return len(df_movimentacoes)
+
+    # Consultas por chave
+
+    def contar_equipamentos(self):
+        with self.pool.conexao() as conexao:
+            return conexao.execute('SELECT COUNT(*) FROM equipamentos').fetchone()[0]
+
+    def obter_equipamento(self, equipamento_id):
+        """Retorna o cadastro de um equipamento como dicionário"""
+        with self.pool.conexao() as conexao:
+            linha = conexao.execute('SELECT * FROM equipamentos WHERE id = ?', (equipamento_id,)).fetchone()
+        if linha is None:
+            raise KeyError(f"Equipamento não encontrado: {equipamento_id}")
+        return {**dict(linha), 'em_uso': bool(linha['em_uso'])}
+
+    def obter_por_rfid(self, rfid):
+        """Retorna os equipamentos associados a uma etiqueta RFID"""
+        return self._equipamentos('WHERE rfid = ?', (rfid,))
+
+    def historico_movimentacoes(self, equipamento_id):
+        """Retorna as movimentações de um equipamento em ordem cronológica"""
+        return self.consultar(
+            f"SELECT {', '.join(COLUNAS_MOVIMENTACOES)} FROM movimentacoes "
+            "WHERE equipamento_id = ? ORDER BY timestamp",
+            (equipamento_id,)
+        )
+
+    # Alterações transacionais
+
+    def mover(self, equipamento_id, nova_localizacao, timestamp=None):
+        """Altera a localização e registra a movimentação na mesma transação"""
+        timestamp = timestamp or datetime.now().isoformat(timespec='microseconds')
+        with self.transacao() as conexao:
+            linha = conexao.execute('SELECT localizacao FROM equipamentos WHERE id = ?',
+                                    (equipamento_id,)).fetchone()
+            if linha is None:
+                raise KeyError(f"Equipamento não encontrado: {equipamento_id}")
+
+            movimentacao = {
+                'equipamento_id': equipamento_id,
+                'timestamp': timestamp,
+                'tipo': 'SAIDA' if 'Em Uso' in nova_localizacao else 'ENTRADA',
+                'localizacao_origem': linha['localizacao'],
+                'localizacao_destino': nova_localizacao,
+            }
+            conexao.execute('UPDATE equipamentos SET localizacao = ? WHERE id = ?',
+                            (nova_localizacao, equipamento_id))
+            conexao.execute(
+                f"INSERT INTO movimentacoes ({', '.join(COLUNAS_MOVIMENTACOES)}) VALUES (?, ?, ?, ?, ?)",
+                tuple(movimentacao.values())
+            )
+        return movimentacao
+
+    def atualizar_estado(self, equipamento_id, novo_estado):
+        """Altera o estado de um equipamento e retorna o estado anterior"""
+        with self.transacao() as conexao:
+            linha = conexao.execute('SELECT estado FROM equipamentos WHERE id = ?',
+                                    (equipamento_id,)).fetchone()
+            if linha is None:
+                raise KeyError(f"Equipamento não encontrado: {equipamento_id}")
+            conexao.execute('UPDATE equipamentos SET estado = ? WHERE id = ?', (novo_estado, equipamento_id))
+        return linha['estado']
+
+    # Agregados
+
+    def _equipamentos(self, where='', parametros=()):
+        # Ordem numérica dos ids ('EQ1001' antes de 'EQ10000'), como no simulador
+        df = self.consultar(f"SELECT {', '.join(COLUNAS_EQUIPAMENTOS)} FROM equipamentos {where} "
+                            "ORDER BY CAST(substr(id, 3) AS INTEGER), id", parametros)
+        df['em_uso'] = df['em_uso'].astype(bool)
+        return df
+
+    def para_dataframe(self):
+        """Retorna o cadastro completo no formato de simulator.equipamentos"""
+        return self._equipamentos()
+
+    def obter_nivel_estoque_atual(self):
+        """Retorna nível de estoque atual por categoria"""
+        # GLOB por prefixo usa o índice de localização (LIKE não usa, por ignorar maiúsculas)
+        return self.consultar(
+            "SELECT categoria, COUNT(*) AS quantidade FROM equipamentos "
+            "WHERE localizacao GLOB 'Almoxarifado*' GROUP BY categoria ORDER BY categoria"
+        )
+
+    def obter_equipamentos_em_uso(self):
+        """Retorna equipamentos atualmente em uso"""
+        return self._equipamentos("WHERE localizacao GLOB 'Em Uso*'")
+
+    def contar_por_estado(self):
+        """Retorna a quantidade de equipamentos em cada estado"""
+        return self.consultar("SELECT estado, COUNT(*) AS quantidade FROM equipamentos "
+                              "GROUP BY estado ORDER BY estado")
+
+
+if __name__ == "__main__":
+    # Teste do banco de estoque
+    import tempfile
+    from iot_simulator import IoTSensorSimulator
+
+    print("=== Teste do Banco de Estoque ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=1_000)
+    banco = BancoEstoque(os.path.join(tempfile.mkdtemp(), 'estoque.db'))
+    banco.carregar_equipamentos(simulator.equipamentos)
+    banco.registrar_movimentacoes(simulator.gerar_movimentacoes_historicas(dias=30))
+    print(f"✓ {banco.contar_equipamentos()} equipamentos em {banco.caminho}\n")
+
+    print("Nível de estoque atual:")
+    print(banco.obter_nivel_estoque_atual())
+    print()
+
+    print("Movimentação de EQ0001:")
+    print(banco.mover('EQ0001', 'Em Uso - TI'))
+    print(banco.historico_movimentacoes('EQ0001').tail(3))
@@ -0,0 +1,566 @@
+"""
+Benchmarks de desempenho do SmartStock IoT
+Mede o custo das operações críticas do simulador e dos modelos conforme a frota cresce.
+
+Uso:
+    python benchmarks.py                       # suíte completa, resultados em resultados/benchmarks.json
+    python benchmarks.py --rapido              # frotas e históricos menores
+    python benchmarks.py --saida resultados/2025-01-01.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from iot_simulator import IoTSensorSimulator
+from ai_models import (ManutencaoPreditiva, DeteccaoAnomalias, ClassificacaoEstado, TempoAteFalha,
+                       OtimizacaoEstoque, PrevisaoDemanda, FEATURES, versao_sklearn)
+from pipeline_features import PipelineFeatures
+from armazem_features import ArmazemFeatures
+from mqtt_pipeline import BrokerLocal, PublicadorTelemetria, AssinanteTelemetria
+from anomalias_streaming import MotorAnomaliasStreaming
+
+# Resultados ficam fora do controle de versão (ver .gitignore)
+SAIDA_PADRAO = os.path.join('resultados', 'benchmarks.json')
+
+# Leituras históricas acima deste total não são geradas (memória da máquina de benchmark)
+MAX_LEITURAS_HISTORICO = 2_000_000
+
+# Orçamento (segundos) de importação a frio de cada módulo, em um processo novo
+ORCAMENTO_IMPORTACAO = {
+    'registro_equipamentos': 1.0,
+    'iot_simulator': 1.0,
+    'pipeline_features': 1.0,
+    'armazem_features': 1.0,
+    'ai_models': 1.0,
+    'banco_estoque': 1.0,
+    'mqtt_pipeline': 1.0,
+    'anomalias_streaming': 1.0,
+    'dashboard': 1.0,
+}
+# Bibliotecas que não devem ser carregadas só por importar os módulos
+MODULOS_PESADOS = ['sklearn', 'statsmodels', 'joblib', 'dash', 'plotly']
+
+# Vazão mínima (leituras/s, um processo) do motor de anomalias em fluxo contínuo
+META_ANOMALIAS_STREAMING = 100_000
+
+
+def cronometrar(funcao, repeticoes=1000):
+    """Retorna o tempo médio (em microssegundos) de uma chamada de funcao()"""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def medir(funcao, repeticoes=1):
+    """Mede tempo médio (s) e pico de memória alocada (MB) de funcao(), sem a saída no console
+
+    O tempo é medido sem tracemalloc; a memória, em uma chamada extra com tracemalloc ativo.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            resultado = funcao()
+        tempo_s = (time.perf_counter() - inicio) / repeticoes
+
+        tracemalloc.start()
+        try:
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return resultado, {'tempo_s': round(tempo_s, 6), 'memoria_pico_mb': round(pico / 1e6, 3)}
+
+
+def benchmark_simulador(tamanhos=(50, 1_000, 10_000, 100_000), dias=(30, 90), intervalo_horas=6):
+    """Geração do cadastro, do histórico de métricas e das movimentações por tamanho de frota"""
+    print("=== Simulador: cadastro, histórico e movimentações ===")
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        _, medida = medir(simulator._gerar_equipamentos)
+        resultados.append({'operacao': '_gerar_equipamentos', 'num_equipamentos': tamanho, **medida})
+
+        for num_dias in dias:
+            leituras = tamanho * num_dias * 24 // intervalo_horas
+            if leituras > MAX_LEITURAS_HISTORICO:
+                print(f"  {tamanho:>7} equipamentos × {num_dias} dias: {leituras} leituras, ignorado")
+                continue
+            _, medida = medir(lambda: simulator.gerar_dados_historicos(num_dias, intervalo_horas))
+            resultados.append({'operacao': 'gerar_dados_historicos', 'num_equipamentos': tamanho,
+                               'dias': num_dias, 'leituras': leituras, **medida})
+
+            _, medida = medir(lambda: simulator.gerar_movimentacoes_historicas(num_dias))
+            resultados.append({'operacao': 'gerar_movimentacoes_historicas', 'num_equipamentos': tamanho,
+                               'dias': num_dias, **medida})
+
+    for resultado in resultados:
+        detalhe = f" × {resultado['dias']} dias" if 'dias' in resultado else ''
+        print(f"  {resultado['operacao']:<32} {resultado['num_equipamentos']:>7}{detalhe:<10} "
+              f"{resultado['tempo_s']:>9.4f} s | pico {resultado['memoria_pico_mb']:>9.2f} MB")
+
+    return resultados
+
+
+def benchmark_modelos(tamanhos=(50, 1_000), dias=90, intervalo_horas=6, repeticoes_predicao=200):
+    """Treinamento e predição por leitura de cada modelo, conforme o histórico cresce"""
+    print("=== Modelos: treinamento e predição por leitura ===")
+    modelos = [
+        (ManutencaoPreditiva, 'prever'),
+        (DeteccaoAnomalias, 'detectar_anomalia'),
+        (ClassificacaoEstado, 'classificar'),
+        (TempoAteFalha, 'prever'),
+    ]
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_metricas = simulator.gerar_dados_historicos(dias, intervalo_horas)
+            df_movimentacoes = simulator.gerar_movimentacoes_historicas(dias)
+        leitura = df_metricas.iloc[0].to_dict()
+
+        for classe, metodo in modelos:
+            modelo = classe()
+            _, medida = medir(lambda: modelo.treinar(df_metricas))
+            predicao_us = cronometrar(lambda: getattr(modelo, metodo)(leitura), repeticoes_predicao)
+            resultados.append({
+                'modelo': classe.__name__,
+                'leituras_treino': len(df_metricas),
+                'treinar_s': medida['tempo_s'],
+                'treinar_memoria_pico_mb': medida['memoria_pico_mb'],
+                'predicao_por_leitura_us': round(predicao_us, 1),
+            })
+
+        # A primeira chamada monta a matriz de demanda; as seguintes a reaproveitam
+        modelo_demanda = PrevisaoDemanda()
+        _, medida = medir(lambda: modelo_demanda.prever_demanda(df_movimentacoes, 'Notebook'))
+        resultados.append({
+            'modelo': 'PrevisaoDemanda',
+            'movimentacoes': len(df_movimentacoes),
+            'prever_demanda_s': medida['tempo_s'],
+            'prever_demanda_memoria_pico_mb': medida['memoria_pico_mb'],
+        })
+
+    for resultado in resultados:
+        if 'treinar_s' in resultado:
+            print(f"  {resultado['modelo']:<20} {resultado['leituras_treino']:>8} leituras: "
+                  f"treino {resultado['treinar_s']:>8.3f} s (pico {resultado['treinar_memoria_pico_mb']:.1f} MB) | "
+                  f"predição {resultado['predicao_por_leitura_us']:>8.1f} µs")
+        else:
+            print(f"  {resultado['modelo']:<20} {resultado['movimentacoes']:>8} movimentações: "
+                  f"prever_demanda {resultado['prever_demanda_s']:>8.3f} s")
+
+    return resultados
+
+
+def benchmark_dashboard(repeticoes=5):
+    """Callbacks do dashboard chamados diretamente, sem servidor HTTP"""
+    print("=== Dashboard: snapshot e callbacks ===")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import dashboard
+        # Sem threads de segundo plano: as medições abaixo chamam tudo diretamente
+        dashboard.inicializar(iniciar_workers=False)
+
+    resultados = []
+    _, medida = medir(dashboard.painel.construir, repeticoes)
+    resultados.append({'operacao': 'SnapshotDashboard.construir', **medida})
+
+    # Sem versões renderizadas: todas as seções são desenhadas
+    _, medida = medir(lambda: dashboard.atualizar_dashboard(1, None), repeticoes)
+    resultados.append({'operacao': 'atualizar_dashboard (completo)', **medida})
+
+    # Com as versões atuais: nenhuma seção mudou, nada é desenhado
+    versoes = dict(dashboard.painel.atual['versoes'])
+    _, medida = medir(lambda: dashboard.atualizar_dashboard(2, versoes), repeticoes)
+    resultados.append({'operacao': 'atualizar_dashboard (sem mudanças)', **medida})
+
+    for secao, renderizar in dashboard.RENDERIZADORES.items():
+        dados = dashboard.painel.atual['secoes'][secao]
+        _, medida = medir(lambda: renderizar(dados), repeticoes)
+        resultados.append({'operacao': f'renderizar_{secao}', **medida})
+
+    _, medida = medir(dashboard.avaliador_risco.avaliar_frota, repeticoes)
+    resultados.append({'operacao': 'AvaliadorRisco.avaliar_frota', **medida})
+
+    for resultado in resultados:
+        print(f"  {resultado['operacao']:<36} {resultado['tempo_s'] * 1000:>9.2f} ms | "
+              f"pico {resultado['memoria_pico_mb']:>7.2f} MB")
+
+    return resultados
+
+
+def benchmark_busca_equipamento(tamanhos=(50, 1_000, 10_000, 100_000), repeticoes=2000):
+    """Mede o custo de localizar um equipamento pelo id conforme a frota cresce"""
+    print("=== Busca de equipamento por id ===")
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        ids = simulator.equipamentos['id'].tolist()
+        amostra = [random.choice(ids) for _ in range(repeticoes)]
+        iterador = iter(amostra)
+
+        tempo_us = cronometrar(lambda: simulator.obter_equipamento(next(iterador)), repeticoes)
+
+        # Referência: varredura da coluna inteira, como era feito antes do índice
+        df = simulator.equipamentos
+        varredura_us = cronometrar(lambda: df[df['id'] == ids[-1]].iloc[0], 20)
+
+        resultados.append({
+            'num_equipamentos': tamanho,
+            'busca_us': round(tempo_us, 2),
+            'varredura_us': round(varredura_us, 2),
+        })
+        print(f"  {tamanho:>7} equipamentos: {tempo_us:8.2f} µs por busca "
+              f"(varredura: {varredura_us:8.2f} µs)")
+
+    return resultados
+
+
+def benchmark_inferencia_lote(num_leituras=2_000):
+    """Compara a vazão da pontuação linha a linha com a pontuação em lote"""
+    print("=== Inferência: linha a linha x lote ===")
+    simulator = IoTSensorSimulator(num_equipamentos=200, rng=np.random.default_rng(42))
+    df_metricas = simulator.gerar_dados_historicos(dias=30, intervalo_horas=6)
+    leituras = df_metricas.sample(num_leituras, replace=True, random_state=42).reset_index(drop=True)
+    registros = leituras.to_dict('records')
+
+    modelos = [
+        (ManutencaoPreditiva(), 'prever', 'prever_lote'),
+        (DeteccaoAnomalias(), 'detectar_anomalia', 'detectar_anomalias_lote'),
+        (ClassificacaoEstado(), 'classificar', 'classificar_lote'),
+        (TempoAteFalha(), 'prever', 'prever_lote'),
+    ]
+    resultados = []
+
+    for modelo, metodo_linha, metodo_lote in modelos:
+        modelo.treinar(df_metricas)
+
+        inicio = time.perf_counter()
+        for registro in registros:
+            getattr(modelo, metodo_linha)(registro)
+        tempo_linha = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        getattr(modelo, metodo_lote)(leituras)
+        tempo_lote = time.perf_counter() - inicio
+
+        resultados.append({
+            'modelo': type(modelo).__name__,
+            'leituras_por_s_linha': round(num_leituras / tempo_linha),
+            'leituras_por_s_lote': round(num_leituras / tempo_lote),
+        })
+
+    for resultado in resultados:
+        print(f"  {resultado['modelo']:<22} linha: {resultado['leituras_por_s_linha']:>10} leituras/s | "
+              f"lote: {resultado['leituras_por_s_lote']:>10} leituras/s")
+
+    return resultados
+
+
+def benchmark_otimizacao_estoque(num_itens=50_000):
+    """Compara a rodada de reposição item a item com a versão vetorizada"""
+    print("=== Otimização de estoque: item a item x tabela ===")
+    rng = np.random.default_rng(42)
+    df_itens = pd.DataFrame({
+        'nivel_atual': rng.integers(0, 200, num_itens),
+        'demanda_media_diaria': rng.uniform(0.1, 10, num_itens),
+        'lead_time_dias': rng.integers(3, 30, num_itens),
+        'custo_pedido': rng.uniform(50, 500, num_itens),
+        'custo_manutencao_anual': rng.uniform(5, 50, num_itens),
+    })
+    modelo = OtimizacaoEstoque()
+
+    inicio = time.perf_counter()
+    for item in df_itens.itertuples():
+        ponto_reposicao = modelo.calcular_ponto_reposicao(item.demanda_media_diaria, item.lead_time_dias)
+        modelo.calcular_lote_economico(item.demanda_media_diaria * 365, item.custo_pedido,
+                                       item.custo_manutencao_anual)
+        modelo.analisar_estoque(item.nivel_atual, ponto_reposicao, item.demanda_media_diaria)
+    tempo_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    modelo.otimizar_lote(df_itens)
+    tempo_lote = time.perf_counter() - inicio
+
+    print(f"  {num_itens} itens: item a item {tempo_escalar:.2f} s | tabela {tempo_lote:.3f} s "
+          f"({tempo_escalar / tempo_lote:.0f}x)")
+
+    return {'num_itens': num_itens, 'escalar_s': round(tempo_escalar, 3), 'lote_s': round(tempo_lote, 4)}
+
+
+def benchmark_mqtt(tamanhos=(1_000, 10_000, 100_000), rodadas=3, tamanho_lote=5_000, qos=1):
+    """Teste de carga do pipeline MQTT (broker local): leituras/s e latência fim a fim"""
+    print("=== Pipeline MQTT: teste de carga ===")
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        equipamentos = simulator.equipamentos
+        broker = BrokerLocal()
+        assinante = AssinanteTelemetria(broker)
+        publicador = PublicadorTelemetria(broker, tamanho_lote=tamanho_lote, qos=qos)
+
+        inicio = time.perf_counter()
+        for _ in range(rodadas):
+            # Uma leitura por sensor a cada rodada
+            metricas = simulator.gerar_metricas_lote(equipamentos)
+            leituras = pd.DataFrame({
+                'equipamento_id': equipamentos['id'].to_numpy(),
+                'timestamp': pd.Timestamp.now().isoformat(timespec='microseconds'),
+                **{coluna: valores[0] for coluna, valores in metricas.items()},
+                'estado': equipamentos['estado'].to_numpy(),
+            })
+            publicador.publicar(leituras)
+        publicador.descarregar()
+        broker.aguardar_entrega()
+        duracao = time.perf_counter() - inicio
+
+        estatisticas = assinante.estatisticas()
+        resultado = {
+            'sensores': tamanho,
+            'leituras': estatisticas['leituras_recebidas'],
+            'leituras_por_s': round(estatisticas['leituras_recebidas'] / duracao),
+            'mensagens_por_s': round(estatisticas['lotes_recebidos'] / duracao, 1),
+            'bytes_por_leitura': round(publicador.bytes_publicados / max(1, publicador.leituras_publicadas), 1),
+            'latencia_media_ms': estatisticas['latencia_media_ms'],
+            'latencia_maxima_ms': estatisticas['latencia_maxima_ms'],
+        }
+        resultados.append(resultado)
+        print(f"  {tamanho:>7} sensores: {resultado['leituras_por_s']:>9} leituras/s | "
+              f"{resultado['mensagens_por_s']:>7} mensagens/s | "
+              f"latência média {resultado['latencia_media_ms']} ms (máx {resultado['latencia_maxima_ms']} ms)")
+
+    return resultados
+
+
+def benchmark_features(tamanhos=(1_000, 10_000), dias=90, intervalo_horas=6):
+    """Pipeline de features temporais: passada vetorizada, cache e groupby-rolling do pandas"""
+    print("=== Pipeline de features temporais ===")
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_metricas = simulator.gerar_dados_historicos(dias=dias, intervalo_horas=intervalo_horas)
+        pipeline = PipelineFeatures(FEATURES)
+
+        _, calculo = medir(lambda: pipeline.transformar(df_metricas, usar_cache=False))
+        pipeline.transformar(df_metricas)
+        _, cache = medir(lambda: pipeline.transformar(df_metricas))
+
+        # Referência: só as médias móveis, com groupby().rolling() do pandas
+        def groupby_rolling():
+            ordenado = df_metricas.sort_values(['equipamento_id', 'timestamp'])
+            return (ordenado.groupby('equipamento_id')[pipeline.variaveis]
+                    .rolling(pipeline.janela, min_periods=1).mean())
+        _, pandas_medias = medir(groupby_rolling)
+
+        resultado = {
+            'equipamentos': tamanho,
+            'leituras': len(df_metricas),
+            'features': len(pipeline.colunas),
+            'calculo': calculo,
+            'cache': cache,
+            'groupby_rolling_medias': pandas_medias,
+        }
+        resultados.append(resultado)
+        print(f"  {len(df_metricas):>9} leituras: {resultado['features']} features em {calculo['tempo_s']:.2f} s "
+              f"(cache {cache['tempo_s']:.3f} s, pico {calculo['memoria_pico_mb']:.0f} MB) | "
+              f"groupby-rolling só das médias {pandas_medias['tempo_s']:.2f} s")
+
+    return resultados
+
+
+def benchmark_armazem_features(tamanhos=(1_000, 10_000), dias=90, intervalo_horas=6, num_modelos=3):
+    """Preparo das features dos classificadores: escala float64 por modelo x armazém float32 compartilhado"""
+    from sklearn.preprocessing import StandardScaler
+
+    print("=== Armazém de features padronizadas ===")
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_metricas = simulator.gerar_dados_historicos(dias=dias, intervalo_horas=intervalo_horas)
+
+        # Referência: cada modelo copia a matriz do pipeline e ajusta o próprio StandardScaler
+        def por_modelo():
+            pipeline = PipelineFeatures(FEATURES)
+            return [StandardScaler().fit_transform(pipeline.transformar(df_metricas).to_numpy(dtype=float))
+                    for _ in range(num_modelos)]
+        _, separado = medir(por_modelo)
+
+        def compartilhado():
+            armazem = ArmazemFeatures(PipelineFeatures(FEATURES))
+            return [armazem.preparar(df_metricas)[1] for _ in range(num_modelos)]
+        _, armazem = medir(compartilhado)
+
+        resultado = {
+            'equipamentos': tamanho,
+            'leituras': len(df_metricas),
+            'modelos': num_modelos,
+            'escala_por_modelo': separado,
+            'armazem_compartilhado': armazem,
+        }
+        resultados.append(resultado)
+        print(f"  {len(df_metricas):>9} leituras, {num_modelos} modelos: por modelo {separado['tempo_s']:.2f} s "
+              f"(pico {separado['memoria_pico_mb']:.0f} MB) | armazém {armazem['tempo_s']:.2f} s "
+              f"(pico {armazem['memoria_pico_mb']:.0f} MB)")
+
+    return resultados
+
+
+def benchmark_anomalias_streaming(tamanhos=(1_000, 10_000, 100_000), rodadas=10, meta=META_ANOMALIAS_STREAMING):
+    """Vazão do motor de anomalias em fluxo contínuo (filtro EWMA + Isolation Forest)"""
+    print("=== Anomalias em fluxo contínuo ===")
+    modelo = DeteccaoAnomalias()
+    with contextlib.redirect_stdout(io.StringIO()):
+        modelo.treinar(IoTSensorSimulator(num_equipamentos=200, rng=np.random.default_rng(42))
+                       .gerar_dados_historicos(dias=30))
+    resultados = []
+
+    for tamanho in tamanhos:
+        simulator = IoTSensorSimulator(num_equipamentos=tamanho, rng=np.random.default_rng(42))
+        equipamentos = simulator.equipamentos
+        # Lotes gerados antes da medição: só o custo do motor entra no tempo
+        lotes = []
+        for _ in range(rodadas):
+            metricas = simulator.gerar_metricas_lote(equipamentos)
+            lotes.append(pd.DataFrame({
+                'equipamento_id': equipamentos['id'].to_numpy(),
+                **{coluna: valores[0] for coluna, valores in metricas.items()},
+            }))
+
+        motor = MotorAnomaliasStreaming(modelo)
+        inicio = time.perf_counter()
+        for lote in lotes:
+            motor.processar(lote)
+        duracao = time.perf_counter() - inicio
+
+        estatisticas = motor.estatisticas()
+        resultado = {
+            'sensores': tamanho,
+            'leituras': estatisticas['leituras_processadas'],
+            'leituras_por_s': round(estatisticas['leituras_processadas'] / duracao),
+            'taxa_filtro': estatisticas['taxa_filtro'],
+            'anomalias': estatisticas['anomalias_confirmadas'],
+            'dentro_meta': estatisticas['leituras_processadas'] / duracao >= meta,
+        }
+        resultados.append(resultado)
+        situacao = '✓' if resultado['dentro_meta'] else f'⚠ abaixo da meta de {meta} leituras/s'
+        print(f"  {tamanho:>7} sensores: {resultado['leituras_por_s']:>9} leituras/s | "
+              f"{resultado['taxa_filtro']:.2%} para a Isolation Forest {situacao}")
+
+    return resultados
+
+
+def benchmark_importacao(orcamento=ORCAMENTO_IMPORTACAO, repeticoes=3):
+    """Tempo de importação a frio de cada módulo (processo novo), comparado ao orçamento"""
+    print("=== Importação a frio dos módulos ===")
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    codigo = (
+        "import json, sys, time\n"
+        "inicio = time.perf_counter()\n"
+        "import {modulo}\n"
+        "tempo = time.perf_counter() - inicio\n"
+        "print(json.dumps({{'tempo_s': tempo, 'pesados': [m for m in {pesados!r} if m in sys.modules]}}))\n"
+    )
+    resultados = []
+
+    for modulo, limite in orcamento.items():
+        medidas = []
+        for _ in range(repeticoes):
+            saida = subprocess.run([sys.executable, '-c', codigo.format(modulo=modulo, pesados=MODULOS_PESADOS)],
+                                   capture_output=True, text=True, cwd=diretorio, check=True).stdout
+            medidas.append(json.loads(saida.strip().splitlines()[-1]))
+
+        tempo_s = min(medida['tempo_s'] for medida in medidas)
+        resultado = {
+            'modulo': modulo,
+            'tempo_s': round(tempo_s, 3),
+            'orcamento_s': limite,
+            'dentro_orcamento': tempo_s <= limite,
+            'modulos_pesados': medidas[-1]['pesados'],
+        }
+        resultados.append(resultado)
+        situacao = '✓' if resultado['dentro_orcamento'] else '⚠ acima do orçamento'
+        pesados = f" (carregou {', '.join(resultado['modulos_pesados'])})" if resultado['modulos_pesados'] else ''
+        print(f"  {modulo:<24} {tempo_s:6.3f} s / {limite:.1f} s {situacao}{pesados}")
+
+    return resultados
+
+
+def _ambiente():
+    """Versões e máquina, para comparar resultados entre execuções"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'executado_em': datetime.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': versao_sklearn(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def executar_suite(saida=SAIDA_PADRAO, rapido=False):
+    """Executa todos os benchmarks e grava os resultados em JSON"""
+    if rapido:
+        tamanhos, dias, tamanhos_modelos = (50, 1_000), (30,), (50,)
+    else:
+        tamanhos, dias, tamanhos_modelos = (50, 1_000, 10_000, 100_000), (30, 90), (50, 1_000)
+
+    resultados = {
+        'ambiente': _ambiente(),
+        'importacao': benchmark_importacao(),
+        'simulador': benchmark_simulador(tamanhos, dias),
+        'modelos': benchmark_modelos(tamanhos_modelos),
+        'dashboard': benchmark_dashboard(),
+        'busca_equipamento': benchmark_busca_equipamento(tamanhos),
+        'inferencia_lote': benchmark_inferencia_lote(),
+        'features': benchmark_features(tamanhos[:2] if rapido else tamanhos[1:3], dias[-1]),
+        'armazem_features': benchmark_armazem_features(tamanhos[:2] if rapido else tamanhos[1:3], dias[-1]),
+        'otimizacao_estoque': benchmark_otimizacao_estoque(5_000 if rapido else 50_000),
+        'mqtt': benchmark_mqtt(tamanhos[-3:]),
+        'anomalias_streaming': benchmark_anomalias_streaming(tamanhos[-3:]),
+    }
+
+    diretorio = os.path.dirname(os.path.abspath(saida))
+    os.makedirs(diretorio, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, indent=2, ensure_ascii=False, default=str)
+    print(f"\n✓ Resultados gravados em {saida}")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de desempenho do SmartStock IoT")
+    parser.add_argument('--saida', default=SAIDA_PADRAO, help="arquivo JSON de resultados")
+    parser.add_argument('--rapido', action='store_true', help="frotas e históricos menores")
+    argumentos = parser.parse_args()
+
+    executar_suite(argumentos.saida, argumentos.rapido)
@@ -0,0 +1,165 @@
+"""
+Contadores Incrementais de Estoque
+Mantém contagens por categoria (no almoxarifado), localização e estado atualizadas
+a cada movimentação ou mudança de estado, com leitura em tempo constante. Quem altera
+o cadastro o faz segurando a trava dos contadores, junto com o registro do evento,
+para que uma recontagem nunca veja o cadastro e os contadores fora de sincronia.
+"""
+
+import threading
+from collections import Counter
+import pandas as pd
+
+
+def no_almoxarifado(localizacao):
+    return 'Almoxarifado' in localizacao
+
+
+def em_uso(localizacao):
+    return 'Em Uso' in localizacao
+
+
+def _contar(serie):
+    """Contagem por valor sem as categorias vazias (colunas category listam todas)"""
+    contagem = serie.value_counts()
+    return Counter(contagem[contagem > 0].to_dict())
+
+
+class ContadoresEstoque:
+    """Contagens de estoque mantidas por evento, em vez de recalculadas a cada leitura"""
+
+    def __init__(self):
+        # Reentrante: o simulador segura a trava enquanto altera o cadastro e chama registrar_*
+        self.trava = threading.RLock()
+        self._zerar()
+
+    def _zerar(self):
+        self.estoque_por_categoria = Counter()
+        self.por_localizacao = Counter()
+        self.por_estado = Counter()
+        self.total = 0
+        self.total_em_uso = 0
+        self.versao = 0
+
+    @classmethod
+    def de_dataframe(cls, df_equipamentos):
+        """Cria os contadores a partir do cadastro (ex: simulator.equipamentos)"""
+        contadores = cls()
+        contadores.recalcular(df_equipamentos)
+        return contadores
+
+    @staticmethod
+    def _contagens(df_equipamentos):
+        """Recontagem completa do cadastro, usada na carga e na verificação"""
+        localizacao = df_equipamentos['localizacao']
+        almoxarifado = localizacao.str.contains('Almoxarifado')
+        return {
+            'estoque_por_categoria': _contar(df_equipamentos.loc[almoxarifado, 'categoria']),
+            'por_localizacao': _contar(localizacao),
+            'por_estado': _contar(df_equipamentos['estado']),
+            'total': len(df_equipamentos),
+            'total_em_uso': int(localizacao.str.contains('Em Uso').sum()),
+        }
+
+    def recalcular(self, df_equipamentos):
+        """Refaz todas as contagens a partir do cadastro"""
+        contagens = self._contagens(df_equipamentos)
+        with self.trava:
+            for nome, valor in contagens.items():
+                setattr(self, nome, valor)
+            self.versao += 1
+
+    def registrar_movimentacao(self, categoria, origem, destino):
+        """Atualiza as contagens quando um equipamento muda de localização"""
+        if origem == destino:
+            return
+        with self.trava:
+            self.por_localizacao[origem] -= 1
+            self.por_localizacao[destino] += 1
+            self.estoque_por_categoria[categoria] += no_almoxarifado(destino) - no_almoxarifado(origem)
+            self.total_em_uso += em_uso(destino) - em_uso(origem)
+            self.versao += 1
+
+    def registrar_estado(self, anterior, novo):
+        """Atualiza as contagens quando um equipamento muda de estado"""
+        if anterior == novo:
+            return
+        with self.trava:
+            self.por_estado[anterior] -= 1
+            self.por_estado[novo] += 1
+            self.versao += 1
+
+    def instantaneo(self):
+        """Cópia consistente de todas as contagens (para iterar fora da trava)"""
+        with self.trava:
+            return {
+                'estoque_por_categoria': Counter(self.estoque_por_categoria),
+                'por_localizacao': Counter(self.por_localizacao),
+                'por_estado': Counter(self.por_estado),
+                'total': self.total,
+                'total_em_uso': self.total_em_uso,
+                'versao': self.versao,
+            }
+
+    def quantidade_em_estoque(self, categoria):
+        return self.estoque_por_categoria[categoria]
+
+    def quantidade_por_estado(self, estado):
+        return self.por_estado[estado]
+
+    def nivel_estoque(self):
+        """Retorna nível de estoque atual por categoria, no formato de obter_nivel_estoque_atual"""
+        with self.trava:
+            itens = sorted((categoria, quantidade) for categoria, quantidade in self.estoque_por_categoria.items()
+                           if quantidade > 0)
+        return pd.DataFrame(itens, columns=['categoria', 'quantidade'])
+
+    def verificar_consistencia(self, df_equipamentos, corrigir=True):
+        """Compara os contadores com uma recontagem completa do cadastro
+
+        Retorna a lista de divergências (nome, chave, contador, recontagem); com
+        corrigir=True os contadores são substituídos pela recontagem. A recontagem é
+        feita segurando a trava, então só enxerga alterações do cadastro já registradas.
+        """
+        divergencias = []
+
+        with self.trava:
+            contagens = self._contagens(df_equipamentos)
+            for nome, esperado in contagens.items():
+                atual = getattr(self, nome)
+                if isinstance(esperado, Counter):
+                    for chave in set(atual) | set(esperado):
+                        if atual[chave] != esperado[chave]:
+                            divergencias.append((nome, chave, atual[chave], esperado[chave]))
+                elif atual != esperado:
+                    divergencias.append((nome, None, atual, esperado))
+
+            if divergencias and corrigir:
+                for nome, valor in contagens.items():
+                    setattr(self, nome, valor)
+                self.versao += 1
+
+        if divergencias:
+            print(f"⚠ {len(divergencias)} divergências nos contadores de estoque"
+                  f"{' (corrigidas)' if corrigir else ''}")
+        return divergencias
+
+
+if __name__ == "__main__":
+    # Teste dos contadores
+    from iot_simulator import IoTSensorSimulator
+
+    print("=== Teste dos Contadores de Estoque ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=1_000)
+    for equipamento_id in simulator.equipamentos['id'].sample(200):
+        simulator.simular_movimentacao(equipamento_id, 'Em Uso - RH')
+        simulator.atualizar_estado(equipamento_id, 'Atenção')
+
+    print("Nível de estoque atual:")
+    print(simulator.contadores.nivel_estoque())
+    print(f"\nEm uso: {simulator.contadores.total_em_uso} | "
+          f"Críticos: {simulator.contadores.quantidade_por_estado('Crítico')}")
+
+    divergencias = simulator.contadores.verificar_consistencia(simulator.equipamentos)
+    print(f"\n✓ Divergências: {len(divergencias)}")
@@ -3,138 +3,353 @@ Dashboard Interativo para Sistema de Gestão de Estoque Inteligente
 Visualização em tempo real com Plotly Dash
 """
 
-import dash
-from dash import dcc, html, Input, Output, dash_table
-import plotly.graph_objs as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import logging
+import os
 import sys
+import threading
 sys.path.append('/home/ubuntu/projeto_iot_estoque/src')
 
 from iot_simulator import IoTSensorSimulator
-from ai_models import (ManutencaoPreditiva, PrevisaoDemanda, 
-                       DeteccaoAnomalias, OtimizacaoEstoque)
+from banco_estoque import BancoEstoque
+from avaliacao_risco import AvaliadorRisco
+from anomalias_streaming import MotorAnomaliasStreaming
+from instrumentacao import cronometro, instrumentar, registrar_endpoint
+# Dash, Plotly, PyArrow, os modelos e o orquestrador de treinamento são importados só por
+# inicializar(), criar_app() e os renderizadores: importar o módulo continua leve
 
-# Inicializa simulador e modelos
-print("Inicializando sistema...")
-simulator = IoTSensorSimulator(num_equipamentos=50)
-df_metricas = simulator.gerar_dados_historicos(dias=90, intervalo_horas=6)
-df_movimentacoes = simulator.gerar_movimentacoes_historicas(dias=90)
+# A cada quantos intervalos os contadores de estoque são conferidos com uma recontagem
+INTERVALOS_VERIFICACAO_CONTADORES = 30
 
-# Treina modelos
-modelo_manutencao = ManutencaoPreditiva()
-modelo_manutencao.treinar(df_metricas)
+# Estado do dashboard, preenchido por inicializar(); importar o módulo não gera dados nem treina
+banco_estoque = None
+armazenamento = None
+simulator = None
+df_movimentacoes = None
+repositorio_modelos = None
+modelo_manutencao = None
+modelo_anomalias = None
+modelo_tempo_falha = None
+modelo_demanda = None
+modelo_otimizacao = None
+avaliador_risco = None
+motor_anomalias = None
+painel = None
+app = None
 
-modelo_anomalias = DeteccaoAnomalias()
-modelo_anomalias.treinar(df_metricas)
 
-modelo_demanda = PrevisaoDemanda()
-modelo_otimizacao = OtimizacaoEstoque()
+def carregar_historico(armazem, tipo, gerar, equipamentos, dias=90):
+    """Últimos dias de um tipo de dado do armazenamento; se estiver vazio, gera e persiste
 
-print("✓ Sistema inicializado com sucesso!")
+    Reinícios reaproveitam o histórico gravado em vez de sorteá-lo de novo.
+    """
+    df = armazem.ler(tipo, inicio=pd.Timestamp.now() - pd.Timedelta(days=dias))
+    if len(df) == 0:
+        df = gerar()
+        armazem.anexar(tipo, df, equipamentos=equipamentos)
+        return df
+    # 'dia' é só a partição; o formato fixo do timestamp faz a ordem textual ser a cronológica
+    return (df.drop(columns='dia')
+              .sort_values(['timestamp', 'equipamento_id'], kind='stable', ignore_index=True))
 
-# Inicializa app Dash
-app = dash.Dash(__name__)
-app.title = "SmartStock IoT - Dashboard"
 
-# Layout do Dashboard
-app.layout = html.Div([
-    html.Div([
-        html.H1("🔧 SmartStock IoT", style={'color': '#2c3e50', 'textAlign': 'center'}),
-        html.H3("Sistema Inteligente de Gestão de Estoque com Manutenção Preditiva", 
-                style={'color': '#7f8c8d', 'textAlign': 'center', 'marginBottom': '30px'}),
-    ]),
-    
-    # Linha 1: Cards de Resumo
-    html.Div([
+def inicializar(num_equipamentos=50, diretorio_dados=None, iniciar_workers=True):
+    """Cria banco, simulador e modelos e inicia os workers de segundo plano (uma única vez)"""
+    global banco_estoque, armazenamento, simulator, df_movimentacoes, repositorio_modelos
+    global modelo_manutencao, modelo_anomalias, modelo_tempo_falha, modelo_demanda, modelo_otimizacao
+    global avaliador_risco, motor_anomalias, painel
+    
+    if simulator is not None:
+        return
+    
+    from armazenamento import ArmazenamentoTelemetria
+    from treinamento import OrquestradorTreinamento
+    from ai_models import (ManutencaoPreditiva, PrevisaoDemanda, DeteccaoAnomalias, OtimizacaoEstoque,
+                           TempoAteFalha, CacheVidaRestante, RepositorioModelos)
+    
+    # Inicializa simulador e modelos
+    print("Inicializando sistema...")
+    # Cadastro e movimentações persistidos em SQLite, compartilhado entre as threads do servidor
+    diretorio_dados = diretorio_dados or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dados')
+    banco_estoque = BancoEstoque(os.path.join(diretorio_dados, 'estoque.db'))
+    simulator = IoTSensorSimulator(num_equipamentos=num_equipamentos, banco=banco_estoque)
+    # Histórico de telemetria em Parquet ao lado do banco: gerado só na primeira execução
+    armazenamento = ArmazenamentoTelemetria(os.path.join(diretorio_dados, 'telemetria'))
+    df_movimentacoes = carregar_historico(armazenamento, 'movimentacoes',
+                                          lambda: simulator.gerar_movimentacoes_historicas(dias=90),
+                                          simulator.equipamentos)
+    
+    # Carrega modelos já treinados; treina apenas os que não têm artefato compatível
+    repositorio_modelos = RepositorioModelos()
+    modelo_manutencao = repositorio_modelos.carregar('manutencao', ManutencaoPreditiva)
+    modelo_anomalias = repositorio_modelos.carregar('anomalias', DeteccaoAnomalias)
+    modelo_tempo_falha = repositorio_modelos.carregar('tempo_falha', TempoAteFalha)
+    
+    pendentes = {nome: classe for nome, classe, modelo in [
+        ('manutencao', ManutencaoPreditiva, modelo_manutencao),
+        ('anomalias', DeteccaoAnomalias, modelo_anomalias),
+        ('tempo_falha', TempoAteFalha, modelo_tempo_falha),
+    ] if modelo is None}
+    
+    if pendentes:
+        # Os modelos faltantes são treinados em paralelo, cada um em seu processo
+        df_metricas = carregar_historico(armazenamento, 'metricas',
+                                         lambda: simulator.gerar_dados_historicos(dias=90, intervalo_horas=6),
+                                         simulator.equipamentos)
+        treinados = OrquestradorTreinamento(repositorio=repositorio_modelos).treinar(df_metricas, pendentes)
+        modelo_manutencao = treinados.get('manutencao', modelo_manutencao)
+        modelo_anomalias = treinados.get('anomalias', modelo_anomalias)
+        modelo_tempo_falha = treinados.get('tempo_falha', modelo_tempo_falha)
+    modelo_manutencao.modelo_tempo = modelo_tempo_falha
+    
+    # Ajustes de demanda em um pool com um processo por CPU, mantido entre as atualizações do painel
+    modelo_demanda = PrevisaoDemanda()
+    modelo_otimizacao = OtimizacaoEstoque()
+    
+    # Pontuação de risco, anomalias e tempo até falha de toda a frota em uso, fora do caminho das requisições
+    motor_anomalias = MotorAnomaliasStreaming(modelo_anomalias)
+    avaliador_risco = AvaliadorRisco(simulator, modelo_manutencao, top_n=20, intervalo_segundos=10,
+                                     motor_anomalias=motor_anomalias,
+                                     vida_restante=CacheVidaRestante(modelo_tempo_falha))
+    painel = SnapshotDashboard(intervalo_segundos=10)
+    if iniciar_workers:
+        avaliador_risco.iniciar()
+        painel.iniciar()
+    else:
+        avaliador_risco.avaliar_frota()
+        painel.construir()
+    
+    print("✓ Sistema inicializado com sucesso!")
+
+
+def criar_layout():
+    """Layout do Dashboard (os cartões de resumo usam o estado no momento da criação)"""
+    from dash import dcc, html
+    
+    return html.Div([
         html.Div([
-            html.H4("📦 Estoque Total"),
-            html.H2(f"{len(simulator.equipamentos)}", style={'color': '#3498db'}),
-            html.P("equipamentos")
-        ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
-                                     'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
-        
+            html.H1("🔧 SmartStock IoT", style={'color': '#2c3e50', 'textAlign': 'center'}),
+            html.H3("Sistema Inteligente de Gestão de Estoque com Manutenção Preditiva", 
+                    style={'color': '#7f8c8d', 'textAlign': 'center', 'marginBottom': '30px'}),
+        ]),
+    
+        # Linha 1: Cards de Resumo
         html.Div([
-            html.H4("⚠️ Críticos"),
-            html.H2(f"{len(simulator.equipamentos[simulator.equipamentos['estado'] == 'Crítico'])}", 
-                    style={'color': '#e74c3c'}),
-            html.P("precisam atenção")
-        ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
-                                     'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
+            html.Div([
+                html.H4("📦 Estoque Total"),
+                html.H2(f"{len(simulator.equipamentos)}", style={'color': '#3498db'}),
+                html.P("equipamentos")
+            ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
+                                         'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
+        
+            html.Div([
+                html.H4("⚠️ Críticos"),
+                html.H2(f"{len(simulator.equipamentos[simulator.equipamentos['estado'] == 'Crítico'])}", 
+                        style={'color': '#e74c3c'}),
+                html.P("precisam atenção")
+            ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
+                                         'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
+        
+            html.Div([
+                html.H4("🔄 Em Uso"),
+                html.H2(f"{len(simulator.obter_equipamentos_em_uso())}", style={'color': '#f39c12'}),
+                html.P("equipamentos ativos")
+            ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
+                                         'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
         
+            html.Div([
+                html.H4("✅ Disponíveis"),
+                html.H2(f"{len(simulator.obter_nivel_estoque_atual())}", style={'color': '#27ae60'}),
+                html.P("no almoxarifado")
+            ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
+                                         'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
+        ]),
+    
+        html.Hr(),
+    
+        # Linha 2: Gráficos Principais
         html.Div([
-            html.H4("🔄 Em Uso"),
-            html.H2(f"{len(simulator.obter_equipamentos_em_uso())}", style={'color': '#f39c12'}),
-            html.P("equipamentos ativos")
-        ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
-                                     'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
+            # Gráfico 1: Distribuição por Estado
+            html.Div([
+                html.H4("Estado dos Equipamentos"),
+                dcc.Graph(id='grafico-estado')
+            ], style={'width': '48%', 'display': 'inline-block', 'padding': '10px'}),
         
+            # Gráfico 2: Estoque por Categoria
+            html.Div([
+                html.H4("Estoque por Categoria"),
+                dcc.Graph(id='grafico-categoria')
+            ], style={'width': '48%', 'display': 'inline-block', 'padding': '10px'}),
+        ]),
+    
+        # Linha 3: Manutenção Preditiva
         html.Div([
-            html.H4("✅ Disponíveis"),
-            html.H2(f"{len(simulator.obter_nivel_estoque_atual())}", style={'color': '#27ae60'}),
-            html.P("no almoxarifado")
-        ], className='card', style={'width': '23%', 'display': 'inline-block', 'margin': '1%', 
-                                     'padding': '20px', 'backgroundColor': '#ecf0f1', 'borderRadius': '10px'}),
-    ]),
-    
-    html.Hr(),
-    
-    # Linha 2: Gráficos Principais
-    html.Div([
-        # Gráfico 1: Distribuição por Estado
+            html.H3("🔮 Manutenção Preditiva - Equipamentos em Risco", 
+                    style={'color': '#e74c3c', 'marginTop': '20px'}),
+            html.Div(id='tabela-manutencao')
+        ]),
+    
+        html.Hr(),
+    
+        # Linha 4: Previsão de Demanda
         html.Div([
-            html.H4("Estado dos Equipamentos"),
-            dcc.Graph(id='grafico-estado')
-        ], style={'width': '48%', 'display': 'inline-block', 'padding': '10px'}),
-        
-        # Gráfico 2: Estoque por Categoria
+            html.H3("📈 Previsão de Demanda (Próximos 30 dias)", 
+                    style={'color': '#3498db', 'marginTop': '20px'}),
+            dcc.Graph(id='grafico-demanda')
+        ]),
+    
+        html.Hr(),
+    
+        # Linha 5: Alertas e Recomendações
         html.Div([
-            html.H4("Estoque por Categoria"),
-            dcc.Graph(id='grafico-categoria')
-        ], style={'width': '48%', 'display': 'inline-block', 'padding': '10px'}),
-    ]),
-    
-    # Linha 3: Manutenção Preditiva
-    html.Div([
-        html.H3("🔮 Manutenção Preditiva - Equipamentos em Risco", 
-                style={'color': '#e74c3c', 'marginTop': '20px'}),
-        html.Div(id='tabela-manutencao')
-    ]),
-    
-    html.Hr(),
-    
-    # Linha 4: Previsão de Demanda
-    html.Div([
-        html.H3("📈 Previsão de Demanda (Próximos 30 dias)", 
-                style={'color': '#3498db', 'marginTop': '20px'}),
-        dcc.Graph(id='grafico-demanda')
-    ]),
-    
-    html.Hr(),
-    
-    # Linha 5: Alertas e Recomendações
-    html.Div([
-        html.H3("🚨 Alertas e Recomendações", style={'color': '#f39c12', 'marginTop': '20px'}),
-        html.Div(id='alertas-container')
-    ]),
-    
-    # Intervalo para atualização (simulação de tempo real)
-    dcc.Interval(
-        id='interval-component',
-        interval=10*1000,  # atualiza a cada 10 segundos
-        n_intervals=0
-    )
-])
+            html.H3("🚨 Alertas e Recomendações", style={'color': '#f39c12', 'marginTop': '20px'}),
+            html.Div(id='alertas-container')
+        ]),
+    
+        # Versões do snapshot já renderizadas nesta sessão do navegador
+        dcc.Store(id='versoes-renderizadas'),
+    
+        # Intervalo para atualização (simulação de tempo real)
+        dcc.Interval(
+            id='interval-component',
+            interval=10*1000,  # atualiza a cada 10 segundos
+            n_intervals=0
+        )
+    ])
+
+
+# Snapshot dos agregados do dashboard
+class SnapshotDashboard:
+    """Calcula, em segundo plano, todos os agregados do dashboard uma vez por intervalo
+    
+    Cada seção tem uma versão que só muda quando seu conteúdo muda; os callbacks
+    leem o snapshot atual sem recalcular nada e pulam as seções já renderizadas.
+    """
+    
+    SECOES = ['estado', 'categoria', 'manutencao', 'demanda', 'alertas']
+    
+    def __init__(self, intervalo_segundos=10, intervalos_verificacao=INTERVALOS_VERIFICACAO_CONTADORES):
+        self.intervalo_segundos = intervalo_segundos
+        self.intervalos_verificacao = intervalos_verificacao
+        self.atual = None
+        self._construcoes = 0
+        self._parar = threading.Event()
+        self._thread = None
+    
+    @staticmethod
+    def _impressao(dados):
+        """Impressão digital do conteúdo de uma seção, para detectar mudanças"""
+        if isinstance(dados, pd.DataFrame):
+            return (tuple(dados.columns), int(pd.util.hash_pandas_object(dados, index=False).sum()))
+        return hash(dados)
+    
+    def _calcular_estado(self):
+        # Cópia tirada sob a trava: os Counters mudam a cada movimentação em outras threads
+        contagem = simulator.contadores.instantaneo()['por_estado']
+        return pd.DataFrame(sorted((estado, quantidade) for estado, quantidade in contagem.items() if quantidade > 0),
+                            columns=['estado', 'quantidade'])
+    
+    def _calcular_manutencao(self):
+        # Lê o ranking mantido pelo avaliador em segundo plano (toda a frota em uso)
+        em_risco = avaliador_risco.top_em_risco(probabilidade_minima=0.5)
+        
+        return pd.DataFrame({
+            'ID': em_risco['id'],
+            'Categoria': em_risco['categoria'],
+            'Estado': em_risco['estado'],
+            'Idade (meses)': em_risco['idade_meses'],
+            'Prob. Falha': em_risco['probabilidade_falha'].map('{:.1%}'.format),
+            'Risco': em_risco['nivel_risco'],
+            'Tempo até Falha (h)': em_risco['tempo_ate_falha_horas'],
+            'Ação': np.where(em_risco['probabilidade_falha'] > 0.7,
+                             'Manutenção Urgente', 'Agendar Manutenção')
+        })
+    
+    def _calcular_demanda(self):
+        # Prevê demanda de todas as categorias a partir da matriz de demanda em cache
+        categorias = simulator.equipamentos['categoria'].unique()[:5]  # Top 5 categorias
+        previsoes = modelo_demanda.prever_demanda_todas(df_movimentacoes, dias_futuros=30)
+        previsoes = previsoes[previsoes['categoria'].isin(categorias)]
+        
+        return pd.DataFrame({
+            'Categoria': previsoes['categoria'],
+            'Demanda Prevista': previsoes['demanda_prevista'],
+            'Min': previsoes['ic_min'],
+            'Max': previsoes['ic_max']
+        })
+    
+    def _calcular_alertas(self):
+        contadores = simulator.contadores.instantaneo()
+        estoque_baixo = tuple(
+            (categoria, quantidade)
+            for categoria, quantidade in sorted(contadores['estoque_por_categoria'].items())
+            if 0 < quantidade < 3
+        )
+        # Equipamento, variável e severidade das anomalias mais recentes do motor em fluxo contínuo
+        anomalias = tuple(motor_anomalias.anomalias_recentes(5)[['equipamento_id', 'variavel', 'z_score', 'severidade']]
+                          .itertuples(index=False, name=None))
+        return (estoque_baixo, contadores['por_estado']['Crítico'], contadores['total_em_uso'],
+                anomalias, motor_anomalias.anomalias_confirmadas)
+    
+    @instrumentar('dashboard_construir_snapshot')
+    def construir(self):
+        """Monta um novo snapshot e o publica de uma só vez"""
+        self._construcoes += 1
+        # Confere periodicamente os contadores incrementais contra uma recontagem completa
+        if self._construcoes % self.intervalos_verificacao == 0:
+            simulator.contadores.verificar_consistencia(simulator.equipamentos)
+        
+        secoes = {
+            'estado': self._calcular_estado(),
+            'categoria': simulator.contadores.nivel_estoque(),
+            'manutencao': self._calcular_manutencao(),
+            'demanda': self._calcular_demanda(),
+            'alertas': self._calcular_alertas(),
+        }
+        
+        anterior = self.atual
+        versoes, impressoes = {}, {}
+        for secao, dados in secoes.items():
+            impressoes[secao] = self._impressao(dados)
+            if anterior is not None and anterior['impressoes'][secao] == impressoes[secao]:
+                versoes[secao] = anterior['versoes'][secao]
+            else:
+                versoes[secao] = (anterior['versoes'][secao] + 1) if anterior is not None else 1
+        
+        # Troca a referência inteira: os callbacks nunca veem um snapshot pela metade
+        self.atual = {
+            'secoes': secoes,
+            'versoes': versoes,
+            'impressoes': impressoes,
+            'gerado_em': datetime.now(),
+        }
+        return self.atual
+    
+    def _executar(self):
+        while not self._parar.wait(self.intervalo_segundos):
+            try:
+                self.construir()
+            except Exception as erro:
+                print(f"⚠ Falha ao atualizar o snapshot do dashboard: {erro}")
+    
+    def iniciar(self):
+        """Constrói o primeiro snapshot e inicia a atualização em segundo plano"""
+        if self.atual is None:
+            self.construir()
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name='snapshot-dashboard', daemon=True)
+            self._thread.start()
+    
+    def parar(self):
+        self._parar.set()
+
 
-# Callbacks para atualização dos gráficos
-@app.callback(
-    Output('grafico-estado', 'figure'),
-    Input('interval-component', 'n_intervals')
-)
-def atualizar_grafico_estado(n):
-    df_estado = simulator.equipamentos.groupby('estado').size().reset_index(name='quantidade')
+# Renderização de cada seção a partir do snapshot
+def renderizar_estado(df_estado):
+    import plotly.express as px
     
     fig = px.pie(df_estado, values='quantidade', names='estado',
                  color='estado',
@@ -143,47 +358,21 @@ def atualizar_grafico_estado(n):
     fig.update_layout(showlegend=True)
     return fig
 
-@app.callback(
-    Output('grafico-categoria', 'figure'),
-    Input('interval-component', 'n_intervals')
-)
-def atualizar_grafico_categoria(n):
-    df_cat = simulator.obter_nivel_estoque_atual()
+def renderizar_categoria(df_cat):
+    import plotly.express as px
     
     fig = px.bar(df_cat, x='categoria', y='quantidade',
                  color='quantidade', color_continuous_scale='Blues')
     fig.update_layout(xaxis_title="Categoria", yaxis_title="Quantidade em Estoque")
     return fig
 
-@app.callback(
-    Output('tabela-manutencao', 'children'),
-    Input('interval-component', 'n_intervals')
-)
-def atualizar_tabela_manutencao(n):
-    # Analisa equipamentos em uso
-    equipamentos_risco = []
-    
-    for _, equip in simulator.obter_equipamentos_em_uso().head(10).iterrows():
-        metricas = simulator.gerar_metricas_uso(equip['id'])
-        predicao = modelo_manutencao.prever(metricas)
-        
-        if predicao['probabilidade_falha'] > 0.5:
-            equipamentos_risco.append({
-                'ID': equip['id'],
-                'Categoria': equip['categoria'],
-                'Estado': equip['estado'],
-                'Idade (meses)': equip['idade_meses'],
-                'Prob. Falha': f"{predicao['probabilidade_falha']:.1%}",
-                'Risco': predicao['nivel_risco'],
-                'Ação': 'Manutenção Urgente' if predicao['probabilidade_falha'] > 0.7 else 'Agendar Manutenção'
-            })
-    
-    if not equipamentos_risco:
+def renderizar_manutencao(df_risco):
+    from dash import html, dash_table
+    
+    if df_risco.empty:
         return html.P("✅ Nenhum equipamento em risco crítico no momento.", 
                      style={'color': '#27ae60', 'fontSize': '16px'})
     
-    df_risco = pd.DataFrame(equipamentos_risco)
-    
     return dash_table.DataTable(
         data=df_risco.to_dict('records'),
         columns=[{'name': col, 'id': col} for col in df_risco.columns],
@@ -198,26 +387,8 @@ def atualizar_tabela_manutencao(n):
         ]
     )
 
-@app.callback(
-    Output('grafico-demanda', 'figure'),
-    Input('interval-component', 'n_intervals')
-)
-def atualizar_grafico_demanda(n):
-    # Prevê demanda para cada categoria
-    categorias = simulator.equipamentos['categoria'].unique()
-    previsoes = []
-    
-    for cat in categorias[:5]:  # Top 5 categorias
-        prev = modelo_demanda.prever_demanda(df_movimentacoes, cat, dias_futuros=30)
-        if prev:
-            previsoes.append({
-                'Categoria': cat,
-                'Demanda Prevista': prev['demanda_prevista'],
-                'Min': prev['intervalo_confianca'][0],
-                'Max': prev['intervalo_confianca'][1]
-            })
-    
-    df_prev = pd.DataFrame(previsoes)
+def renderizar_demanda(df_prev):
+    import plotly.graph_objs as go
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -235,41 +406,48 @@ def atualizar_grafico_demanda(n):
     
     return fig
 
-@app.callback(
-    Output('alertas-container', 'children'),
-    Input('interval-component', 'n_intervals')
-)
-def atualizar_alertas(n):
+def renderizar_alertas(dados_alertas):
+    from dash import html
+    
+    estoque_baixo, criticos, total_em_uso, anomalias, total_anomalias = dados_alertas
     alertas = []
     
     # Alerta 1: Estoque baixo
-    estoque = simulator.obter_nivel_estoque_atual()
-    for _, row in estoque.iterrows():
-        if row['quantidade'] < 3:
-            alertas.append(
-                html.Div([
-                    html.H5(f"⚠️ Estoque Baixo: {row['categoria']}", style={'color': '#e74c3c'}),
-                    html.P(f"Apenas {row['quantidade']} unidades disponíveis. Recomenda-se compra urgente.")
-                ], style={'backgroundColor': '#fadbd8', 'padding': '15px', 'borderRadius': '5px', 'margin': '10px'})
-            )
+    for categoria, quantidade in estoque_baixo:
+        alertas.append(
+            html.Div([
+                html.H5(f"⚠️ Estoque Baixo: {categoria}", style={'color': '#e74c3c'}),
+                html.P(f"Apenas {quantidade} unidades disponíveis. Recomenda-se compra urgente.")
+            ], style={'backgroundColor': '#fadbd8', 'padding': '15px', 'borderRadius': '5px', 'margin': '10px'})
+        )
     
     # Alerta 2: Equipamentos críticos
-    criticos = simulator.equipamentos[simulator.equipamentos['estado'] == 'Crítico']
-    if len(criticos) > 0:
+    if criticos > 0:
         alertas.append(
             html.Div([
-                html.H5(f"🔴 {len(criticos)} Equipamentos Críticos", style={'color': '#e74c3c'}),
+                html.H5(f"🔴 {criticos} Equipamentos Críticos", style={'color': '#e74c3c'}),
                 html.P(f"Equipamentos precisam de substituição ou manutenção imediata.")
             ], style={'backgroundColor': '#fadbd8', 'padding': '15px', 'borderRadius': '5px', 'margin': '10px'})
         )
     
     # Alerta 3: Anomalias detectadas
-    alertas.append(
-        html.Div([
-            html.H5(f"🔍 Sistema de Detecção Ativo", style={'color': '#3498db'}),
-            html.P(f"Monitoramento contínuo de anomalias em {len(simulator.obter_equipamentos_em_uso())} equipamentos.")
-        ], style={'backgroundColor': '#d6eaf8', 'padding': '15px', 'borderRadius': '5px', 'margin': '10px'})
-    )
+    if anomalias:
+        alertas.append(
+            html.Div([
+                html.H5(f"🔍 {total_anomalias} Anomalias Detectadas", style={'color': '#e67e22'}),
+                html.Ul([
+                    html.Li(f"{equipamento_id}: {variavel} com z-score {z_score:+.1f} (severidade {severidade})")
+                    for equipamento_id, variavel, z_score, severidade in anomalias
+                ])
+            ], style={'backgroundColor': '#fdebd0', 'padding': '15px', 'borderRadius': '5px', 'margin': '10px'})
+        )
+    else:
+        alertas.append(
+            html.Div([
+                html.H5(f"🔍 Sistema de Detecção Ativo", style={'color': '#3498db'}),
+                html.P(f"Monitoramento contínuo de anomalias em {total_em_uso} equipamentos.")
+            ], style={'backgroundColor': '#d6eaf8', 'padding': '15px', 'borderRadius': '5px', 'margin': '10px'})
+        )
     
     if not alertas:
         return html.P("✅ Nenhum alerta no momento. Sistema operando normalmente.", 
@@ -277,12 +455,74 @@ def atualizar_alertas(n):
     
     return html.Div(alertas)
 
+RENDERIZADORES = {
+    'estado': renderizar_estado,
+    'categoria': renderizar_categoria,
+    'manutencao': renderizar_manutencao,
+    'demanda': renderizar_demanda,
+    'alertas': renderizar_alertas,
+}
+
+
+# Callback único: lê o snapshot e só re-renderiza as seções com versão nova
+@instrumentar('dashboard_atualizar')
+def atualizar_dashboard(n, versoes_renderizadas):
+    import dash
+    
+    snapshot = painel.atual
+    versoes_renderizadas = versoes_renderizadas or {}
+    
+    saidas = []
+    for secao in SnapshotDashboard.SECOES:
+        if versoes_renderizadas.get(secao) == snapshot['versoes'][secao]:
+            saidas.append(dash.no_update)
+        else:
+            with cronometro(f'dashboard_renderizar_{secao}'):
+                saidas.append(RENDERIZADORES[secao](snapshot['secoes'][secao]))
+    
+    if all(saida is dash.no_update for saida in saidas):
+        return [dash.no_update] * (len(saidas) + 1)
+    return saidas + [dict(snapshot['versoes'])]
+
+
+def criar_app(**opcoes):
+    """Inicializa o sistema (ver inicializar) e cria o app Dash com layout e callbacks"""
+    global app
+    import dash
+    from dash import Input, Output, State
+    
+    inicializar(**opcoes)
+    
+    app = dash.Dash(__name__)
+    app.title = "SmartStock IoT - Dashboard"
+    # Métricas de desempenho no formato do Prometheus em /metrics
+    registrar_endpoint(app.server)
+    
+    app.layout = criar_layout()
+    app.callback(
+        [Output('grafico-estado', 'figure'),
+         Output('grafico-categoria', 'figure'),
+         Output('tabela-manutencao', 'children'),
+         Output('grafico-demanda', 'figure'),
+         Output('alertas-container', 'children'),
+         Output('versoes-renderizadas', 'data')],
+        Input('interval-component', 'n_intervals'),
+        State('versoes-renderizadas', 'data')
+    )(atualizar_dashboard)
+    
+    return app
+
 
 if __name__ == '__main__':
+    # Log estruturado por amostragem (instrumentacao.LogAmostrado) no console
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    
     print("\n" + "="*60)
     print("🚀 Iniciando Dashboard SmartStock IoT")
     print("="*60)
     print("\n📊 Acesse o dashboard em: http://localhost:8050")
+    print("📈 Métricas de desempenho em: http://localhost:8050/metrics")
     print("\n⚠️  Pressione Ctrl+C para encerrar\n")
     
-    app.run_server(debug=False, host='0.0.0.0', port=8050)
+    app = criar_app()
+    app.run(debug=False, host='0.0.0.0', port=8050)
@@ -0,0 +1,181 @@
+"""
+Motor de Ingestão Assíncrona de Telemetria IoT
+Simula milhares de sensores concorrentes com asyncio, cada um em sua própria taxa,
+publicando em uma fila limitada (com contrapressão) que é consumida em lotes.
+"""
+
+import asyncio
+import inspect
+import random
+import time
+import pandas as pd
+
+from instrumentacao import logger
+
+
+class MotorIngestao:
+    """Ingestão assíncrona: sensores concorrentes -> fila limitada -> consumidores em lote"""
+
+    def __init__(self, simulator, equipamento_ids=None, intervalo_segundos=5.0,
+                 tamanho_fila=10_000, tamanho_lote=500, espera_lote_segundos=0.5,
+                 consumidores=None):
+        self.simulator = simulator
+        if equipamento_ids is None:
+            equipamentos = simulator.equipamentos
+            equipamento_ids = equipamentos.loc[equipamentos['em_uso'] == True, 'id'].tolist()
+        self.equipamento_ids = list(equipamento_ids)
+        self.intervalo_segundos = intervalo_segundos
+        self.tamanho_fila = tamanho_fila
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote_segundos = espera_lote_segundos
+        # Funções que recebem cada lote (DataFrame); podem ser síncronas ou async
+        self.consumidores = list(consumidores or [])
+        self._zerar_estatisticas()
+
+    def _zerar_estatisticas(self):
+        self.leituras_produzidas = 0
+        self.leituras_consumidas = 0
+        self.lotes_entregues = 0
+        self.esperas_fila_cheia = 0
+        self.atraso_total = 0.0
+        self.atraso_maximo = 0.0
+        self.sensores_com_falha = 0
+        self._inicio = None
+        self._fim = None
+        self._fila = None
+
+    def adicionar_consumidor(self, consumidor):
+        """Registra uma função que recebe cada lote de leituras (DataFrame)"""
+        self.consumidores.append(consumidor)
+
+    async def _sensor(self, equipamento_id, fila):
+        """Sensor de um equipamento: gera uma leitura por período, com fase e taxa próprias"""
+        # Cada sensor tem período levemente diferente e começa em um instante aleatório
+        periodo = self.intervalo_segundos * random.uniform(0.8, 1.2)
+        await asyncio.sleep(random.uniform(0, periodo))
+
+        while True:
+            try:
+                leitura = self.simulator.gerar_metricas_uso(equipamento_id)
+            except Exception:
+                # O sensor para; a falha é registrada agora e levantada ao fim de executar()
+                self.sensores_com_falha += 1
+                logger.exception("Sensor de %s falhou", equipamento_id)
+                raise
+            if fila.full():
+                self.esperas_fila_cheia += 1
+            # Contrapressão: com a fila cheia o sensor aguarda até haver espaço
+            await fila.put((time.monotonic(), leitura))
+            self.leituras_produzidas += 1
+            await asyncio.sleep(periodo)
+
+    async def _agrupar(self, fila):
+        """Retira leituras da fila e entrega lotes de até tamanho_lote aos consumidores"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            itens = [await fila.get()]
+            limite = loop.time() + self.espera_lote_segundos
+
+            while len(itens) < self.tamanho_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    itens.append(await asyncio.wait_for(fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._entregar(itens)
+            for _ in itens:
+                fila.task_done()
+
+    async def _entregar(self, itens):
+        """Monta o DataFrame do lote, repassa aos consumidores e registra o atraso"""
+        lote = pd.DataFrame([leitura for _, leitura in itens])
+        loop = asyncio.get_running_loop()
+
+        for consumidor in self.consumidores:
+            if inspect.iscoroutinefunction(consumidor):
+                await consumidor(lote)
+            else:
+                # Consumidores síncronos (pontuação, persistência) rodam fora do loop de eventos
+                await loop.run_in_executor(None, consumidor, lote)
+
+        agora = time.monotonic()
+        for criado_em, _ in itens:
+            atraso = agora - criado_em
+            self.atraso_total += atraso
+            self.atraso_maximo = max(self.atraso_maximo, atraso)
+        self.leituras_consumidas += len(itens)
+        self.lotes_entregues += 1
+
+    async def executar(self, duracao_segundos=60):
+        """Executa os sensores por duracao_segundos e retorna as estatísticas da ingestão"""
+        self._zerar_estatisticas()
+        fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self._fila = fila
+        self._inicio = time.monotonic()
+
+        agrupador = asyncio.create_task(self._agrupar(fila))
+        sensores = [asyncio.create_task(self._sensor(equipamento_id, fila))
+                    for equipamento_id in self.equipamento_ids]
+
+        try:
+            await asyncio.sleep(duracao_segundos)
+        finally:
+            for sensor in sensores:
+                sensor.cancel()
+            resultados = await asyncio.gather(*sensores, return_exceptions=True)
+            falhas_sensores = [resultado for resultado in resultados
+                               if isinstance(resultado, Exception) and not isinstance(resultado, asyncio.CancelledError)]
+
+            # Entrega o que ainda está na fila antes de encerrar (ou até o agrupador falhar)
+            esvaziamento = asyncio.create_task(fila.join())
+            await asyncio.wait({esvaziamento, agrupador}, return_when=asyncio.FIRST_COMPLETED)
+            falha = agrupador.exception() if agrupador.done() and not agrupador.cancelled() else None
+            esvaziamento.cancel()
+            agrupador.cancel()
+            await asyncio.gather(esvaziamento, agrupador, return_exceptions=True)
+            self._fim = time.monotonic()
+
+        if falha is not None:
+            raise falha
+        if falhas_sensores:
+            raise falhas_sensores[0]
+
+        return self.estatisticas()
+
+    def estatisticas(self):
+        """Vazão e atraso da ingestão até o momento"""
+        fim = self._fim if self._fim is not None else time.monotonic()
+        duracao = (fim - self._inicio) if self._inicio is not None else 0.0
+
+        return {
+            'sensores': len(self.equipamento_ids),
+            'leituras_produzidas': self.leituras_produzidas,
+            'leituras_consumidas': self.leituras_consumidas,
+            'lotes_entregues': self.lotes_entregues,
+            'vazao_leituras_s': round(self.leituras_consumidas / duracao, 1) if duracao else 0.0,
+            'atraso_medio_ms': round(1000 * self.atraso_total / self.leituras_consumidas, 2)
+                               if self.leituras_consumidas else 0.0,
+            'atraso_maximo_ms': round(1000 * self.atraso_maximo, 2),
+            'tamanho_fila': self._fila.qsize() if self._fila is not None else 0,
+            'esperas_fila_cheia': self.esperas_fila_cheia,
+            'sensores_com_falha': self.sensores_com_falha,
+        }
+
+
+if __name__ == "__main__":
+    # Teste do motor de ingestão
+    from iot_simulator import IoTSensorSimulator
+
+    print("=== Teste do Motor de Ingestão Assíncrona ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=5_000)
+    motor = MotorIngestao(simulator, intervalo_segundos=1.0, tamanho_lote=1_000)
+    motor.adicionar_consumidor(lambda lote: None)
+
+    estatisticas = asyncio.run(motor.executar(duracao_segundos=10))
+    for chave, valor in estatisticas.items():
+        print(f"  {chave}: {valor}")
@@ -0,0 +1,254 @@
+"""
+Instrumentação do SmartStock IoT
+Contadores, medidores e histogramas leves e seguros entre threads, exportados no
+formato texto do Prometheus, e log estruturado por amostragem para os caminhos quentes.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('smartstock')
+
+# Limites (segundos) dos baldes dos histogramas de duração
+BALDES_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escapar(texto, aspas=True):
+    """Escapa barra invertida, quebra de linha e (em valores de rótulo) aspas, como pede o formato"""
+    texto = str(texto).replace('\\', '\\\\').replace('\n', '\\n')
+    return texto.replace('"', '\\"') if aspas else texto
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = list(zip(nomes, valores)) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._trava = threading.Lock()
+
+    def _chave(self, rotulos):
+        return tuple(rotulos.get(nome, '') for nome in self.rotulos)
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {_escapar(self.descricao, aspas=False)}', f'# TYPE {self.nome} {self.tipo}']
+        with self._trava:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.extend(self._linhas(chave, valor))
+        return linhas
+
+    def _linhas(self, chave, valor):
+        return [f'{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}']
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (chamadas, erros, leituras processadas)"""
+
+    tipo = 'counter'
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._trava:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos):
+        return self._valores.get(self._chave(rotulos), 0)
+
+
+class Medidor(_Metrica):
+    """Valor instantâneo (tamanho de fila, equipamentos em uso)"""
+
+    tipo = 'gauge'
+
+    def definir(self, valor, **rotulos):
+        with self._trava:
+            self._valores[self._chave(rotulos)] = valor
+
+    def valor(self, **rotulos):
+        return self._valores.get(self._chave(rotulos), 0)
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores em baldes cumulativos, com soma e contagem"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, rotulos=(), baldes=BALDES_PADRAO):
+        super().__init__(nome, descricao, rotulos)
+        self.baldes = tuple(sorted(baldes))
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        indice = bisect.bisect_left(self.baldes, valor)
+        with self._trava:
+            estado = self._valores.get(chave)
+            if estado is None:
+                estado = self._valores[chave] = [[0] * (len(self.baldes) + 1), 0.0, 0]
+            estado[0][indice] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def resumo(self, **rotulos):
+        """Contagem, soma e média das observações de uma série"""
+        estado = self._valores.get(self._chave(rotulos))
+        if estado is None:
+            return {'contagem': 0, 'soma': 0.0, 'media': 0.0}
+        _, soma, contagem = estado
+        return {'contagem': contagem, 'soma': soma, 'media': soma / contagem}
+
+    def _linhas(self, chave, valor):
+        contagens, soma, total = valor
+        linhas = []
+        acumulado = 0
+        for limite, quantidade in zip(self.baldes + (float('inf'),), contagens):
+            acumulado += quantidade
+            le = '+Inf' if limite == float('inf') else f'{limite:g}'
+            linhas.append(f'{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, ("le", le))} {acumulado}')
+        rotulos = _formatar_rotulos(self.rotulos, chave)
+        linhas.append(f'{self.nome}_sum{rotulos} {soma}')
+        linhas.append(f'{self.nome}_count{rotulos} {total}')
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas do processo, com exportação no formato do Prometheus"""
+
+    def __init__(self, prefixo='smartstock'):
+        self.prefixo = prefixo
+        self._metricas = {}
+        self._trava = threading.Lock()
+
+    def _obter(self, classe, nome, descricao, rotulos, **opcoes):
+        nome = f'{self.prefixo}_{nome}' if self.prefixo else nome
+        with self._trava:
+            metrica = self._metricas.get(nome)
+            if metrica is None:
+                metrica = self._metricas[nome] = classe(nome, descricao, rotulos, **opcoes)
+            elif not isinstance(metrica, classe):
+                raise ValueError(f"Métrica {nome} já registrada como {metrica.tipo}")
+        return metrica
+
+    def contador(self, nome, descricao, rotulos=()):
+        return self._obter(Contador, nome, descricao, rotulos)
+
+    def medidor(self, nome, descricao, rotulos=()):
+        return self._obter(Medidor, nome, descricao, rotulos)
+
+    def histograma(self, nome, descricao, rotulos=(), baldes=BALDES_PADRAO):
+        return self._obter(Histograma, nome, descricao, rotulos, baldes=baldes)
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        with self._trava:
+            metricas = list(self._metricas.values())
+        linhas = []
+        for metrica in metricas:
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro global e métricas das operações instrumentadas
+metricas = RegistroMetricas()
+DURACAO = metricas.histograma('operacao_duracao_segundos', 'Duração das operações instrumentadas', ('operacao',))
+CHAMADAS = metricas.contador('operacao_chamadas_total', 'Chamadas das operações instrumentadas', ('operacao',))
+ERROS = metricas.contador('operacao_erros_total', 'Chamadas que terminaram em exceção', ('operacao',))
+ITENS = metricas.contador('operacao_itens_total', 'Linhas/leituras produzidas ou processadas', ('operacao',))
+
+
+@contextmanager
+def cronometro(operacao):
+    """Mede a duração do bloco e registra chamadas e erros da operação"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        ERROS.incrementar(operacao=operacao)
+        raise
+    finally:
+        DURACAO.observar(time.perf_counter() - inicio, operacao=operacao)
+        CHAMADAS.incrementar(operacao=operacao)
+
+
+def instrumentar(operacao, contar_itens=False):
+    """Decorador: cronometra a função; com contar_itens, soma len(resultado) em ITENS"""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with cronometro(operacao):
+                resultado = funcao(*args, **kwargs)
+            if contar_itens and resultado is not None:
+                ITENS.incrementar(len(resultado), operacao=operacao)
+            return resultado
+        return envoltorio
+    return decorador
+
+
+def registrar_endpoint(server, caminho='/metrics', registro=None):
+    """Expõe as métricas em texto do Prometheus no servidor Flask (ex: app.server do Dash)"""
+    from flask import Response
+
+    registro = registro or metricas
+
+    def exportar_metricas():
+        return Response(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    server.add_url_rule(caminho, 'metricas_prometheus', exportar_metricas)
+    return server
+
+
+class LogAmostrado:
+    """Log estruturado (JSON) que registra só 1 a cada N ocorrências de cada evento
+
+    Cada linha traz o total de ocorrências do evento até ali, de modo que a taxa
+    real continua visível mesmo com a maioria das ocorrências descartada.
+    """
+
+    def __init__(self, logger=logger, a_cada=100, nivel=logging.INFO):
+        self.logger = logger
+        self.a_cada = max(1, int(a_cada))
+        self.nivel = nivel
+        self._ocorrencias = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, evento, **campos):
+        with self._trava:
+            ocorrencias = self._ocorrencias.get(evento, 0) + 1
+            self._ocorrencias[evento] = ocorrencias
+        # A primeira ocorrência sempre é registrada; depois, 1 a cada a_cada
+        if (ocorrencias - 1) % self.a_cada == 0 and self.logger.isEnabledFor(self.nivel):
+            self.logger.log(self.nivel, json.dumps({'evento': evento, 'ocorrencias': ocorrencias, **campos},
+                                                   ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    # Teste da instrumentação
+    print("=== Teste da Instrumentação ===\n")
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    log = LogAmostrado(a_cada=250)
+
+    @instrumentar('exemplo_soma', contar_itens=True)
+    def somar_lote(tamanho):
+        return list(range(tamanho))
+
+    for i in range(1_000):
+        somar_lote(i)
+        log.registrar('lote_somado', tamanho=i)
+
+    print()
+    print(metricas.exportar())
@@ -3,120 +3,157 @@ Simulador de Sensores IoT para Gestão de Estoque
 Simula sensores RFID, temperatura, uso de equipamentos, etc.
 """
 
-import random
+import asyncio
+import threading
 import time
 import json
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 
+from contadores_estoque import ContadoresEstoque
+from ingestao import MotorIngestao
+from instrumentacao import LogAmostrado, instrumentar
+from registro_equipamentos import ESTADOS, RegistroEquipamentos, categorizar
+
+# Faixas de valores por estado, na mesma ordem de ESTADOS: (mínimo, máximo)
+FAIXA_TEMPERATURA = (np.array([35.0, 35.0, 40.0, 50.0]), np.array([40.0, 40.0, 50.0, 60.0]))
+FAIXA_CPU = (np.array([10.0, 10.0, 40.0, 70.0]), np.array([40.0, 40.0, 70.0, 100.0]))
+FAIXA_RAM = (np.array([20.0, 20.0, 50.0, 80.0]), np.array([50.0, 50.0, 80.0, 100.0]))
+# Falhas acumuladas no início da observação: limites inclusivos, como em random.randint
+FAIXA_FALHAS = (np.array([0, 0, 1, 5]), np.array([1, 1, 5, 15]))
+# Falhas novas por hora de operação em cada estado (processo de Poisson): num_falhas
+# é um contador que só cresce, mais depressa nos equipamentos degradados
+TAXA_FALHAS_HORA = np.array([0.001, 0.002, 0.01, 0.04])
+# Colunas das movimentações geradas (mantidas mesmo quando não há nenhuma)
+COLUNAS_MOVIMENTACOES = ['equipamento_id', 'categoria', 'timestamp', 'tipo', 'quantidade', 'localizacao_destino']
+
+# Log por amostragem dos lotes publicados na simulação em tempo real
+log_publicacao = LogAmostrado(a_cada=20)
+
+
 class IoTSensorSimulator:
     """Simula sensores IoT para monitoramento de estoque de equipamentos de TI"""
     
-    def __init__(self, num_equipamentos=50):
+    def __init__(self, num_equipamentos=50, rng=None, banco=None):
         self.num_equipamentos = num_equipamentos
-        self.equipamentos = self._gerar_equipamentos()
+        self.rng = rng if rng is not None else np.random.default_rng()
+        # Banco de estoque opcional (banco_estoque.BancoEstoque) usado como fonte durável
+        self.banco = banco
+        if banco is not None and banco.contar_equipamentos() > 0:
+            self.equipamentos = categorizar(banco.para_dataframe())
+            self.num_equipamentos = len(self.equipamentos)
+        else:
+            self.equipamentos = self._gerar_equipamentos()
+            if banco is not None:
+                banco.carregar_equipamentos(self.equipamentos)
+        self._indexar_equipamentos()
+        self.contadores = ContadoresEstoque.de_dataframe(self.equipamentos)
         self.historico_metricas = []
+        # Contador de falhas de cada equipamento nas leituras ao vivo (posição em self.equipamentos)
+        self._trava_falhas = threading.Lock()
+        codigos = self._codigos_estado(self.equipamentos)
+        self._falhas = self.rng.integers(FAIXA_FALHAS[0][codigos], FAIXA_FALHAS[1][codigos] + 1)
+        self._falhas_lidas_em = np.full(len(self.equipamentos), time.time())
         
+    @instrumentar('simulador_gerar_equipamentos', contar_itens=True)
     def _gerar_equipamentos(self):
         """Gera lista de equipamentos com características iniciais"""
-        categorias = ['Notebook', 'Desktop', 'Monitor', 'Servidor', 'Switch', 'Roteador']
-        fabricantes = ['Dell', 'HP', 'Lenovo', 'Cisco', 'Apple']
-        localizacoes = ['Almoxarifado A', 'Almoxarifado B', 'Em Uso - TI', 'Em Uso - Vendas', 'Manutenção']
-        estados = ['Novo', 'Bom', 'Atenção', 'Crítico']
-        
-        equipamentos = []
-        for i in range(self.num_equipamentos):
-            # Idade do equipamento em meses (0 a 60 meses)
-            idade_meses = random.randint(0, 60)
-            
-            # Estado baseado na idade
-            if idade_meses < 6:
-                estado = 'Novo'
-            elif idade_meses < 24:
-                estado = 'Bom'
-            elif idade_meses < 48:
-                estado = 'Atenção'
-            else:
-                estado = 'Crítico'
-            
-            equip = {
-                'id': f'EQ{i+1:04d}',
-                'rfid': f'RFID{random.randint(10000, 99999)}',
-                'categoria': random.choice(categorias),
-                'fabricante': random.choice(fabricantes),
-                'modelo': f'Model-{random.randint(1000, 9999)}',
-                'localizacao': random.choice(localizacoes),
-                'estado': estado,
-                'idade_meses': idade_meses,
-                'data_aquisicao': (datetime.now() - timedelta(days=idade_meses*30)).strftime('%Y-%m-%d'),
-                'valor_aquisicao': random.randint(1000, 10000),
-                'em_uso': random.choice([True, False])
-            }
-            equipamentos.append(equip)
-        
-        return pd.DataFrame(equipamentos)
+        # Sorteio vetorizado no registro compacto; as colunas codificadas seguem como category
+        registro = RegistroEquipamentos.gerar(self.num_equipamentos, self.rng)
+        return registro.para_dataframe()
+    
+    def _atribuir(self, posicao, coluna, valor):
+        """Altera uma célula do cadastro, incluindo o valor nas categorias da coluna se preciso"""
+        serie = self.equipamentos[coluna]
+        if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+            self.equipamentos[coluna] = serie.cat.add_categories([valor])
+        self.equipamentos.iat[posicao, self.equipamentos.columns.get_loc(coluna)] = valor
+    
+    def _indexar_equipamentos(self):
+        """Monta o índice id -> posição da linha em self.equipamentos
+        
+        As posições não mudam quando localização ou estado são alterados, então o
+        índice só precisa ser refeito se linhas forem incluídas ou removidas.
+        """
+        self._posicoes = {
+            equipamento_id: posicao
+            for posicao, equipamento_id in enumerate(self.equipamentos['id'])
+        }
+    
+    def _posicao(self, equipamento_id):
+        """Retorna a posição da linha do equipamento em O(1)"""
+        try:
+            return self._posicoes[equipamento_id]
+        except KeyError:
+            raise KeyError(f"Equipamento não encontrado: {equipamento_id}") from None
+    
+    @staticmethod
+    def _codigos_estado(equipamentos):
+        """Códigos de estado (posição em ESTADOS); estados desconhecidos usam o último"""
+        codigos = pd.Categorical(equipamentos['estado'], categories=ESTADOS).codes
+        return np.where(codigos >= 0, codigos, len(ESTADOS) - 1)
+    
+    def falhas_atuais(self, equipamento_ids, rng=None):
+        """Falhas acumuladas de cada equipamento agora
+        
+        O contador de cada equipamento avança pelas falhas sorteadas no tempo decorrido
+        desde a sua leitura anterior, à taxa do estado atual; nunca diminui.
+        """
+        rng = rng if rng is not None else self.rng
+        posicoes = np.fromiter((self._posicao(equipamento_id) for equipamento_id in equipamento_ids), dtype=np.int64)
+        codigos = self._codigos_estado(self.equipamentos.iloc[posicoes])
+        with self._trava_falhas:
+            agora = time.time()
+            horas = (agora - self._falhas_lidas_em[posicoes]) / 3600
+            self._falhas[posicoes] += rng.poisson(TAXA_FALHAS_HORA[codigos] * horas)
+            self._falhas_lidas_em[posicoes] = agora
+            return self._falhas[posicoes].copy()
+    
+    def obter_equipamento(self, equipamento_id):
+        """Retorna a linha de cadastro de um equipamento"""
+        return self.equipamentos.iloc[self._posicao(equipamento_id)]
     
+    @instrumentar('simulador_gerar_metricas_uso')
     def gerar_metricas_uso(self, equipamento_id):
         """Gera métricas de uso para um equipamento específico"""
-        equip = self.equipamentos[self.equipamentos['id'] == equipamento_id].iloc[0]
-        
-        # Métricas variam baseadas no estado do equipamento
-        estado = equip['estado']
-        idade = equip['idade_meses']
-        
-        # Temperatura (°C) - aumenta com idade e estado crítico
-        temp_base = 35
-        if estado == 'Crítico':
-            temperatura = temp_base + random.uniform(15, 25)
-        elif estado == 'Atenção':
-            temperatura = temp_base + random.uniform(5, 15)
-        else:
-            temperatura = temp_base + random.uniform(0, 5)
+        # Lê só os campos necessários, sem montar a linha inteira
+        posicao = self._posicao(equipamento_id)
         
-        # Uso de CPU (%) - aumenta com degradação
-        if estado == 'Crítico':
-            cpu_uso = random.uniform(70, 100)
-        elif estado == 'Atenção':
-            cpu_uso = random.uniform(40, 70)
-        else:
-            cpu_uso = random.uniform(10, 40)
+        # Métricas variam baseadas no estado do equipamento (mesmas faixas de gerar_metricas_lote)
+        estado = self.equipamentos['estado'].iat[posicao]
+        idade = self.equipamentos['idade_meses'].iat[posicao]
+        categoria = self.equipamentos['categoria'].iat[posicao]
+        codigo = ESTADOS.index(estado) if estado in ESTADOS else len(ESTADOS) - 1
         
-        # Uso de RAM (%)
-        if estado == 'Crítico':
-            ram_uso = random.uniform(80, 100)
-        elif estado == 'Atenção':
-            ram_uso = random.uniform(50, 80)
-        else:
-            ram_uso = random.uniform(20, 50)
+        # Temperatura (°C), uso de CPU e de RAM (%) - aumentam com a degradação
+        temperatura = self.rng.uniform(FAIXA_TEMPERATURA[0][codigo], FAIXA_TEMPERATURA[1][codigo])
+        cpu_uso = self.rng.uniform(FAIXA_CPU[0][codigo], FAIXA_CPU[1][codigo])
+        ram_uso = self.rng.uniform(FAIXA_RAM[0][codigo], FAIXA_RAM[1][codigo])
         
         # Uso de Disco (%)
-        disco_uso = min(100, idade * 1.5 + random.uniform(0, 20))
+        disco_uso = min(100, idade * 1.5 + self.rng.uniform(0, 20))
         
         # Saúde da Bateria (%) - degrada com idade
-        if equip['categoria'] in ['Notebook']:
-            bateria_saude = max(0, 100 - (idade * 1.5) + random.uniform(-10, 10))
+        if categoria in ['Notebook']:
+            bateria_saude = max(0, 100 - (idade * 1.5) + self.rng.uniform(-10, 10))
         else:
             bateria_saude = None
         
-        # Número de falhas acumuladas
-        if estado == 'Crítico':
-            num_falhas = random.randint(5, 15)
-        elif estado == 'Atenção':
-            num_falhas = random.randint(1, 5)
-        else:
-            num_falhas = random.randint(0, 1)
+        # Número de falhas acumuladas (contador do equipamento, só cresce)
+        num_falhas = int(self.falhas_atuais([equipamento_id])[0])
         
         metricas = {
             'equipamento_id': equipamento_id,
-            'timestamp': datetime.now().isoformat(),
-            'temperatura_c': round(temperatura, 2),
-            'cpu_uso_percent': round(cpu_uso, 2),
-            'ram_uso_percent': round(ram_uso, 2),
-            'disco_uso_percent': round(disco_uso, 2),
-            'bateria_saude_percent': round(bateria_saude, 2) if bateria_saude else None,
+            'timestamp': datetime.now().isoformat(timespec='microseconds'),
+            'temperatura_c': round(float(temperatura), 2),
+            'cpu_uso_percent': round(float(cpu_uso), 2),
+            'ram_uso_percent': round(float(ram_uso), 2),
+            'disco_uso_percent': round(float(disco_uso), 2),
+            'bateria_saude_percent': round(float(bateria_saude), 2) if bateria_saude else None,
             'num_falhas': num_falhas,
-            'estado': estado
+            'estado': estado,
+            'idade_meses': int(idade)
         }
         
         return metricas
@@ -124,90 +161,209 @@ class IoTSensorSimulator:
     def gerar_sensor_temperatura_ambiente(self, localizacao):
         """Gera leitura de sensor de temperatura do ambiente de armazenamento"""
         # Temperatura ideal: 18-24°C, Umidade ideal: 40-60%
-        temperatura = random.uniform(18, 26)
-        umidade = random.uniform(35, 65)
+        temperatura = self.rng.uniform(18, 26)
+        umidade = self.rng.uniform(35, 65)
         
         return {
             'localizacao': localizacao,
-            'timestamp': datetime.now().isoformat(),
-            'temperatura_c': round(temperatura, 2),
-            'umidade_percent': round(umidade, 2)
+            'timestamp': datetime.now().isoformat(timespec='microseconds'),
+            'temperatura_c': round(float(temperatura), 2),
+            'umidade_percent': round(float(umidade), 2)
         }
     
+    @instrumentar('simulador_movimentacao')
     def simular_movimentacao(self, equipamento_id, nova_localizacao):
         """Simula movimentação de equipamento (entrada/saída de estoque)"""
-        idx = self.equipamentos[self.equipamentos['id'] == equipamento_id].index[0]
-        localizacao_anterior = self.equipamentos.at[idx, 'localizacao']
-        self.equipamentos.at[idx, 'localizacao'] = nova_localizacao
+        posicao = self._posicao(equipamento_id)
+        coluna = self.equipamentos.columns.get_loc('localizacao')
+        categoria = self.equipamentos.iat[posicao, self.equipamentos.columns.get_loc('categoria')]
         
-        movimentacao = {
-            'equipamento_id': equipamento_id,
-            'timestamp': datetime.now().isoformat(),
-            'tipo': 'SAIDA' if 'Em Uso' in nova_localizacao else 'ENTRADA',
-            'localizacao_origem': localizacao_anterior,
-            'localizacao_destino': nova_localizacao
-        }
+        if self.banco is not None:
+            # Persiste a mudança e a movimentação em uma transação antes de refletir no DataFrame
+            movimentacao = self.banco.mover(equipamento_id, nova_localizacao)
+        
+        # Cadastro e contadores mudam juntos: uma recontagem nunca vê um sem o outro
+        with self.contadores.trava:
+            if self.banco is None:
+                movimentacao = {
+                    'equipamento_id': equipamento_id,
+                    'timestamp': datetime.now().isoformat(timespec='microseconds'),
+                    'tipo': 'SAIDA' if 'Em Uso' in nova_localizacao else 'ENTRADA',
+                    'localizacao_origem': self.equipamentos.iat[posicao, coluna],
+                    'localizacao_destino': nova_localizacao
+                }
+            self._atribuir(posicao, 'localizacao', nova_localizacao)
+            self.contadores.registrar_movimentacao(categoria, movimentacao['localizacao_origem'], nova_localizacao)
         
         return movimentacao
     
-    def gerar_dados_historicos(self, dias=90, intervalo_horas=6):
-        """Gera dados históricos para treinamento de modelos de IA"""
-        print(f"Gerando dados históricos de {dias} dias...")
+    def atualizar_estado(self, equipamento_id, novo_estado):
+        """Altera o estado de um equipamento e retorna o estado anterior"""
+        posicao = self._posicao(equipamento_id)
+        coluna = self.equipamentos.columns.get_loc('estado')
         
-        historico = []
+        if self.banco is not None:
+            self.banco.atualizar_estado(equipamento_id, novo_estado)
+        with self.contadores.trava:
+            estado_anterior = self.equipamentos.iat[posicao, coluna]
+            self._atribuir(posicao, 'estado', novo_estado)
+            self.contadores.registrar_estado(estado_anterior, novo_estado)
+        
+        return estado_anterior
+    
+    def gerar_metricas_lote(self, equipamentos, num_leituras=1, rng=None, intervalo_horas=6, falhas_iniciais=None):
+        """Gera métricas de uso para vários equipamentos e leituras de uma só vez
+        
+        Retorna um dicionário de arrays com formato (num_leituras, len(equipamentos)),
+        com as mesmas distribuições de gerar_metricas_uso. num_falhas parte de
+        falhas_iniciais (sorteadas pelo estado, se None) e, a cada leitura seguinte,
+        soma as falhas sorteadas em intervalo_horas.
+        """
+        rng = rng if rng is not None else self.rng
+        forma = (num_leituras, len(equipamentos))
+        
+        codigos = self._codigos_estado(equipamentos)
+        idade = equipamentos['idade_meses'].to_numpy(dtype=float)
+        eh_notebook = (equipamentos['categoria'] == 'Notebook').to_numpy()
+        
+        temperatura = rng.uniform(FAIXA_TEMPERATURA[0][codigos], FAIXA_TEMPERATURA[1][codigos], forma)
+        cpu_uso = rng.uniform(FAIXA_CPU[0][codigos], FAIXA_CPU[1][codigos], forma)
+        ram_uso = rng.uniform(FAIXA_RAM[0][codigos], FAIXA_RAM[1][codigos], forma)
+        disco_uso = np.minimum(100, idade * 1.5 + rng.uniform(0, 20, forma))
+        if falhas_iniciais is None:
+            falhas_iniciais = rng.integers(FAIXA_FALHAS[0][codigos], FAIXA_FALHAS[1][codigos] + 1)
+        num_falhas = np.broadcast_to(np.asarray(falhas_iniciais, dtype=np.int64), forma).copy()
+        if num_leituras > 1:
+            novas = rng.poisson(TAXA_FALHAS_HORA[codigos] * intervalo_horas, (num_leituras - 1, len(equipamentos)))
+            num_falhas[1:] += np.cumsum(novas, axis=0)
+        
+        # Bateria só existe em notebooks; saúde zerada é tratada como ausente
+        bateria_saude = np.maximum(0, 100 - idade * 1.5 + rng.uniform(-10, 10, forma))
+        bateria_saude = np.where(eh_notebook & (bateria_saude > 0), bateria_saude, np.nan)
+        
+        return {
+            'temperatura_c': np.round(temperatura, 2),
+            'cpu_uso_percent': np.round(cpu_uso, 2),
+            'ram_uso_percent': np.round(ram_uso, 2),
+            'disco_uso_percent': np.round(disco_uso, 2),
+            'bateria_saude_percent': np.round(bateria_saude, 2),
+            'num_falhas': num_falhas,
+        }
+    
+    def _montar_metricas(self, equipamentos, timestamps, metricas):
+        """Monta o DataFrame de métricas (uma linha por instante × equipamento)"""
+        num_leituras = len(timestamps)
+        
+        # Idade de cada equipamento no instante da leitura (meses de 30 dias)
+        meses_atras = (datetime.now() - pd.to_datetime(np.asarray(timestamps), format='ISO8601')).days.to_numpy() / 30
+        idade = equipamentos['idade_meses'].to_numpy(dtype=float)[None, :] - meses_atras[:, None]
+        
+        return pd.DataFrame({
+            'equipamento_id': np.tile(equipamentos['id'].to_numpy(), num_leituras),
+            'timestamp': np.repeat(timestamps, len(equipamentos)),
+            **{coluna: valores.ravel() for coluna, valores in metricas.items()},
+            'estado': np.tile(equipamentos['estado'].to_numpy(), num_leituras),
+            'idade_meses': np.round(np.maximum(0, idade), 1).ravel(),
+        })
+    
+    def gerar_dados_historicos_em_lotes(self, dias=90, intervalo_horas=6, tamanho_lote=100_000, rng=None):
+        """Gera dados históricos em lotes de aproximadamente tamanho_lote registros
+        
+        Cada lote é um DataFrame com instantes consecutivos e as mesmas colunas de
+        gerar_dados_historicos, então a memória usada não depende do horizonte.
+        Com tamanho_lote=None todo o histórico sai em um único lote.
+        """
+        rng = rng if rng is not None else self.rng
         data_inicial = datetime.now() - timedelta(days=dias)
         
         # Gera métricas em intervalos regulares
         num_leituras = int((dias * 24) / intervalo_horas)
         
-        for i in range(num_leituras):
-            timestamp = data_inicial + timedelta(hours=i * intervalo_horas)
-            
-            # Gera métricas para equipamentos em uso
-            for _, equip in self.equipamentos[self.equipamentos['em_uso'] == True].iterrows():
-                metricas = self.gerar_metricas_uso(equip['id'])
-                metricas['timestamp'] = timestamp.isoformat()
-                historico.append(metricas)
+        # Gera métricas para equipamentos em uso
+        em_uso = self.equipamentos[self.equipamentos['em_uso'] == True]
+        if len(em_uso) == 0:
+            return
         
-        df_historico = pd.DataFrame(historico)
+        if tamanho_lote is None:
+            leituras_por_lote = max(1, num_leituras)
+        else:
+            leituras_por_lote = max(1, tamanho_lote // len(em_uso))
+        
+        taxa = TAXA_FALHAS_HORA[self._codigos_estado(em_uso)] * intervalo_horas
+        falhas = None
+        for inicio in range(0, num_leituras, leituras_por_lote):
+            fim = min(inicio + leituras_por_lote, num_leituras)
+            timestamps = [
+                (data_inicial + timedelta(hours=i * intervalo_horas)).isoformat(timespec='microseconds')
+                for i in range(inicio, fim)
+            ]
+            metricas = self.gerar_metricas_lote(em_uso, fim - inicio, rng, intervalo_horas, falhas)
+            # O lote seguinte continua o contador de falhas de cada equipamento
+            falhas = metricas['num_falhas'][-1] + rng.poisson(taxa)
+            yield self._montar_metricas(em_uso, timestamps, metricas)
+    
+    @instrumentar('simulador_gerar_dados_historicos', contar_itens=True)
+    def gerar_dados_historicos(self, dias=90, intervalo_horas=6, rng=None):
+        """Gera dados históricos para treinamento de modelos de IA
+        
+        Todas as leituras (instante × equipamento em uso) são sorteadas de uma vez
+        em arrays NumPy. Passe um numpy.random.Generator com semente para obter
+        resultados reprodutíveis.
+        """
+        print(f"Gerando dados históricos de {dias} dias...")
+        
+        lotes = list(self.gerar_dados_historicos_em_lotes(dias, intervalo_horas, tamanho_lote=None, rng=rng))
+        df_historico = lotes[0] if lotes else pd.DataFrame()
         print(f"✓ Gerados {len(df_historico)} registros históricos")
         
         return df_historico
     
-    def gerar_movimentacoes_historicas(self, dias=90):
-        """Gera histórico de movimentações para análise de demanda"""
-        print(f"Gerando movimentações históricas de {dias} dias...")
+    def gerar_movimentacoes_historicas_em_lotes(self, dias=90, tamanho_lote=10_000, num_movimentacoes=None, rng=None):
+        """Gera movimentações históricas em lotes, já em ordem cronológica
         
-        movimentacoes = []
+        Apenas os instantes sorteados (um float por movimentação) são mantidos em
+        memória; os registros de cada lote são montados sob demanda.
+        """
+        rng = rng if rng is not None else self.rng
         data_inicial = datetime.now() - timedelta(days=dias)
         
         # Simula movimentações aleatórias
-        num_movimentacoes = random.randint(100, 300)
+        if num_movimentacoes is None:
+            num_movimentacoes = int(rng.integers(100, 301))
+        deslocamentos_dias = np.sort(rng.uniform(0, dias, num_movimentacoes))
         
-        for i in range(num_movimentacoes):
-            timestamp = data_inicial + timedelta(days=random.uniform(0, dias))
-            equipamento = self.equipamentos.sample(1).iloc[0]
+        for inicio in range(0, num_movimentacoes, tamanho_lote):
+            deslocamentos = deslocamentos_dias[inicio:inicio + tamanho_lote]
+            n = len(deslocamentos)
+            equipamentos = self.equipamentos.iloc[rng.integers(0, len(self.equipamentos), n)]
             
             # Alterna entre entrada e saída
-            if random.random() > 0.5:
-                tipo = 'SAIDA'
-                destino = random.choice(['Em Uso - TI', 'Em Uso - Vendas', 'Em Uso - RH'])
-            else:
-                tipo = 'ENTRADA'
-                destino = random.choice(['Almoxarifado A', 'Almoxarifado B'])
+            eh_saida = rng.random(n) > 0.5
+            destino = np.where(
+                eh_saida,
+                rng.choice(['Em Uso - TI', 'Em Uso - Vendas', 'Em Uso - RH'], n),
+                rng.choice(['Almoxarifado A', 'Almoxarifado B'], n)
+            )
             
-            mov = {
-                'equipamento_id': equipamento['id'],
-                'categoria': equipamento['categoria'],
-                'timestamp': timestamp.isoformat(),
-                'tipo': tipo,
+            yield pd.DataFrame({
+                'equipamento_id': equipamentos['id'].to_numpy(),
+                'categoria': equipamentos['categoria'].to_numpy(),
+                'timestamp': [
+                    (data_inicial + timedelta(days=float(d))).isoformat(timespec='microseconds')
+                    for d in deslocamentos
+                ],
+                'tipo': np.where(eh_saida, 'SAIDA', 'ENTRADA'),
                 'quantidade': 1,
-                'localizacao_destino': destino
-            }
-            movimentacoes.append(mov)
+                'localizacao_destino': destino,
+            }, index=pd.RangeIndex(inicio, inicio + n))
+    
+    @instrumentar('simulador_gerar_movimentacoes_historicas', contar_itens=True)
+    def gerar_movimentacoes_historicas(self, dias=90, rng=None, num_movimentacoes=None):
+        """Gera histórico de movimentações para análise de demanda"""
+        print(f"Gerando movimentações históricas de {dias} dias...")
         
-        df_movimentacoes = pd.DataFrame(movimentacoes)
-        df_movimentacoes = df_movimentacoes.sort_values('timestamp')
+        lotes = list(self.gerar_movimentacoes_historicas_em_lotes(dias, num_movimentacoes=num_movimentacoes, rng=rng))
+        df_movimentacoes = pd.concat(lotes) if lotes else pd.DataFrame(columns=COLUNAS_MOVIMENTACOES)
         
         print(f"✓ Geradas {len(df_movimentacoes)} movimentações históricas")
         
@@ -215,40 +371,74 @@ class IoTSensorSimulator:
     
     def obter_nivel_estoque_atual(self):
         """Retorna nível de estoque atual por categoria"""
+        if self.banco is not None:
+            return self.banco.obter_nivel_estoque_atual()
+        
         estoque = self.equipamentos[
             self.equipamentos['localizacao'].str.contains('Almoxarifado')
-        ].groupby('categoria').size().reset_index(name='quantidade')
+        ].groupby('categoria', observed=True).size().reset_index(name='quantidade')
         
         return estoque
     
     def obter_equipamentos_em_uso(self):
         """Retorna equipamentos atualmente em uso"""
+        if self.banco is not None:
+            return self.banco.obter_equipamentos_em_uso()
+        
         em_uso = self.equipamentos[
             self.equipamentos['localizacao'].str.contains('Em Uso')
         ]
         return em_uso
     
-    def simular_tempo_real(self, duracao_segundos=60, intervalo_segundos=5):
-        """Simula coleta de dados em tempo real via MQTT"""
-        print(f"Iniciando simulação em tempo real por {duracao_segundos} segundos...")
-        
-        dados_tempo_real = []
+    def simular_tempo_real_em_lotes(self, duracao_segundos=60, intervalo_segundos=5, amostra=5):
+        """Gera, a cada intervalo, um lote com leituras de alguns equipamentos em uso"""
         tempo_inicio = time.time()
+        em_uso = self.equipamentos[self.equipamentos['em_uso'] == True]
         
         while (time.time() - tempo_inicio) < duracao_segundos:
-            # Gera métricas para equipamentos em uso
-            for _, equip in self.equipamentos[self.equipamentos['em_uso'] == True].sample(5).iterrows():
-                metricas = self.gerar_metricas_uso(equip['id'])
-                dados_tempo_real.append(metricas)
-                
-                # Simula publicação MQTT
-                print(f"[MQTT] Publicado: {equip['id']} | Temp: {metricas['temperatura_c']}°C | CPU: {metricas['cpu_uso_percent']}%")
+            equipamentos = em_uso.sample(min(amostra, len(em_uso)), random_state=self.rng)
+            metricas = self.gerar_metricas_lote(equipamentos, falhas_iniciais=self.falhas_atuais(equipamentos['id']))
+            yield self._montar_metricas(equipamentos, [datetime.now().isoformat(timespec='microseconds')], metricas)
             
             time.sleep(intervalo_segundos)
+    
+    async def simular_tempo_real_async(self, duracao_segundos=60, intervalo_segundos=5, amostra=5):
+        """Versão assíncrona de simular_tempo_real, para rodar dentro de um loop de eventos"""
+        print(f"Iniciando simulação em tempo real por {duracao_segundos} segundos...")
         
-        print(f"✓ Simulação concluída. {len(dados_tempo_real)} leituras coletadas.")
-        return pd.DataFrame(dados_tempo_real)
-
+        em_uso = self.equipamentos.loc[self.equipamentos['em_uso'] == True, 'id']
+        if amostra is not None:
+            em_uso = em_uso.sample(min(amostra, len(em_uso)), random_state=self.rng)
+        
+        lotes = []
+        motor = MotorIngestao(self, equipamento_ids=em_uso.tolist(), intervalo_segundos=intervalo_segundos)
+        motor.adicionar_consumidor(lotes.append)
+        # Simula publicação MQTT (registrada por amostragem, não a cada lote)
+        motor.adicionar_consumidor(
+            lambda lote: log_publicacao.registrar('mqtt_lote_publicado', leituras=len(lote))
+        )
+        
+        estatisticas = await motor.executar(duracao_segundos)
+        
+        dados_tempo_real = pd.concat(lotes, ignore_index=True) if lotes else pd.DataFrame()
+        print(f"✓ Simulação concluída. {len(dados_tempo_real)} leituras coletadas "
+              f"({estatisticas['vazao_leituras_s']} leituras/s, atraso médio {estatisticas['atraso_medio_ms']} ms).")
+        return dados_tempo_real
+    
+    def simular_tempo_real(self, duracao_segundos=60, intervalo_segundos=5, amostra=5):
+        """Simula coleta de dados em tempo real via MQTT
+        
+        amostra equipamentos em uso (None = todos) viram sensores assíncronos (ver
+        ingestao.MotorIngestao) publicando a cada ~intervalo_segundos; as leituras
+        chegam em lotes. Fora de um loop de eventos, bloqueia e retorna o DataFrame;
+        com um loop já rodando (ex: Jupyter), retorna uma Task a ser aguardada com await.
+        """
+        corrotina = self.simular_tempo_real_async(duracao_segundos, intervalo_segundos, amostra)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(corrotina)
+        return asyncio.ensure_future(corrotina)
 
 if __name__ == "__main__":
     # Teste do simulador
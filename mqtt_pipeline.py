@@ -0,0 +1,387 @@
+"""
+Pipeline MQTT de Telemetria
+Publica e assina leituras de sensores em lotes, codificadas em um formato binário
+compacto (arrays NumPy de registros de largura fixa) em vez de um JSON por leitura.
+Funciona com um broker MQTT real (paho-mqtt) ou com o BrokerLocal em processo.
+"""
+
+import queue
+import struct
+import threading
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from registro_equipamentos import ESTADOS, LOCALIZACOES, LOCALIZACOES_EXTRAS, formatar_id
+
+TOPICO_METRICAS = 'smartstock/telemetria/metricas'
+TOPICO_AMBIENTE = 'smartstock/telemetria/ambiente'
+
+# Cabeçalho: marcador, versão, tipo do lote, número de leituras, instante de envio (epoch)
+CABECALHO = struct.Struct('<2sBBId')
+MARCADOR = b'SS'
+VERSAO_FORMATO = 2
+TIPO_METRICAS = 1
+TIPO_AMBIENTE = 2
+
+# Um registro de 39 bytes por leitura de gerar_metricas_uso
+DTYPE_METRICAS = np.dtype([
+    ('equipamento', '<u4'),
+    ('timestamp_us', '<i8'),
+    ('temperatura_c', '<f4'),
+    ('cpu_uso_percent', '<f4'),
+    ('ram_uso_percent', '<f4'),
+    ('disco_uso_percent', '<f4'),
+    ('bateria_saude_percent', '<f4'),
+    ('num_falhas', '<u2'),
+    ('estado', 'u1'),
+    ('idade_meses', '<f4'),
+])
+
+# Um registro de 18 bytes por leitura de gerar_sensor_temperatura_ambiente
+DTYPE_AMBIENTE = np.dtype([
+    ('localizacao', '<u2'),
+    ('timestamp_us', '<i8'),
+    ('temperatura_c', '<f4'),
+    ('umidade_percent', '<f4'),
+])
+
+LOCALIZACOES_SENSORES = LOCALIZACOES + LOCALIZACOES_EXTRAS
+
+
+def _para_microssegundos(timestamps):
+    """Converte timestamps ISO em inteiros (microssegundos desde a época)"""
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy().astype('datetime64[us]').astype(np.int64)
+
+
+def _para_iso(microssegundos):
+    """Converte microssegundos desde a época de volta para timestamps ISO"""
+    return np.datetime_as_string(microssegundos.astype('datetime64[us]'), unit='us')
+
+
+def codificar_metricas(leituras):
+    """Codifica um lote de métricas de uso (DataFrame ou lista de dicts) em bytes
+
+    Leituras sem idade_meses são codificadas com idade ausente (NaN).
+    """
+    leituras = pd.DataFrame(leituras)
+    registros = np.empty(len(leituras), dtype=DTYPE_METRICAS)
+
+    codigos = pd.Index(ESTADOS).get_indexer(leituras['estado'])
+    if (codigos < 0).any():
+        raise ValueError("Estado sem código no formato binário")
+
+    registros['equipamento'] = leituras['equipamento_id'].str[2:].astype(np.uint32).to_numpy()
+    registros['timestamp_us'] = _para_microssegundos(leituras['timestamp'])
+    for coluna in ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent',
+                   'disco_uso_percent', 'bateria_saude_percent']:
+        registros[coluna] = leituras[coluna].to_numpy(dtype=float)
+    registros['num_falhas'] = leituras['num_falhas'].to_numpy()
+    registros['estado'] = codigos
+    registros['idade_meses'] = leituras['idade_meses'].to_numpy(dtype=float) if 'idade_meses' in leituras else np.nan
+
+    return CABECALHO.pack(MARCADOR, VERSAO_FORMATO, TIPO_METRICAS, len(registros), time.time()) + registros.tobytes()
+
+
+def codificar_ambiente(leituras):
+    """Codifica um lote de leituras de temperatura/umidade ambiente em bytes"""
+    leituras = pd.DataFrame(leituras)
+    registros = np.empty(len(leituras), dtype=DTYPE_AMBIENTE)
+
+    codigos = pd.Index(LOCALIZACOES_SENSORES).get_indexer(leituras['localizacao'])
+    if (codigos < 0).any():
+        raise ValueError("Localização sem código no formato binário")
+    registros['localizacao'] = codigos
+    registros['timestamp_us'] = _para_microssegundos(leituras['timestamp'])
+    registros['temperatura_c'] = leituras['temperatura_c'].to_numpy(dtype=float)
+    registros['umidade_percent'] = leituras['umidade_percent'].to_numpy(dtype=float)
+
+    return CABECALHO.pack(MARCADOR, VERSAO_FORMATO, TIPO_AMBIENTE, len(registros), time.time()) + registros.tobytes()
+
+
+def ler_cabecalho(payload):
+    """Retorna (tipo, num_leituras, enviado_em) de um payload"""
+    marcador, versao, tipo, num_leituras, enviado_em = CABECALHO.unpack_from(payload)
+    if marcador != MARCADOR or versao != VERSAO_FORMATO:
+        raise ValueError(f"Payload em formato desconhecido (marcador {marcador!r}, versão {versao})")
+    return tipo, num_leituras, enviado_em
+
+
+def decodificar(payload):
+    """Decodifica um payload em (tipo, enviado_em, DataFrame) no esquema original das leituras"""
+    tipo, num_leituras, enviado_em = ler_cabecalho(payload)
+    dtype = DTYPE_METRICAS if tipo == TIPO_METRICAS else DTYPE_AMBIENTE
+    registros = np.frombuffer(payload, dtype=dtype, count=num_leituras, offset=CABECALHO.size)
+
+    if tipo == TIPO_METRICAS:
+        leituras = pd.DataFrame({
+            'equipamento_id': [formatar_id(numero) for numero in registros['equipamento']],
+            'timestamp': _para_iso(registros['timestamp_us']),
+            **{coluna: np.round(registros[coluna].astype(float), 2)
+               for coluna in ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent',
+                              'disco_uso_percent', 'bateria_saude_percent']},
+            'num_falhas': registros['num_falhas'].astype(np.int64),
+            'estado': np.array(ESTADOS, dtype=object)[registros['estado']],
+            'idade_meses': np.round(registros['idade_meses'].astype(float), 1),
+        })
+    else:
+        leituras = pd.DataFrame({
+            'localizacao': np.array(LOCALIZACOES_SENSORES, dtype=object)[registros['localizacao']],
+            'timestamp': _para_iso(registros['timestamp_us']),
+            'temperatura_c': np.round(registros['temperatura_c'].astype(float), 2),
+            'umidade_percent': np.round(registros['umidade_percent'].astype(float), 2),
+        })
+
+    return tipo, enviado_em, leituras
+
+
+def _topico_corresponde(filtro, topico):
+    """Verifica se um tópico corresponde a um filtro MQTT (com curingas + e #)"""
+    partes_filtro = filtro.split('/')
+    partes_topico = topico.split('/')
+    for i, parte in enumerate(partes_filtro):
+        if parte == '#':
+            return True
+        if i >= len(partes_topico) or (parte != '+' and parte != partes_topico[i]):
+            return False
+    return len(partes_filtro) == len(partes_topico)
+
+
+class BrokerLocal:
+    """Broker em processo com a mesma interface do ClienteMQTTPaho
+
+    As mensagens são entregues por uma thread própria, como faria a rede, e
+    mensagens com QoS >= 1 são confirmadas (ao_confirmar) após a entrega.
+    """
+
+    def __init__(self):
+        self._assinaturas = []
+        self._fila = queue.Queue()
+        self._proximo_mid = 0
+        self._trava = threading.Lock()
+        self.ao_confirmar = None
+        self._thread = threading.Thread(target=self._entregar, daemon=True)
+        self._thread.start()
+
+    def publicar(self, topico, payload, qos=0):
+        """Enfileira uma mensagem e retorna seu identificador (mid)"""
+        with self._trava:
+            self._proximo_mid += 1
+            mid = self._proximo_mid
+        self._fila.put((mid, topico, payload, qos))
+        return mid
+
+    def assinar(self, topico, callback):
+        """Registra callback(payload) para mensagens que correspondem ao tópico"""
+        self._assinaturas.append((topico, callback))
+
+    def aguardar_entrega(self):
+        """Bloqueia até todas as mensagens enfileiradas serem entregues"""
+        self._fila.join()
+
+    def _entregar(self):
+        while True:
+            mid, topico, payload, qos = self._fila.get()
+            try:
+                for filtro, callback in self._assinaturas:
+                    if _topico_corresponde(filtro, topico):
+                        callback(payload)
+                if qos > 0 and self.ao_confirmar is not None:
+                    self.ao_confirmar(mid)
+            finally:
+                self._fila.task_done()
+
+    def desconectar(self):
+        """Sem efeito no broker local; existe para manter a interface do cliente"""
+
+
+class ClienteMQTTPaho:
+    """Adaptador do paho-mqtt para a interface publicar/assinar usada no pipeline"""
+
+    def __init__(self, host='localhost', porta=1883, client_id=''):
+        import paho.mqtt.client as mqtt
+
+        self._mqtt = mqtt
+        if hasattr(mqtt, 'CallbackAPIVersion'):
+            self._cliente = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        else:
+            self._cliente = mqtt.Client(client_id=client_id)
+        self._assinaturas = []
+        self.ao_confirmar = None
+        self._cliente.on_message = self._ao_receber
+        self._cliente.on_publish = self._ao_publicar
+        self._cliente.connect(host, porta)
+        self._cliente.loop_start()
+
+    def publicar(self, topico, payload, qos=0):
+        """Publica a mensagem; retorna o mid, ou None se o cliente não a aceitou"""
+        info = self._cliente.publish(topico, payload, qos=qos)
+        return info.mid if info.rc == self._mqtt.MQTT_ERR_SUCCESS else None
+
+    def assinar(self, topico, callback):
+        self._assinaturas.append((topico, callback))
+        self._cliente.subscribe(topico, qos=1)
+
+    def _ao_receber(self, cliente, userdata, mensagem):
+        for filtro, callback in self._assinaturas:
+            if _topico_corresponde(filtro, mensagem.topic):
+                callback(mensagem.payload)
+
+    def _ao_publicar(self, cliente, userdata, mid, *args):
+        if self.ao_confirmar is not None:
+            self.ao_confirmar(mid)
+
+    def desconectar(self):
+        self._cliente.loop_stop()
+        self._cliente.disconnect()
+
+
+class PublicadorTelemetria:
+    """Acumula leituras e publica lotes binários, com buffer de acordo com o QoS
+
+    QoS 0: lotes recusados pelo cliente são descartados (e contados).
+    QoS 1/2: lotes recusados ficam em um buffer limitado (max_pendentes) e são
+    reenviados no próximo envio; lotes enviados ficam em trânsito até a confirmação.
+    """
+
+    def __init__(self, cliente, topico=TOPICO_METRICAS, tamanho_lote=1_000, qos=0,
+                 max_pendentes=100, codificador=codificar_metricas):
+        self.cliente = cliente
+        self.topico = topico
+        self.tamanho_lote = tamanho_lote
+        self.qos = qos
+        self.codificador = codificador
+        self.cliente.ao_confirmar = self.confirmar
+
+        self._buffer = []
+        self._linhas_buffer = 0
+        self._pendentes = deque()
+        self.max_pendentes = max_pendentes
+        self._em_transito = {}
+        # Reentrante: o cliente pode chamar confirmar() de dentro de publicar()
+        self._trava = threading.RLock()
+
+        self.lotes_publicados = 0
+        self.leituras_publicadas = 0
+        self.leituras_descartadas = 0
+        self.bytes_publicados = 0
+
+    def publicar(self, leituras):
+        """Adiciona leituras (DataFrame, dict ou lista de dicts) e publica lotes cheios"""
+        if isinstance(leituras, dict):
+            leituras = [leituras]
+        leituras = pd.DataFrame(leituras)
+        with self._trava:
+            self._buffer.append(leituras)
+            self._linhas_buffer += len(leituras)
+            cheio = self._linhas_buffer >= self.tamanho_lote
+
+        if cheio:
+            self.descarregar()
+
+    def descarregar(self):
+        """Publica tudo o que está no buffer, em lotes de até tamanho_lote leituras"""
+        self._reenviar_pendentes()
+        with self._trava:
+            buffer, self._buffer = self._buffer, []
+            self._linhas_buffer = 0
+        if not buffer:
+            return
+
+        leituras = pd.concat(buffer, ignore_index=True)
+        for inicio in range(0, len(leituras), self.tamanho_lote):
+            self._enviar(self.codificador(leituras.iloc[inicio:inicio + self.tamanho_lote]))
+
+    def _enviar(self, payload):
+        _, num_leituras, _ = ler_cabecalho(payload)
+        with self._trava:
+            mid = self.cliente.publicar(self.topico, payload, self.qos)
+
+            if mid is None:
+                if self.qos == 0:
+                    self.leituras_descartadas += num_leituras
+                    return False
+                if len(self._pendentes) >= self.max_pendentes:
+                    descartado = self._pendentes.popleft()
+                    self.leituras_descartadas += ler_cabecalho(descartado)[1]
+                self._pendentes.append(payload)
+                return False
+
+            if self.qos > 0:
+                self._em_transito[mid] = payload
+            self.lotes_publicados += 1
+            self.leituras_publicadas += num_leituras
+            self.bytes_publicados += len(payload)
+            return True
+
+    def _reenviar_pendentes(self):
+        for _ in range(len(self._pendentes)):
+            if not self._enviar(self._pendentes.popleft()):
+                break
+
+    def confirmar(self, mid):
+        """Chamado pelo cliente quando o broker confirma uma mensagem QoS >= 1"""
+        with self._trava:
+            self._em_transito.pop(mid, None)
+
+    @property
+    def em_transito(self):
+        """Número de lotes aguardando confirmação do broker"""
+        return len(self._em_transito)
+
+
+class AssinanteTelemetria:
+    """Assina um tópico, decodifica os lotes e mede a latência fim a fim"""
+
+    def __init__(self, cliente, topico=TOPICO_METRICAS, callback=None):
+        self.callback = callback
+        self.lotes_recebidos = 0
+        self.leituras_recebidas = 0
+        self.latencia_total = 0.0
+        self.latencia_maxima = 0.0
+        cliente.assinar(topico, self._ao_receber)
+
+    def _ao_receber(self, payload):
+        tipo, enviado_em, leituras = decodificar(payload)
+        latencia = time.time() - enviado_em
+
+        self.lotes_recebidos += 1
+        self.leituras_recebidas += len(leituras)
+        self.latencia_total += latencia
+        self.latencia_maxima = max(self.latencia_maxima, latencia)
+
+        if self.callback is not None:
+            self.callback(leituras)
+
+    def estatisticas(self):
+        """Contagens e latência média/máxima (por lote) desde a criação"""
+        return {
+            'lotes_recebidos': self.lotes_recebidos,
+            'leituras_recebidas': self.leituras_recebidas,
+            'latencia_media_ms': round(1000 * self.latencia_total / self.lotes_recebidos, 2)
+                                 if self.lotes_recebidos else 0.0,
+            'latencia_maxima_ms': round(1000 * self.latencia_maxima, 2),
+        }
+
+
+if __name__ == "__main__":
+    # Teste do pipeline com o broker local
+    from iot_simulator import IoTSensorSimulator
+
+    print("=== Teste do Pipeline MQTT (broker local) ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=30)
+    broker = BrokerLocal()
+    recebidas = []
+    assinante = AssinanteTelemetria(broker, callback=recebidas.append)
+    publicador = PublicadorTelemetria(broker, tamanho_lote=10, qos=1)
+
+    for equipamento_id in simulator.equipamentos['id']:
+        publicador.publicar(simulator.gerar_metricas_uso(equipamento_id))
+    publicador.descarregar()
+    broker.aguardar_entrega()
+
+    print(f"Publicados: {publicador.lotes_publicados} lotes, {publicador.bytes_publicados} bytes")
+    print(f"Recebidos: {assinante.estatisticas()}")
+    print(pd.concat(recebidas).head())
@@ -0,0 +1,357 @@
+"""
+Pipeline de Features Temporais
+Calcula, para cada leitura, valores defasados, médias móveis, inclinações e horas desde
+a última falha do próprio equipamento, em uma única passada vetorizada sobre o histórico
+ordenado por equipamento e instante. As matrizes calculadas ficam em cache pela versão
+(impressão digital) dos dados.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Variáveis que recebem defasagens, médias móveis e inclinações
+VARIAVEIS_TEMPORAIS = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 'disco_uso_percent']
+
+# Valor de horas_desde_falha para equipamentos sem falha no histórico disponível
+HORAS_SEM_FALHA = 24 * 365
+
+NS_POR_HORA = 3_600 * 10**9
+
+# Marca de equipamento sem falha registrada no HistoricoRecente
+SEM_FALHA_REGISTRADA = np.iinfo(np.int64).min
+
+
+def _deslocar(valores, k):
+    """Cópia das linhas deslocada k posições para baixo (as k primeiras ficam com zero)"""
+    if k == 0:
+        return valores.copy()
+    deslocado = np.zeros_like(valores)
+    deslocado[k:] = valores[:-k]
+    return deslocado
+
+
+class PipelineFeatures:
+    """Features pontuais e temporais por equipamento, com cache pela versão dos dados"""
+
+    def __init__(self, colunas_base, variaveis=VARIAVEIS_TEMPORAIS, defasagens=(1, 2), janela=4,
+                 capacidade_cache=4):
+        self.colunas_base = list(colunas_base)
+        self.variaveis = list(variaveis)
+        self.defasagens = tuple(defasagens)
+        self.janela = janela
+        self.capacidade_cache = capacidade_cache
+        self._cache = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos_cache = 0
+        self.faltas_cache = 0
+
+    @property
+    def colunas(self):
+        """Colunas da matriz: as pontuais seguidas das temporais"""
+        return (self.colunas_base
+                + [f'{variavel}_lag{k}' for k in self.defasagens for variavel in self.variaveis]
+                + [f'{variavel}_media{self.janela}' for variavel in self.variaveis]
+                + [f'{variavel}_inclinacao{self.janela}' for variavel in self.variaveis]
+                + ['horas_desde_falha'])
+
+    def colunas_entrada(self, colunas):
+        """Colunas das leituras brutas necessárias para montar colunas (as não geradas pelo pipeline)"""
+        geradas = set(self.colunas) - set(self.colunas_base)
+        return [coluna for coluna in colunas if coluna not in geradas]
+
+    def de_array(self, X, colunas):
+        """Interpreta um ndarray (N x colunas) como matriz de features pronta ou como leituras brutas
+
+        Com len(colunas) colunas o array é devolvido como está; com as colunas de
+        colunas_entrada(colunas), na mesma ordem, volta um DataFrame de leituras para
+        passar pelo pipeline (cada linha como um equipamento sem histórico). Qualquer
+        outro formato levanta ValueError.
+        """
+        X = np.asarray(X, dtype=float)
+        entrada = self.colunas_entrada(colunas)
+        if X.ndim == 2 and X.shape[1] == len(colunas):
+            return X
+        if X.ndim == 2 and X.shape[1] == len(entrada):
+            return pd.DataFrame(X, columns=entrada)
+        raise ValueError(f"Array com formato {X.shape}: esperadas {len(entrada)} colunas de leituras "
+                         f"({', '.join(entrada)}) ou {len(colunas)} colunas de features")
+
+    def versao(self, df):
+        """Impressão digital do conteúdo usado pelo pipeline (sensível à ordem das linhas)"""
+        colunas = [coluna for coluna in ['equipamento_id', 'timestamp', *self.colunas_base] if coluna in df]
+        impressao = pd.util.hash_pandas_object(df[colunas], index=False).to_numpy()
+        return (len(df), tuple(colunas), hashlib.blake2b(impressao.tobytes(), digest_size=16).hexdigest())
+
+    def transformar(self, df, versao=None, usar_cache=True):
+        """Retorna a matriz de features como DataFrame alinhado ao índice de df
+
+        Sem equipamento_id, cada leitura é tratada como um equipamento sem histórico;
+        sem timestamp, vale a ordem das linhas (e as inclinações ficam por leitura).
+        """
+        if not usar_cache:
+            return self._calcular(df)
+
+        chave = versao if versao is not None else self.versao(df)
+        with self._trava:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                self.acertos_cache += 1
+                return self._cache[chave]
+
+        features = self._calcular(df)
+        with self._trava:
+            self.faltas_cache += 1
+            self._cache[chave] = features
+            while len(self._cache) > self.capacidade_cache:
+                self._cache.popitem(last=False)
+        return features
+
+    @staticmethod
+    def _ordenar(df):
+        """Ordem das linhas por equipamento e instante, com grupos, instantes e posição já ordenados"""
+        n = len(df)
+        indices = np.arange(n)
+        grupos = pd.factorize(df['equipamento_id'])[0] if 'equipamento_id' in df else indices
+        if 'timestamp' in df:
+            instantes = pd.to_datetime(df['timestamp'], format='ISO8601').to_numpy('datetime64[ns]').view(np.int64)
+        else:
+            instantes = indices * NS_POR_HORA
+
+        ordem = np.lexsort((instantes, grupos))
+        grupos = grupos[ordem]
+        instantes = instantes[ordem]
+        inicio_grupo = np.r_[True, grupos[1:] != grupos[:-1]] if n else np.zeros(0, dtype=bool)
+        primeira_linha = np.maximum.accumulate(np.where(inicio_grupo, indices, 0))
+        # Quantas leituras anteriores do mesmo equipamento existem
+        posicao = indices - primeira_linha
+        return ordem, grupos, instantes, primeira_linha, posicao
+
+    @staticmethod
+    def _falhas(df, ordem, posicao):
+        """Leituras (na ordem do histórico) em que num_falhas aumenta em relação à anterior do equipamento
+
+        num_falhas é um total acumulado: a falha nova é o aumento, não o valor positivo.
+        """
+        falha = np.zeros(len(ordem), dtype=bool)
+        if 'num_falhas' in df:
+            num_falhas = df['num_falhas'].to_numpy(dtype=float)[ordem]
+            falha[1:] = (num_falhas[1:] > num_falhas[:-1]) & (posicao[1:] > 0)
+        return falha
+
+    def horas_ate_proxima_falha(self, df):
+        """Horas de cada leitura até a próxima falha do mesmo equipamento (NaN se não houver no histórico)"""
+        ordem, grupos, instantes, _, posicao = self._ordenar(df)
+        n = len(ordem)
+        falha = self._falhas(df, ordem, posicao)
+
+        # Primeira falha estritamente posterior a cada leitura, na ordem do histórico
+        proxima = np.full(n, n)
+        if n > 1:
+            proxima[:-1] = np.minimum.accumulate(np.where(falha, np.arange(n), n)[::-1])[::-1][1:]
+        observada = proxima < n
+        observada[observada] = grupos[proxima[observada]] == grupos[observada]
+
+        horas = np.full(n, np.nan)
+        horas[observada] = (instantes[proxima[observada]] - instantes[observada]) / NS_POR_HORA
+        resultado = np.empty(n)
+        resultado[ordem] = horas
+        return pd.Series(resultado, index=df.index, name='horas_ate_proxima_falha')
+
+    def _calcular(self, df):
+        n = len(df)
+        indices = np.arange(n)
+        # Uma única ordenação por equipamento e instante; tudo abaixo é aritmética sobre ela
+        ordem, grupos, instantes, primeira_linha, posicao = self._ordenar(df)
+
+        # Matriz de saída na ordem original das linhas; cada bloco calculado na ordem
+        # do histórico é escrito de volta nas linhas de origem
+        saida = np.empty((n, len(self.colunas)))
+        saida[:, :len(self.colunas_base)] = df[self.colunas_base].to_numpy(dtype=float)
+        inicio_bloco = len(self.colunas_base)
+        m = len(self.variaveis)
+
+        def escrever(bloco):
+            nonlocal inicio_bloco
+            saida[ordem, inicio_bloco:inicio_bloco + bloco.shape[1]] = bloco
+            inicio_bloco += bloco.shape[1]
+
+        valores = df[self.variaveis].to_numpy(dtype=float)[ordem]
+
+        # Defasagens; sem histórico suficiente, repete a leitura atual
+        for k in self.defasagens:
+            defasado = _deslocar(valores, k)
+            sem_historico = posicao < k
+            defasado[sem_historico] = valores[sem_historico]
+            escrever(defasado)
+
+        # Média móvel e inclinação (mínimos quadrados, por hora) sobre até `janela` leituras
+        contagem = np.zeros(n)
+        soma_y = np.zeros((n, m))
+        soma_xy = np.zeros((n, m))
+        soma_x = np.zeros(n)
+        soma_x2 = np.zeros(n)
+        for k in range(self.janela):
+            valido = posicao >= k
+            y = _deslocar(valores, k)
+            y[~valido] = 0.0
+            x = (_deslocar(instantes, k) - instantes) / NS_POR_HORA
+            x[~valido] = 0.0
+            contagem += valido
+            soma_y += y
+            y *= x[:, None]
+            soma_xy += y
+            soma_x += x
+            soma_x2 += x * x
+        escrever(soma_y / contagem[:, None])
+
+        denominador = contagem * soma_x2 - soma_x ** 2
+        soma_xy *= contagem[:, None]
+        soma_xy -= soma_x[:, None] * soma_y
+        inclinacao = np.divide(soma_xy, denominador[:, None], out=np.zeros((n, m)),
+                               where=(denominador > 1e-12)[:, None])
+        escrever(inclinacao)
+
+        # Horas desde a última falha do mesmo equipamento (inclusive na leitura atual)
+        falha = self._falhas(df, ordem, posicao)
+        ultima_falha = np.maximum.accumulate(np.where(falha, indices, -1))
+        teve_falha = ultima_falha >= primeira_linha
+        horas_desde_falha = np.full(n, float(HORAS_SEM_FALHA))
+        horas_desde_falha[teve_falha] = np.minimum(
+            HORAS_SEM_FALHA, (instantes[teve_falha] - instantes[ultima_falha[teve_falha]]) / NS_POR_HORA)
+        escrever(horas_desde_falha[:, None])
+
+        return pd.DataFrame(saida, columns=self.colunas, index=df.index, copy=False)
+
+    def estatisticas(self):
+        return {
+            'entradas_cache': len(self._cache),
+            'acertos_cache': self.acertos_cache,
+            'faltas_cache': self.faltas_cache,
+        }
+
+
+class HistoricoRecente:
+    """Últimas leituras de cada equipamento, para a pontuação ter as mesmas features do treinamento
+
+    Sem histórico, uma leitura avulsa recebe defasagens e médias iguais ao valor atual
+    e inclinação zero, diferente do que o modelo viu no treinamento. Aqui cada lote é
+    combinado com as leituras anteriores guardadas do mesmo equipamento (e com o
+    instante da sua última falha) antes de passar pelo pipeline.
+    """
+
+    def __init__(self, pipeline, profundidade=None, capacidade_inicial=1_024):
+        self.pipeline = pipeline
+        # Leituras anteriores necessárias: maior defasagem, janela e a comparação de num_falhas
+        self.profundidade = profundidade or max(*pipeline.defasagens, pipeline.janela - 1, 1)
+
+        # Estado por equipamento em arrays contíguos, indexados pela posição em self._ids;
+        # as leituras ficam alinhadas à direita (a mais recente na última posição)
+        self._ids = pd.Index([], dtype=object)
+        self._valores = np.zeros((capacidade_inicial, self.profundidade, len(pipeline.colunas_base)))
+        self._instantes = np.zeros((capacidade_inicial, self.profundidade), dtype=np.int64)
+        self._quantidade = np.zeros(capacidade_inicial, dtype=np.int64)
+        self._ultima_falha = np.full(capacidade_inicial, SEM_FALHA_REGISTRADA)
+        self._trava = threading.Lock()
+
+    @property
+    def num_equipamentos(self):
+        return len(self._ids)
+
+    def _posicoes(self, equipamento_ids):
+        """Posição de cada equipamento nos arrays de estado, registrando os novos"""
+        posicoes = self._ids.get_indexer(equipamento_ids)
+        novos = posicoes < 0
+        if novos.any():
+            self._ids = self._ids.append(pd.Index(pd.unique(equipamento_ids[novos]), dtype=object))
+            if len(self._ids) > len(self._quantidade):
+                capacidade = max(len(self._ids), 2 * len(self._quantidade))
+                extra = capacidade - len(self._quantidade)
+                self._valores = np.concatenate([self._valores, np.zeros((extra, *self._valores.shape[1:]))])
+                self._instantes = np.concatenate([self._instantes,
+                                                  np.zeros((extra, self.profundidade), dtype=np.int64)])
+                self._quantidade = np.concatenate([self._quantidade, np.zeros(extra, dtype=np.int64)])
+                self._ultima_falha = np.concatenate([self._ultima_falha, np.full(extra, SEM_FALHA_REGISTRADA)])
+            posicoes[novos] = self._ids.get_indexer(equipamento_ids[novos])
+        return posicoes
+
+    def transformar(self, leituras):
+        """Features de um lote de leituras (com equipamento_id), alinhadas ao seu índice
+
+        Sem timestamp, todas as leituras do lote recebem o instante atual.
+        """
+        equipamento_ids = leituras['equipamento_id'].to_numpy(dtype=object)
+        if 'timestamp' in leituras:
+            instantes = pd.to_datetime(leituras['timestamp'], format='ISO8601').to_numpy('datetime64[ns]').view(np.int64)
+        else:
+            instantes = np.full(len(leituras), pd.Timestamp.now().value, dtype=np.int64)
+        valores = leituras[self.pipeline.colunas_base].to_numpy(dtype=float)
+
+        with self._trava:
+            posicoes = self._posicoes(equipamento_ids)
+
+            # Leituras guardadas dos equipamentos do lote, seguidas das novas
+            unicas = np.unique(posicoes)
+            guardadas = np.arange(self.profundidade) >= (self.profundidade - self._quantidade[unicas])[:, None]
+            posicoes_anteriores = np.broadcast_to(unicas[:, None], guardadas.shape)[guardadas]
+            todas_posicoes = np.concatenate([posicoes_anteriores, posicoes])
+            todos_instantes = np.concatenate([self._instantes[unicas][guardadas], instantes])
+            todos_valores = np.concatenate([self._valores[unicas][guardadas], valores])
+
+            combinadas = pd.DataFrame(todos_valores, columns=self.pipeline.colunas_base)
+            combinadas.insert(0, 'equipamento_id', todas_posicoes)
+            combinadas.insert(1, 'timestamp', todos_instantes.view('datetime64[ns]'))
+            features = self.pipeline.transformar(combinadas, usar_cache=False).iloc[len(posicoes_anteriores):]
+
+            # Sem falha entre as leituras combinadas, vale a última falha registrada do equipamento
+            horas = features['horas_desde_falha'].to_numpy(copy=True)
+            falha_recente = horas < HORAS_SEM_FALHA
+            ultima_falha = self._ultima_falha[posicoes]
+            anterior = ~falha_recente & (ultima_falha != SEM_FALHA_REGISTRADA)
+            horas[anterior] = np.minimum(HORAS_SEM_FALHA, (instantes[anterior] - ultima_falha[anterior]) / NS_POR_HORA)
+            np.maximum.at(self._ultima_falha, posicoes[falha_recente],
+                          instantes[falha_recente] - np.round(horas[falha_recente] * NS_POR_HORA).astype(np.int64))
+
+            # Guarda as últimas `profundidade` leituras de cada equipamento, na ordem do tempo
+            ordem = np.lexsort((todos_instantes, todas_posicoes))
+            do_fim = pd.Series(todas_posicoes[ordem]).groupby(todas_posicoes[ordem]).cumcount(ascending=False).to_numpy()
+            manter = do_fim < self.profundidade
+            linhas = ordem[manter]
+            coluna = self.profundidade - 1 - do_fim[manter]
+            self._valores[todas_posicoes[linhas], coluna] = todos_valores[linhas]
+            self._instantes[todas_posicoes[linhas], coluna] = todos_instantes[linhas]
+            np.add.at(self._quantidade, posicoes, 1)
+            np.minimum(self._quantidade, self.profundidade, out=self._quantidade)
+
+        features = features.assign(horas_desde_falha=horas)
+        features.index = leituras.index
+        return features
+
+
+if __name__ == "__main__":
+    # Teste do pipeline de features
+    import time
+    from iot_simulator import IoTSensorSimulator
+    from ai_models import FEATURES
+
+    print("=== Teste do Pipeline de Features ===\n")
+
+    simulator = IoTSensorSimulator(num_equipamentos=2_000)
+    df_metricas = simulator.gerar_dados_historicos(dias=90, intervalo_horas=6)
+    pipeline = PipelineFeatures(FEATURES)
+
+    inicio = time.perf_counter()
+    features = pipeline.transformar(df_metricas)
+    print(f"\n✓ {features.shape[0]:,} leituras x {features.shape[1]} features em {time.perf_counter() - inicio:.2f} s")
+
+    inicio = time.perf_counter()
+    pipeline.transformar(df_metricas)
+    print(f"✓ Mesma versão dos dados (cache) em {time.perf_counter() - inicio:.3f} s\n")
+
+    exemplo = df_metricas['equipamento_id'].iloc[0]
+    print(features[df_metricas['equipamento_id'] == exemplo].iloc[:6, 5:].round(2).T)
+    print()
+    for chave, valor in pipeline.estatisticas().items():
+        print(f"  {chave}: {valor}")
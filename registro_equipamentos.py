@@ -0,0 +1,309 @@
+"""
+Registro Compacto de Equipamentos
+Armazena o cadastro de equipamentos em arrays NumPy de largura fixa, com códigos
+inteiros no lugar das strings repetidas, para frotas de centenas de milhares de itens.
+"""
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+CATEGORIAS = ['Notebook', 'Desktop', 'Monitor', 'Servidor', 'Switch', 'Roteador']
+FABRICANTES = ['Dell', 'HP', 'Lenovo', 'Cisco', 'Apple']
+LOCALIZACOES = ['Almoxarifado A', 'Almoxarifado B', 'Em Uso - TI', 'Em Uso - Vendas', 'Manutenção']
+# Localizações que só aparecem como destino de movimentações
+LOCALIZACOES_EXTRAS = ['Em Uso - RH']
+# Estados possíveis dos equipamentos (a posição é o código usado nos arrays)
+ESTADOS = ['Novo', 'Bom', 'Atenção', 'Crítico']
+# Idade (meses) a partir da qual o equipamento passa para o próximo estado
+LIMITES_IDADE_ESTADO = [6, 24, 48]
+
+# Colunas codificadas como inteiros: nome -> dtype do código
+COLUNAS_CODIFICADAS = {
+    'categoria': np.int8,
+    'fabricante': np.int8,
+    'localizacao': np.int16,
+    'estado': np.int8,
+}
+
+
+def formatar_id(numero):
+    """Converte o id numérico interno para o formato público (ex: 1 -> 'EQ0001')"""
+    return f'EQ{int(numero):04d}'
+
+
+def codificar_id(equipamento_id):
+    """Converte o id público para o número interno (ex: 'EQ0001' -> 1)
+
+    Ids fora do formato 'EQ<dígitos>' levantam KeyError, como ids inexistentes.
+    """
+    if not isinstance(equipamento_id, str) or not equipamento_id.startswith('EQ'):
+        raise KeyError(f"Equipamento não encontrado: {equipamento_id}")
+    numero = equipamento_id[2:]
+    if not (numero.isascii() and numero.isdigit()):
+        raise KeyError(f"Equipamento não encontrado: {equipamento_id}")
+    return int(numero)
+
+
+def rotulos_padrao():
+    """Listas de rótulos conhecidos das colunas codificadas (cópias, podem crescer)"""
+    return {
+        'categoria': list(CATEGORIAS),
+        'fabricante': list(FABRICANTES),
+        'localizacao': LOCALIZACOES + LOCALIZACOES_EXTRAS,
+        'estado': list(ESTADOS),
+    }
+
+
+def categorizar(df_equipamentos, rotulos=None):
+    """Converte as colunas codificadas de um cadastro em DataFrame para dtype category
+
+    Cada rótulo repetido passa a ocupar um código inteiro, como no registro compacto.
+    Valores fora das listas conhecidas viram categorias novas no fim da lista.
+    """
+    rotulos = rotulos if rotulos is not None else rotulos_padrao()
+    df = df_equipamentos.copy()
+    for coluna in COLUNAS_CODIFICADAS:
+        valores = df[coluna].astype(object)
+        extras = [valor for valor in valores.unique() if valor not in rotulos[coluna]]
+        df[coluna] = pd.Categorical(valores, categories=list(rotulos[coluna]) + extras)
+    return df
+
+
+class Equipamento:
+    """Registro de um único equipamento, usado no caminho por evento"""
+
+    __slots__ = ('id', 'rfid', 'categoria', 'fabricante', 'modelo', 'localizacao',
+                 'estado', 'idade_meses', 'data_aquisicao', 'valor_aquisicao', 'em_uso')
+
+    def __init__(self, id, rfid, categoria, fabricante, modelo, localizacao,
+                 estado, idade_meses, data_aquisicao, valor_aquisicao, em_uso):
+        self.id = id
+        self.rfid = rfid
+        self.categoria = categoria
+        self.fabricante = fabricante
+        self.modelo = modelo
+        self.localizacao = localizacao
+        self.estado = estado
+        self.idade_meses = idade_meses
+        self.data_aquisicao = data_aquisicao
+        self.valor_aquisicao = valor_aquisicao
+        self.em_uso = em_uso
+
+    def para_dict(self):
+        """Retorna o registro no mesmo formato das linhas do simulador"""
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    def __repr__(self):
+        return f"Equipamento({self.id}, {self.categoria}, {self.estado}, {self.localizacao})"
+
+
+class RegistroEquipamentos:
+    """Cadastro colunar de equipamentos com colunas codificadas e arrays de largura fixa"""
+
+    def __init__(self, colunas, rotulos=None):
+        self.colunas = colunas
+        self.rotulos = rotulos if rotulos is not None else rotulos_padrao()
+
+        # Ids gerados sequencialmente (1..N) permitem achar a posição por aritmética;
+        # nos demais casos usa-se busca binária sobre os ids ordenados
+        ids = self.colunas['id']
+        self._sequencial = bool(np.array_equal(ids, np.arange(1, len(ids) + 1)))
+        self._ordem = None if self._sequencial else np.argsort(ids, kind='stable')
+
+    @classmethod
+    def gerar(cls, num_equipamentos, rng=None):
+        """Gera um cadastro aleatório com as mesmas distribuições do simulador"""
+        rng = rng if rng is not None else np.random.default_rng()
+
+        # Idade do equipamento em meses (0 a 60 meses) e estado derivado dela
+        idade_meses = rng.integers(0, 61, num_equipamentos).astype(np.uint8)
+        estado = np.searchsorted(LIMITES_IDADE_ESTADO, idade_meses, side='right')
+        hoje = np.datetime64(datetime.now().date(), 'D')
+
+        colunas = {
+            'id': np.arange(1, num_equipamentos + 1, dtype=np.uint32),
+            'rfid': rng.integers(10000, 100000, num_equipamentos).astype(np.uint32),
+            'categoria': rng.integers(0, len(CATEGORIAS), num_equipamentos).astype(np.int8),
+            'fabricante': rng.integers(0, len(FABRICANTES), num_equipamentos).astype(np.int8),
+            'modelo': rng.integers(1000, 10000, num_equipamentos).astype(np.uint16),
+            'localizacao': rng.integers(0, len(LOCALIZACOES), num_equipamentos).astype(np.int16),
+            'estado': estado.astype(np.int8),
+            'idade_meses': idade_meses,
+            'data_aquisicao': hoje - (idade_meses.astype(np.int64) * 30).astype('timedelta64[D]'),
+            'valor_aquisicao': rng.integers(1000, 10001, num_equipamentos).astype(np.uint32),
+            'em_uso': rng.integers(0, 2, num_equipamentos).astype(bool),
+        }
+        return cls(colunas)
+
+    @classmethod
+    def de_dataframe(cls, df_equipamentos):
+        """Converte um DataFrame de equipamentos (ex: simulator.equipamentos) para o registro"""
+        rotulos = rotulos_padrao()
+        colunas = {
+            'id': df_equipamentos['id'].str[2:].astype(np.uint32).to_numpy(),
+            'rfid': df_equipamentos['rfid'].str[4:].astype(np.uint32).to_numpy(),
+            'modelo': df_equipamentos['modelo'].str[6:].astype(np.uint16).to_numpy(),
+            'idade_meses': df_equipamentos['idade_meses'].to_numpy(dtype=np.uint8),
+            'data_aquisicao': pd.to_datetime(df_equipamentos['data_aquisicao']).to_numpy().astype('datetime64[D]'),
+            'valor_aquisicao': df_equipamentos['valor_aquisicao'].to_numpy(dtype=np.uint32),
+            'em_uso': df_equipamentos['em_uso'].to_numpy(dtype=bool),
+        }
+        for coluna, dtype in COLUNAS_CODIFICADAS.items():
+            # Valores fora da lista conhecida ganham novos códigos no fim da lista
+            valores = df_equipamentos[coluna].tolist()
+            for valor in dict.fromkeys(valores):
+                if valor not in rotulos[coluna]:
+                    rotulos[coluna].append(valor)
+            colunas[coluna] = pd.Categorical(valores, categories=rotulos[coluna]).codes.astype(dtype)
+
+        # Mantém a ordem das colunas igual à do cadastro gerado
+        ordem = ['id', 'rfid', 'categoria', 'fabricante', 'modelo', 'localizacao',
+                 'estado', 'idade_meses', 'data_aquisicao', 'valor_aquisicao', 'em_uso']
+        return cls({coluna: colunas[coluna] for coluna in ordem}, rotulos)
+
+    def __len__(self):
+        return len(self.colunas['id'])
+
+    def _posicao(self, equipamento_id):
+        """Retorna a posição do equipamento nos arrays"""
+        numero = codificar_id(equipamento_id)
+        ids = self.colunas['id']
+        if self._sequencial:
+            posicao = numero - 1
+        else:
+            indice = np.searchsorted(ids, numero, sorter=self._ordem)
+            posicao = self._ordem[indice] if indice < len(ids) else -1
+        if not 0 <= posicao < len(ids) or ids[posicao] != numero:
+            raise KeyError(f"Equipamento não encontrado: {equipamento_id}")
+        return posicao
+
+    def _codigo(self, coluna, valor):
+        """Retorna o código de um rótulo, registrando rótulos novos"""
+        rotulos = self.rotulos[coluna]
+        if valor not in rotulos:
+            rotulos.append(valor)
+        return rotulos.index(valor)
+
+    def _mascara_localizacao(self, trecho):
+        """Máscara dos equipamentos cuja localização contém o trecho informado"""
+        contem = np.array([trecho in nome for nome in self.rotulos['localizacao']])
+        return contem[self.colunas['localizacao']]
+
+    def obter(self, equipamento_id):
+        """Retorna o registro de um equipamento"""
+        posicao = self._posicao(equipamento_id)
+        return Equipamento(
+            id=formatar_id(self.colunas['id'][posicao]),
+            rfid=f"RFID{self.colunas['rfid'][posicao]}",
+            categoria=self.rotulos['categoria'][self.colunas['categoria'][posicao]],
+            fabricante=self.rotulos['fabricante'][self.colunas['fabricante'][posicao]],
+            modelo=f"Model-{self.colunas['modelo'][posicao]}",
+            localizacao=self.rotulos['localizacao'][self.colunas['localizacao'][posicao]],
+            estado=self.rotulos['estado'][self.colunas['estado'][posicao]],
+            idade_meses=int(self.colunas['idade_meses'][posicao]),
+            data_aquisicao=str(self.colunas['data_aquisicao'][posicao]),
+            valor_aquisicao=int(self.colunas['valor_aquisicao'][posicao]),
+            em_uso=bool(self.colunas['em_uso'][posicao]),
+        )
+
+    def mover(self, equipamento_id, nova_localizacao):
+        """Altera a localização de um equipamento e retorna a localização anterior"""
+        posicao = self._posicao(equipamento_id)
+        anterior = self.rotulos['localizacao'][self.colunas['localizacao'][posicao]]
+        self.colunas['localizacao'][posicao] = self._codigo('localizacao', nova_localizacao)
+        return anterior
+
+    def atualizar_estado(self, equipamento_id, novo_estado):
+        """Altera o estado de um equipamento e retorna o estado anterior"""
+        posicao = self._posicao(equipamento_id)
+        anterior = self.rotulos['estado'][self.colunas['estado'][posicao]]
+        self.colunas['estado'][posicao] = self._codigo('estado', novo_estado)
+        return anterior
+
+    def obter_nivel_estoque_atual(self):
+        """Retorna nível de estoque atual por categoria"""
+        categorias = self.colunas['categoria'][self._mascara_localizacao('Almoxarifado')]
+        contagem = np.bincount(categorias, minlength=len(self.rotulos['categoria']))
+
+        estoque = pd.DataFrame({
+            'categoria': self.rotulos['categoria'],
+            'quantidade': contagem.astype(np.int64),
+        })
+        estoque = estoque[estoque['quantidade'] > 0]
+        return estoque.sort_values('categoria').reset_index(drop=True)
+
+    def obter_equipamentos_em_uso(self):
+        """Retorna equipamentos atualmente em uso"""
+        return self.para_dataframe(self._mascara_localizacao('Em Uso'))
+
+    def para_dataframe(self, mascara=None, categorico=True):
+        """Converte o registro (ou as linhas da máscara) para o DataFrame do simulador
+
+        Com categorico=True as colunas codificadas viram dtype category sobre os
+        próprios códigos, sem materializar uma string por linha; com False, object.
+        """
+        posicoes = np.arange(len(self)) if mascara is None else np.flatnonzero(mascara)
+        colunas = {coluna: valores[posicoes] for coluna, valores in self.colunas.items()}
+
+        dados = {
+            'id': [formatar_id(numero) for numero in colunas['id']],
+            'rfid': [f'RFID{numero}' for numero in colunas['rfid']],
+        }
+        for coluna in COLUNAS_CODIFICADAS:
+            if categorico:
+                dados[coluna] = pd.Categorical.from_codes(colunas[coluna], categories=list(self.rotulos[coluna]))
+            else:
+                dados[coluna] = np.array(self.rotulos[coluna], dtype=object)[colunas[coluna]]
+        dados['modelo'] = [f'Model-{numero}' for numero in colunas['modelo']]
+        dados['idade_meses'] = colunas['idade_meses'].astype(np.int64)
+        dados['data_aquisicao'] = np.datetime_as_string(colunas['data_aquisicao'], unit='D')
+        dados['valor_aquisicao'] = colunas['valor_aquisicao'].astype(np.int64)
+        dados['em_uso'] = colunas['em_uso']
+
+        return pd.DataFrame(dados, index=posicoes)[list(self.colunas)]
+
+    def uso_memoria(self):
+        """Retorna os bytes ocupados por cada coluna do registro"""
+        return pd.Series({coluna: valores.nbytes for coluna, valores in self.colunas.items()})
+
+    def relatorio_memoria(self):
+        """Compara a memória do registro compacto com a dos DataFrames equivalentes (object e category)"""
+        compacto = self.uso_memoria()
+        dataframe = self.para_dataframe(categorico=False).memory_usage(deep=True, index=False)
+        categorico = self.para_dataframe().memory_usage(deep=True, index=False)
+
+        relatorio = pd.DataFrame({
+            'compacto_bytes': compacto,
+            'dataframe_bytes': dataframe,
+            'categorico_bytes': categorico,
+        })
+        relatorio.loc['TOTAL'] = relatorio.sum()
+        relatorio['reducao'] = (1 - relatorio['compacto_bytes'] / relatorio['dataframe_bytes']).round(3)
+
+        total = relatorio.loc['TOTAL']
+        print(f"Registro compacto: {total['compacto_bytes'] / 1e6:.2f} MB | "
+              f"DataFrame: {total['dataframe_bytes'] / 1e6:.2f} MB "
+              f"({total['reducao']:.1%} de redução) | "
+              f"DataFrame category: {total['categorico_bytes'] / 1e6:.2f} MB")
+
+        return relatorio
+
+
+if __name__ == "__main__":
+    # Teste do registro compacto
+    print("=== Teste do Registro Compacto de Equipamentos ===\n")
+
+    registro = RegistroEquipamentos.gerar(1_000_000, rng=np.random.default_rng(42))
+    print(f"Total: {len(registro)} equipamentos\n")
+
+    print("Equipamento EQ0001:")
+    print(registro.obter('EQ0001'))
+    print()
+
+    print("Nível de estoque atual:")
+    print(registro.obter_nivel_estoque_atual())
+    print()
+
+    print("Uso de memória:")
+    print(registro.relatorio_memoria())
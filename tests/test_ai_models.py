@@ -0,0 +1,327 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_models import FEATURES, ManutencaoPreditiva, OtimizacaoEstoque
+from iot_simulator import IoTSensorSimulator
+
+
+@pytest.fixture(scope='module')
+def modelo_manutencao():
+    modelo = ManutencaoPreditiva()
+    modelo.treinar(IoTSensorSimulator(num_equipamentos=30, rng=np.random.default_rng(0)).gerar_dados_historicos(dias=10))
+    return modelo
+
+
+def test_prever_lote_com_leituras_brutas_em_array(modelo_manutencao):
+    leituras = np.random.default_rng(0).uniform(0, 100, size=(len(modelo_manutencao.features), len(FEATURES)))
+
+    por_array = modelo_manutencao.prever_lote(leituras)
+    por_dataframe = modelo_manutencao.prever_lote(pd.DataFrame(leituras, columns=FEATURES))
+
+    assert len(por_array) == len(leituras)
+    np.testing.assert_allclose(por_array['probabilidade_falha'], por_dataframe['probabilidade_falha'])
+
+
+def test_prever_lote_rejeita_array_com_colunas_erradas(modelo_manutencao):
+    with pytest.raises(ValueError):
+        modelo_manutencao.prever_lote(np.ones((3, 7)))
+
+
+def test_tempo_ate_falha_nao_deriva_da_idade():
+    from ai_models import TempoAteFalha
+
+    historico = IoTSensorSimulator(num_equipamentos=30, rng=np.random.default_rng(0)).gerar_dados_historicos(dias=10)
+    X, y = TempoAteFalha().preparar_dados(historico)
+
+    assert y.notna().all() and (y > 0).all()
+    # Leituras de mesma idade têm tempos até falha diferentes: o alvo não é função da idade
+    assert y.groupby(X['idade_meses'].to_numpy()).nunique().max() > 1
+
+
+def test_tempo_ate_falha_aprende_mais_que_a_media():
+    from ai_models import TempoAteFalha
+
+    historico = IoTSensorSimulator(num_equipamentos=100, rng=np.random.default_rng(0)).gerar_dados_historicos(dias=30)
+    modelo = TempoAteFalha()
+    modelo.treinar(historico)
+
+    assert modelo.metadados['erro_medio_horas'] < 0.8 * modelo.metadados['erro_referencia_horas']
+
+
+def test_prever_tempo_ate_falha_em_meses_sem_modelo_de_tempo(modelo_manutencao):
+    metricas = {'temperatura_c': 45.0, 'cpu_uso_percent': 50.0, 'ram_uso_percent': 60.0,
+                'disco_uso_percent': 40.0, 'num_falhas': 2}
+
+    meses = modelo_manutencao.prever_tempo_ate_falha(metricas, idade_meses=30)
+
+    assert isinstance(meses, int) and 1 <= meses < 36
+    with pytest.raises(Exception, match='modelo_tempo'):
+        modelo_manutencao.prever_horas_ate_falha(metricas, idade_meses=30)
+
+
+def test_modelo_tempo_nao_e_treinado_nem_salvo_com_a_manutencao(modelo_manutencao, tmp_path):
+    from ai_models import TempoAteFalha
+
+    assert modelo_manutencao.modelo_tempo is None
+
+    modelo_manutencao.modelo_tempo = TempoAteFalha()
+    caminho = tmp_path / 'manutencao.joblib'
+    try:
+        modelo_manutencao.salvar(caminho)
+    finally:
+        modelo_manutencao.modelo_tempo = None
+
+    carregado = ManutencaoPreditiva.carregar(caminho, mmap_mode=None)
+    assert carregado.modelo_tempo is None
+    assert carregado.is_trained
+
+
+class _ModeloTempoFixo:
+    """Modelo de tempo até falha que conta as leituras pontuadas"""
+
+    def __init__(self):
+        self.metadados = {'treinado_em': '2025-01-01T00:00:00'}
+        self.pontuadas = 0
+
+    def prever_lote(self, leituras):
+        self.pontuadas += len(leituras)
+        return pd.DataFrame({'tempo_ate_falha_horas': np.full(len(leituras), 12.0)}, index=leituras.index)
+
+
+def test_cache_vida_restante_por_equipamento_e_validade():
+    from ai_models import CacheVidaRestante
+
+    modelo = _ModeloTempoFixo()
+    cache = CacheVidaRestante(modelo, validade=pd.Timedelta(minutes=15))
+    leituras = pd.DataFrame({'equipamento_id': ['EQ0001', 'EQ0002'], 'temperatura_c': [40.0, 50.0]})
+    inicio = pd.Timestamp('2025-01-01 08:00')
+
+    cache.prever_frota(leituras, agora=inicio)
+    # Métricas novas dentro da validade: a estimativa de cada equipamento é reaproveitada
+    cache.prever_frota(leituras.assign(temperatura_c=[41.0, 52.0]), agora=inicio + pd.Timedelta(minutes=5))
+    assert (cache.acertos, modelo.pontuadas) == (2, 2)
+
+    cache.prever_frota(leituras, agora=inicio + pd.Timedelta(minutes=20))
+    assert modelo.pontuadas == 4
+
+    modelo.metadados = {'treinado_em': '2025-01-02T00:00:00'}
+    cache.prever_frota(leituras, agora=inicio + pd.Timedelta(minutes=21))
+    assert modelo.pontuadas == 6
+
+
+def test_previsao_demanda_conta_so_as_linhas_acrescentadas(monkeypatch):
+    from ai_models import PrevisaoDemanda
+
+    movimentacoes = IoTSensorSimulator(num_equipamentos=50).gerar_movimentacoes_historicas(dias=60)
+    antigas, novas = movimentacoes.iloc[:-40], movimentacoes.iloc[-40:]
+    modelo = PrevisaoDemanda()
+    modelo.construir_cubo(antigas)
+
+    reconstrucoes = []
+    construir_cubo = modelo.construir_cubo
+    monkeypatch.setattr(modelo, 'construir_cubo', lambda df: reconstrucoes.append(len(df)) or construir_cubo(df))
+
+    # Novo DataFrame (cópia) com o mesmo histórico e linhas acrescentadas
+    modelo._sincronizar_cubo(pd.concat([antigas, novas.iloc[:20]], ignore_index=True))
+    # Linhas registradas diretamente contam como processadas
+    modelo.registrar_movimentacoes(novas.iloc[20:])
+    modelo._sincronizar_cubo(movimentacoes.copy())
+
+    assert reconstrucoes == []
+    pd.testing.assert_frame_equal(modelo.historico_demanda, PrevisaoDemanda().construir_cubo(movimentacoes),
+                                  check_dtype=False)
+
+    # Histórico diferente: a matriz é refeita
+    modelo._sincronizar_cubo(movimentacoes.iloc[5:])
+    assert reconstrucoes == [len(movimentacoes) - 5]
+
+
+def test_cache_de_ajustes_limitado_e_lru():
+    from collections import OrderedDict
+    from ai_models import _impressao_serie, prever_series
+
+    dias = pd.date_range('2025-01-01', periods=28, freq='D')
+    rng = np.random.default_rng(3)
+    series = pd.DataFrame(rng.poisson(3, size=(28, 3)), index=dias, columns=['a', 'b', 'c'])
+    impressao = {nome: _impressao_serie(series[nome].to_numpy(), 30, 7) for nome in series.columns}
+    cache = OrderedDict()
+
+    prever_series(series[['a', 'b']], cache=cache, capacidade_cache=2)
+    # 'a' é consultada de novo e passa a ser a mais recente; 'c' expulsa 'b'
+    prever_series(series[['a']], cache=cache, capacidade_cache=2)
+    previsoes = prever_series(series[['c']], cache=cache, capacidade_cache=2)
+
+    assert list(cache) == [impressao['a'], impressao['c']]
+    assert previsoes['serie'].tolist() == ['c']
+
+
+def _itens_estoque(**colunas):
+    itens = pd.DataFrame({
+        'nivel_atual': [10, 50],
+        'demanda_media_diaria': [2.0, 1.0],
+        'lead_time_dias': [5, 10],
+        'custo_pedido': [100.0, 80.0],
+        'custo_manutencao_anual': [20.0, 15.0],
+        'desvio_demanda_diaria': [0.5, 0.2],
+    })
+    for coluna, valores in colunas.items():
+        itens[coluna] = valores
+    return itens
+
+
+def test_otimizar_lote_valores_finitos():
+    resultado = OtimizacaoEstoque().otimizar_lote(_itens_estoque())
+
+    assert np.isfinite(resultado['lote_economico']).all()
+    assert resultado['status'].iloc[0] == 'CRÍTICO - Comprar Urgente'
+
+
+@pytest.mark.parametrize('nivel_servico', [0.0, 1.0, 1.5])
+def test_otimizar_lote_rejeita_nivel_servico_fora_de_0_1(nivel_servico):
+    with pytest.raises(ValueError, match='nivel_servico'):
+        OtimizacaoEstoque().otimizar_lote(_itens_estoque(), nivel_servico=nivel_servico)
+
+
+@pytest.mark.parametrize('coluna, valores', [
+    ('nivel_atual', [10, np.nan]),
+    ('nivel_atual', [-5, 50]),
+    ('custo_manutencao_anual', [20.0, 0.0]),
+    ('demanda_media_diaria', [-1.0, 1.0]),
+    ('lead_time_dias', [5, np.nan]),
+    ('desvio_demanda_diaria', [0.5, -0.1]),
+])
+def test_otimizar_lote_rejeita_entradas_invalidas(coluna, valores):
+    with pytest.raises(ValueError, match=coluna):
+        OtimizacaoEstoque().otimizar_lote(_itens_estoque(**{coluna: valores}))
+
+
+def test_series_diarias_vao_ate_hoje():
+    from ai_models import PrevisaoDemanda
+
+    modelo = PrevisaoDemanda(n_processos=1)
+    modelo.construir_cubo(pd.DataFrame({
+        'timestamp': ['2025-01-01T10:00:00.000000', '2025-01-03T10:00:00.000000'],
+        'equipamento_id': ['EQ0001', 'EQ0002'],
+        'tipo': 'SAIDA',
+        'categoria': 'Notebook',
+    }))
+
+    series = modelo.series_diarias(ate='2025-01-06')
+
+    assert series.index[-1] == pd.Timestamp('2025-01-06')
+    assert series['Notebook'].tolist() == [1, 0, 1, 0, 0, 0]
+
+
+def test_previsao_demanda_reaproveita_o_pool_de_processos():
+    from ai_models import PrevisaoDemanda
+
+    simulator = IoTSensorSimulator(num_equipamentos=50, rng=np.random.default_rng(0))
+    movimentacoes = simulator.gerar_movimentacoes_historicas(dias=60)
+    modelo = PrevisaoDemanda(n_processos=2)
+    try:
+        primeira = modelo.prever_demanda_todas(movimentacoes)
+        pool = modelo._executor
+        assert pool is not None
+        # Mais movimentações mudam as séries: novos ajustes, no mesmo pool
+        modelo.prever_demanda_todas(pd.concat([movimentacoes, simulator.gerar_movimentacoes_historicas(dias=10)],
+                                              ignore_index=True))
+        assert modelo._executor is pool
+    finally:
+        modelo.fechar()
+
+    assert modelo._executor is None
+    sequencial = PrevisaoDemanda(n_processos=1).prever_demanda_todas(movimentacoes)
+    pd.testing.assert_frame_equal(primeira, sequencial)
+
+
+def test_repositorio_salva_e_carrega_o_mesmo_modelo(modelo_manutencao, tmp_path):
+    from ai_models import RepositorioModelos
+
+    repositorio = RepositorioModelos(str(tmp_path))
+    repositorio.salvar('manutencao', modelo_manutencao)
+    carregado = repositorio.carregar('manutencao', ManutencaoPreditiva)
+
+    leituras = np.random.default_rng(1).uniform(0, 100, size=(20, len(FEATURES)))
+    pd.testing.assert_frame_equal(carregado.prever_lote(leituras), modelo_manutencao.prever_lote(leituras))
+    assert carregado.metadados == modelo_manutencao.metadados
+    # Gravação atômica: só o artefato final fica no diretório
+    assert [str(p) for p in tmp_path.iterdir()] == [repositorio.caminho('manutencao')]
+
+
+def test_repositorio_ignora_artefato_de_outra_versao_ou_classe(modelo_manutencao, tmp_path, monkeypatch):
+    import shutil
+    import ai_models
+    from ai_models import DeteccaoAnomalias, RepositorioModelos
+
+    repositorio = RepositorioModelos(str(tmp_path))
+    repositorio.salvar('manutencao', modelo_manutencao)
+    antigo = repositorio.caminho('manutencao')
+
+    assert repositorio.carregar('manutencao', DeteccaoAnomalias) is None
+
+    # Nova versão do formato: o artefato antigo não é encontrado nem aceito sob o nome novo
+    monkeypatch.setattr(ai_models, 'VERSAO_MODELOS', ai_models.VERSAO_MODELOS + 1)
+    assert repositorio.carregar('manutencao', ManutencaoPreditiva) is None
+    shutil.copy(antigo, repositorio.caminho('manutencao'))
+    assert repositorio.carregar('manutencao', ManutencaoPreditiva) is None
+
+
+def test_buffer_reservatorio_amostra_uniforme_com_tamanho_fixo():
+    from ai_models import BufferTreinamento, PIPELINE_FEATURES
+
+    buffer = BufferTreinamento(capacidade=2_000, seed=0)
+    assert buffer.amostras().shape == (0, len(PIPELINE_FEATURES.colunas))
+
+    valores = np.arange(200_000, dtype=float).reshape(-1, 1)
+    for inicio in range(0, len(valores), 7_000):
+        buffer.adicionar(valores[inicio:inicio + 7_000])
+
+    amostras = buffer.amostras()[:, 0]
+    assert buffer.tamanho == 2_000 and buffer.vistos == 200_000
+    assert len(np.unique(amostras)) == len(amostras)
+    # Cada decil do histórico contribui com ~10% da amostra
+    por_decil = np.bincount((amostras // 20_000).astype(int), minlength=10) / len(amostras)
+    np.testing.assert_allclose(por_decil, 0.1, atol=0.03)
+
+
+def test_buffer_janela_guarda_as_leituras_mais_recentes():
+    from ai_models import BufferTreinamento
+
+    buffer = BufferTreinamento(capacidade=100, modo='janela')
+    for inicio in range(0, 1_050, 30):
+        buffer.adicionar(np.arange(inicio, min(inicio + 30, 1_050), dtype=float).reshape(-1, 1))
+
+    assert sorted(buffer.amostras()[:, 0]) == list(range(950, 1_050))
+
+
+def test_classificacao_partial_fit_acumula_lotes_com_escala_fixa():
+    from ai_models import ClassificacaoEstado
+
+    simulator = IoTSensorSimulator(num_equipamentos=30, rng=np.random.default_rng(0))
+    lotes = list(simulator.gerar_dados_historicos_em_lotes(dias=4, tamanho_lote=120))
+    modelo = ClassificacaoEstado()
+
+    modelo.atualizar(lotes[0])
+    escala = modelo.escala
+    centroides = modelo.model.cluster_centers_.copy()
+    for lote in lotes[1:]:
+        modelo.atualizar(lote)
+
+    assert modelo.escala is escala
+    assert modelo.metadados['num_amostras'] == sum(len(lote) for lote in lotes)
+    assert not np.allclose(modelo.model.cluster_centers_, centroides)
+
+
+def test_anomalias_em_lotes_limitadas_ao_buffer():
+    from ai_models import DeteccaoAnomalias
+
+    simulator = IoTSensorSimulator(num_equipamentos=30, rng=np.random.default_rng(0))
+    lotes = list(simulator.gerar_dados_historicos_em_lotes(dias=4, tamanho_lote=60))
+    modelo = DeteccaoAnomalias(capacidade_buffer=200)
+    modelo.treinar_em_lotes(iter(lotes))
+
+    assert len(lotes) > 1
+    assert modelo.buffer.tamanho == 200 and modelo.buffer.vistos == sum(len(lote) for lote in lotes)
+    assert modelo.metadados['num_amostras'] == modelo.buffer.vistos
+    assert modelo.detectar_anomalia(simulator.gerar_metricas_uso('EQ0001')) is not None
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from anomalias_streaming import VARIAVEIS_BASE, MotorAnomaliasStreaming
+
+
+def _leituras(equipamento_ids, valores):
+    leituras = pd.DataFrame(np.asarray(valores, dtype=float), columns=VARIAVEIS_BASE)
+    leituras.insert(0, 'equipamento_id', equipamento_ids)
+    return leituras
+
+
+def test_atualizacao_ewma():
+    alfa = 0.1
+    motor = MotorAnomaliasStreaming(alfa=alfa, aquecimento=1_000)
+    sequencia = [[40.0, 20.0, 30.0], [42.0, 25.0, 31.0], [38.0, 10.0, 35.0]]
+
+    for valores in sequencia:
+        motor.processar(_leituras(['EQ0001'], [valores]))
+
+    # Primeira leitura inicia a média (variância zero sem modelo); as demais seguem a EWMA
+    media = np.array(sequencia[0])
+    variancia = np.zeros(3)
+    for valores in sequencia[1:]:
+        desvio = np.array(valores) - media
+        media = media + alfa * desvio
+        variancia = (1 - alfa) * (variancia + alfa * desvio ** 2)
+
+    base = motor.linha_base('EQ0001')
+    np.testing.assert_allclose(base['media'].to_numpy(), media)
+    np.testing.assert_allclose(base['desvio'].to_numpy(), np.sqrt(variancia))
+
+
+def test_lote_com_equipamento_repetido_equivale_a_leituras_sequenciais():
+    valores = [[40.0, 20.0, 30.0], [50.0, 22.0, 28.0], [45.0, 21.0, 29.0]]
+    em_lote = MotorAnomaliasStreaming(aquecimento=1_000)
+    em_lote.processar(_leituras(['EQ0001', 'EQ0002', 'EQ0001'], valores))
+
+    sequencial = MotorAnomaliasStreaming(aquecimento=1_000)
+    for equipamento_id, linha in zip(['EQ0001', 'EQ0002', 'EQ0001'], valores):
+        sequencial.processar(_leituras([equipamento_id], [linha]))
+
+    for equipamento_id in ['EQ0001', 'EQ0002']:
+        pd.testing.assert_frame_equal(em_lote.linha_base(equipamento_id), sequencial.linha_base(equipamento_id))
+
+
+def test_desvio_grande_gera_alerta_sem_modelo():
+    motor = MotorAnomaliasStreaming(aquecimento=5)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        motor.processar(_leituras(['EQ0001'], [[40, 20, 30] + rng.normal(0, 1, 3)]))
+
+    anomalias = motor.processar(_leituras(['EQ0001'], [[90.0, 20.0, 30.0]]))
+    assert len(anomalias) == 1
+    assert anomalias['variavel'].iloc[0] == 'temperatura_c'
+
+
+def test_linha_base_nao_muda_com_leituras_posteriores():
+    motor = MotorAnomaliasStreaming(aquecimento=1_000)
+    motor.processar(_leituras(['EQ0001'], [[40.0, 20.0, 30.0]]))
+    base = motor.linha_base('EQ0001')
+
+    # Leituras novas (e equipamentos novos, que realocam os arrays) não alteram o retrato já lido
+    motor.processar(_leituras(['EQ0001'] + [f'EQ{i:04d}' for i in range(2, 2_000)], np.full((1_999, 3), 60.0)))
+
+    np.testing.assert_allclose(base['media'].to_numpy(), [40.0, 20.0, 30.0])
+    assert motor.linha_base('EQ0001')['media'].iloc[0] > 40.0
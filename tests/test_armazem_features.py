@@ -0,0 +1,63 @@
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from armazem_features import EscalaFeatures
+
+
+def test_combinar_equivale_ao_partial_fit():
+    rng = np.random.default_rng(0)
+    primeiro = rng.normal(50, 10, size=(300, 3))
+    segundo = rng.normal(60, 5, size=(120, 3))
+
+    escala = EscalaFeatures.ajustar(primeiro, ['a', 'b', 'c']).combinar(segundo)
+    referencia = StandardScaler().partial_fit(primeiro).partial_fit(segundo)
+
+    assert escala.num_amostras == 420
+    np.testing.assert_allclose(escala.media, referencia.mean_)
+    np.testing.assert_allclose(escala.variancia, referencia.var_)
+
+
+def test_combinar_lote_vazio_mantem_escala():
+    escala = EscalaFeatures.ajustar(np.arange(12.0).reshape(4, 3), ['a', 'b', 'c'])
+    assert escala.combinar(np.empty((0, 3))) is escala
+
+
+def test_aplicar_e_reverter():
+    X = np.column_stack([np.linspace(0, 100, 50), np.full(50, 7.0)])
+    escala = EscalaFeatures.ajustar(X, ['variavel', 'constante'])
+
+    padronizada = escala.aplicar(X)
+    assert padronizada.dtype == np.float32 and padronizada.flags.c_contiguous
+    np.testing.assert_allclose(padronizada[:, 0].mean(), 0, atol=1e-5)
+    # Colunas constantes não são divididas
+    np.testing.assert_allclose(padronizada[:, 1], 0)
+    np.testing.assert_allclose(escala.reverter(padronizada), X, rtol=1e-5, atol=1e-4)
+
+
+def test_aplicar_nao_altera_matriz_somente_leitura():
+    X = np.ones((4, 2), dtype=np.float32)
+    X.setflags(write=False)
+    escala = EscalaFeatures(['a', 'b'], [0.5, 0.5], [1.0, 1.0], 4)
+
+    padronizada = escala.aplicar(X, copiar=False)
+    assert padronizada is not X
+    np.testing.assert_array_equal(X, 1)
+
+
+def test_lotes_de_pontuacao_nao_expulsam_a_matriz_de_treino():
+    import pandas as pd
+    from armazem_features import ArmazemFeatures
+    from pipeline_features import PipelineFeatures
+
+    colunas = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 'disco_uso_percent', 'num_falhas']
+    rng = np.random.default_rng(2)
+    armazem = ArmazemFeatures(PipelineFeatures(colunas), capacidade_cache=1, capacidade_pontuacao=1)
+    historico = pd.DataFrame(rng.uniform(0, 100, size=(50, 5)), columns=colunas)
+    _, X, escala = armazem.preparar(historico)
+
+    for _ in range(5):
+        armazem.matriz(pd.DataFrame(rng.uniform(0, 100, size=(10, 5)), columns=colunas), escala)
+
+    _, X_novamente, _ = armazem.preparar(historico)
+    assert X_novamente is X
+    assert armazem.estatisticas()['entradas_cache_pontuacao'] == 1
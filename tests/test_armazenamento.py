@@ -0,0 +1,50 @@
+import pandas as pd
+
+import dashboard
+from armazenamento import ArmazenamentoTelemetria
+
+
+def _movimentacoes(timestamps):
+    return pd.DataFrame({
+        'equipamento_id': [f'EQ{i:04d}' for i in range(1, len(timestamps) + 1)],
+        'categoria': 'Notebook',
+        'timestamp': timestamps,
+        'tipo': 'SAIDA',
+        'quantidade': 1,
+        'localizacao_destino': 'Em Uso - TI',
+    })
+
+
+def test_timestamps_com_e_sem_fracao_voltam_no_mesmo_formato(tmp_path):
+    armazem = ArmazenamentoTelemetria(str(tmp_path))
+    hoje = pd.Timestamp.now().normalize()
+    # isoformat() sem timespec omite a fração quando microsecond == 0
+    timestamps = [(hoje + pd.Timedelta(hours=1)).isoformat(),
+                  (hoje + pd.Timedelta(hours=2, microseconds=250)).isoformat()]
+
+    armazem.anexar('movimentacoes', _movimentacoes(timestamps))
+    lidos = armazem.ler('movimentacoes').sort_values('timestamp')['timestamp'].tolist()
+
+    assert lidos == [(hoje + pd.Timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%S.000000'),
+                     (hoje + pd.Timedelta(hours=2, microseconds=250)).strftime('%Y-%m-%dT%H:%M:%S.%f')]
+
+
+def test_carregar_historico_gera_uma_vez_e_depois_le_do_armazenamento(tmp_path):
+    armazem = ArmazenamentoTelemetria(str(tmp_path))
+    agora = pd.Timestamp.now()
+    gerado = _movimentacoes([(agora - pd.Timedelta(days=d)).isoformat(timespec='microseconds')
+                             for d in [3, 2, 1]])
+    chamadas = []
+
+    def gerar():
+        chamadas.append(1)
+        return gerado
+
+    primeiro = dashboard.carregar_historico(armazem, 'movimentacoes', gerar, None)
+    segundo = dashboard.carregar_historico(armazem, 'movimentacoes', gerar, None)
+
+    assert len(chamadas) == 1
+    assert primeiro is gerado
+    assert segundo['timestamp'].tolist() == gerado['timestamp'].tolist()
+    assert segundo['equipamento_id'].tolist() == gerado['equipamento_id'].tolist()
+    assert 'dia' not in segundo
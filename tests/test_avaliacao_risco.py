@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from avaliacao_risco import AvaliadorRisco
+from iot_simulator import IoTSensorSimulator
+
+
+class ModeloFixo:
+    """Probabilidades fixas por equipamento, com muitos empates"""
+
+    def __init__(self, probabilidades):
+        self.probabilidades = probabilidades
+
+    def prever_lote(self, leituras):
+        probabilidade = leituras['equipamento_id'].map(self.probabilidades).to_numpy()
+        return pd.DataFrame({'probabilidade_falha': probabilidade,
+                             'nivel_risco': np.where(probabilidade > 0.7, 'Alto', 'Baixo')})
+
+
+def test_top_n_igual_a_ordenacao_completa_da_frota():
+    simulator = IoTSensorSimulator(num_equipamentos=400, rng=np.random.default_rng(0))
+    em_uso = simulator.obter_equipamentos_em_uso()
+    rng = np.random.default_rng(1)
+    probabilidades = dict(zip(em_uso['id'], rng.integers(0, 10, len(em_uso)) / 10))
+
+    avaliador = AvaliadorRisco(simulator, ModeloFixo(probabilidades), top_n=15, tamanho_lote=7)
+    ranking = avaliador.avaliar_frota()
+
+    # Ordenação estável: nos empates vale a ordem do cadastro
+    esperado = (em_uso.assign(probabilidade_falha=em_uso['id'].map(probabilidades))
+                .sort_values('probabilidade_falha', ascending=False, kind='stable').head(15))
+    assert len(em_uso) > 15 * 7
+    assert ranking['id'].tolist() == esperado['id'].tolist()
+    assert ranking['probabilidade_falha'].tolist() == esperado['probabilidade_falha'].tolist()
+    assert ranking['idade_meses'].tolist() == esperado['idade_meses'].tolist()
+    assert (ranking['nivel_risco'] == np.where(ranking['probabilidade_falha'] > 0.7, 'Alto', 'Baixo')).all()
+    assert ranking['tempo_ate_falha_horas'].isna().all()
+
+    assert avaliador.top_em_risco(probabilidade_minima=0.85)['id'].tolist() == \
+        esperado.loc[esperado['probabilidade_falha'] > 0.85, 'id'].tolist()
+    assert avaliador.top_em_risco(n=3)['id'].tolist() == esperado['id'].head(3).tolist()
@@ -0,0 +1,83 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from banco_estoque import BancoEstoque
+from registro_equipamentos import RegistroEquipamentos, formatar_id
+
+
+@pytest.fixture
+def banco():
+    banco = BancoEstoque()
+    banco.carregar_equipamentos(RegistroEquipamentos.gerar(500, rng=np.random.default_rng(0)).para_dataframe())
+    yield banco
+    banco.fechar()
+
+
+def test_mover_id_desconhecido_desfaz_a_transacao(banco):
+    antes = banco.para_dataframe()
+
+    with pytest.raises(KeyError):
+        banco.mover('EQ9999', 'Em Uso - TI')
+
+    pd.testing.assert_frame_equal(banco.para_dataframe(), antes)
+    assert len(banco.historico_movimentacoes('EQ9999')) == 0
+    # A conexão volta ao pool sem transação aberta
+    assert banco.mover('EQ0001', 'Em Uso - TI')['localizacao_destino'] == 'Em Uso - TI'
+
+
+def test_agregados_iguais_aos_do_pandas(banco):
+    df = banco.para_dataframe()
+
+    estoque = (df[df['localizacao'].str.startswith('Almoxarifado')]
+               .groupby('categoria', observed=True).size().rename('quantidade').reset_index())
+    por_estado = df.groupby('estado', observed=True).size().rename('quantidade').reset_index()
+
+    pd.testing.assert_frame_equal(banco.obter_nivel_estoque_atual(), estoque, check_dtype=False)
+    pd.testing.assert_frame_equal(banco.contar_por_estado(), por_estado, check_dtype=False)
+    assert banco.obter_equipamentos_em_uso()['id'].tolist() == \
+        df.loc[df['localizacao'].str.startswith('Em Uso'), 'id'].tolist()
+
+
+def test_ids_em_ordem_numerica():
+    registro = RegistroEquipamentos.gerar(3, rng=np.random.default_rng(0))
+    df = registro.para_dataframe(categorico=False)
+    df['id'] = [formatar_id(numero) for numero in [10_000, 1_001, 2]]
+    banco = BancoEstoque()
+    try:
+        banco.carregar_equipamentos(df)
+        assert banco.para_dataframe()['id'].tolist() == ['EQ0002', 'EQ1001', 'EQ10000']
+    finally:
+        banco.fechar()
+
+
+def test_pool_compartilhado_entre_threads(banco):
+    erros = []
+    ids = [formatar_id(numero) for numero in range(1, 501)]
+
+    def escrever(deslocamento):
+        for i in range(100):
+            try:
+                banco.mover(ids[(deslocamento + i) % len(ids)], 'Em Uso - RH' if i % 2 else 'Almoxarifado B')
+            except Exception as erro:
+                erros.append(erro)
+
+    def ler():
+        for _ in range(100):
+            try:
+                banco.obter_nivel_estoque_atual()
+                banco.para_dataframe()
+            except Exception as erro:
+                erros.append(erro)
+
+    threads = [threading.Thread(target=escrever, args=(deslocamento,)) for deslocamento in (0, 250)]
+    threads += [threading.Thread(target=ler) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    assert banco.consultar('SELECT COUNT(*) AS n FROM movimentacoes')['n'].iloc[0] == 200
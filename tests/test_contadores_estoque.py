@@ -0,0 +1,94 @@
+import pandas as pd
+
+from contadores_estoque import ContadoresEstoque
+
+
+def _cadastro():
+    return pd.DataFrame({
+        'id': ['EQ0001', 'EQ0002', 'EQ0003', 'EQ0004'],
+        'categoria': ['Notebook', 'Notebook', 'Monitor', 'Monitor'],
+        'localizacao': ['Almoxarifado A', 'Em Uso - TI', 'Almoxarifado A', 'Manutenção'],
+        'estado': ['Bom', 'Bom', 'Atenção', 'Crítico'],
+    })
+
+
+def test_contagens_iniciais():
+    contadores = ContadoresEstoque.de_dataframe(_cadastro())
+
+    assert contadores.total == 4
+    assert contadores.total_em_uso == 1
+    assert contadores.quantidade_em_estoque('Notebook') == 1
+    assert contadores.quantidade_em_estoque('Monitor') == 1
+    assert contadores.quantidade_por_estado('Bom') == 2
+
+
+def test_eventos_mantem_contagens_iguais_a_recontagem():
+    cadastro = _cadastro()
+    contadores = ContadoresEstoque.de_dataframe(cadastro)
+
+    cadastro.loc[0, 'localizacao'] = 'Em Uso - RH'
+    contadores.registrar_movimentacao('Notebook', 'Almoxarifado A', 'Em Uso - RH')
+    cadastro.loc[3, 'estado'] = 'Bom'
+    contadores.registrar_estado('Crítico', 'Bom')
+
+    assert contadores.quantidade_em_estoque('Notebook') == 0
+    assert contadores.total_em_uso == 2
+    assert contadores.verificar_consistencia(cadastro, corrigir=False) == []
+
+
+def test_verificar_consistencia_corrige_divergencias():
+    cadastro = _cadastro()
+    contadores = ContadoresEstoque.de_dataframe(cadastro)
+    versao = contadores.versao
+
+    # Movimentação aplicada ao cadastro sem passar pelos contadores
+    cadastro.loc[2, 'localizacao'] = 'Em Uso - TI'
+    divergencias = contadores.verificar_consistencia(cadastro)
+
+    assert ('estoque_por_categoria', 'Monitor', 1, 0) in divergencias
+    assert contadores.quantidade_em_estoque('Monitor') == 0
+    assert contadores.versao == versao + 1
+
+
+def test_nivel_estoque_omite_categorias_zeradas():
+    contadores = ContadoresEstoque.de_dataframe(_cadastro())
+    contadores.registrar_movimentacao('Monitor', 'Almoxarifado A', 'Em Uso - TI')
+
+    nivel = contadores.nivel_estoque()
+    assert nivel.to_dict('records') == [{'categoria': 'Notebook', 'quantidade': 1}]
+
+
+def test_verificacao_concorrente_com_movimentacoes_sem_falsas_divergencias():
+    import threading
+    from iot_simulator import IoTSensorSimulator
+
+    simulator = IoTSensorSimulator(num_equipamentos=300)
+    ids = simulator.equipamentos['id'].tolist()
+    parar = threading.Event()
+
+    def movimentar():
+        i = 0
+        while not parar.is_set():
+            simulator.simular_movimentacao(ids[i % len(ids)], 'Em Uso - RH' if i % 2 else 'Almoxarifado A')
+            simulator.atualizar_estado(ids[(i * 7) % len(ids)], 'Atenção' if i % 3 else 'Bom')
+            i += 1
+
+    trabalhador = threading.Thread(target=movimentar)
+    trabalhador.start()
+    try:
+        divergencias = [simulator.contadores.verificar_consistencia(simulator.equipamentos, corrigir=False)
+                        for _ in range(50)]
+    finally:
+        parar.set()
+        trabalhador.join()
+
+    assert all(lista == [] for lista in divergencias)
+
+
+def test_instantaneo_e_uma_copia():
+    contadores = ContadoresEstoque.de_dataframe(_cadastro())
+    copia = contadores.instantaneo()
+    contadores.registrar_estado('Bom', 'Crítico')
+
+    assert copia['por_estado']['Crítico'] == 1
+    assert contadores.quantidade_por_estado('Crítico') == 2
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import dashboard
+from dashboard import SnapshotDashboard
+from iot_simulator import IoTSensorSimulator
+
+
+@pytest.fixture
+def painel(monkeypatch):
+    simulator = IoTSensorSimulator(num_equipamentos=50, rng=np.random.default_rng(0))
+    monkeypatch.setattr(dashboard, 'simulator', simulator)
+    painel = SnapshotDashboard(intervalos_verificacao=1)
+    # Seções que dependem dos modelos ficam fixas; estado e categoria vêm dos contadores
+    fixas = {
+        'manutencao': pd.DataFrame({'ID': ['EQ0001'], 'Prob. Falha': ['80.0%']}),
+        'demanda': pd.DataFrame({'Categoria': ['Notebook'], 'Demanda Prevista': [3], 'Min': [1], 'Max': [5]}),
+        'alertas': ((), 0, 0, (), 0),
+    }
+    for secao, dados in fixas.items():
+        monkeypatch.setattr(painel, f'_calcular_{secao}', lambda dados=dados: dados)
+    monkeypatch.setattr(dashboard, 'painel', painel)
+    return painel
+
+
+def _id_no_almoxarifado(simulator):
+    equipamentos = simulator.equipamentos
+    return equipamentos.loc[equipamentos['localizacao'].str.startswith('Almoxarifado'), 'id'].iloc[0]
+
+
+def test_versoes_so_mudam_nas_secoes_alteradas(painel):
+    primeiro = painel.construir()
+    assert primeiro['versoes'] == dict.fromkeys(SnapshotDashboard.SECOES, 1)
+
+    assert painel.construir()['versoes'] == primeiro['versoes']
+
+    dashboard.simulator.simular_movimentacao(_id_no_almoxarifado(dashboard.simulator), 'Em Uso - TI')
+    versoes = painel.construir()['versoes']
+
+    assert versoes['categoria'] == 2
+    assert {secao: versoes[secao] for secao in ['estado', 'manutencao', 'demanda', 'alertas']} == \
+        dict.fromkeys(['estado', 'manutencao', 'demanda', 'alertas'], 1)
+
+
+def test_callback_pula_secoes_ja_renderizadas(painel):
+    import dash
+
+    versoes = dict(painel.construir()['versoes'])
+    assert dashboard.atualizar_dashboard(1, versoes) == [dash.no_update] * (len(SnapshotDashboard.SECOES) + 1)
+
+    equipamentos = dashboard.simulator.equipamentos
+    equipamento_id = equipamentos.loc[equipamentos['estado'] != 'Crítico', 'id'].iloc[0]
+    dashboard.simulator.atualizar_estado(equipamento_id, 'Crítico')
+    painel.construir()
+    saidas = dashboard.atualizar_dashboard(2, versoes)
+
+    renderizadas = [secao for secao, saida in zip(SnapshotDashboard.SECOES, saidas) if saida is not dash.no_update]
+    assert renderizadas == ['estado']
+    assert saidas[-1] == painel.atual['versoes'] and saidas[-1]['estado'] == 2
+
+    # Primeira carga (sem versões no navegador): todas as seções são renderizadas
+    assert dash.no_update not in dashboard.atualizar_dashboard(0, None)
@@ -0,0 +1,34 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ingestao import MotorIngestao
+from iot_simulator import IoTSensorSimulator
+
+
+def test_lotes_entregues_aos_consumidores():
+    simulator = IoTSensorSimulator(num_equipamentos=20, rng=np.random.default_rng(0))
+    lotes = []
+    motor = MotorIngestao(simulator, intervalo_segundos=0.05, espera_lote_segundos=0.05,
+                          consumidores=[lotes.append])
+
+    estatisticas = asyncio.run(motor.executar(duracao_segundos=0.3))
+
+    assert estatisticas['leituras_consumidas'] == sum(len(lote) for lote in lotes) > 0
+    assert estatisticas['sensores_com_falha'] == 0
+
+
+def test_falha_de_sensor_e_levantada(caplog):
+    simulator = IoTSensorSimulator(num_equipamentos=20, rng=np.random.default_rng(0))
+    lotes = []
+    motor = MotorIngestao(simulator, equipamento_ids=['EQ0001', 'EQ9999'], intervalo_segundos=0.05,
+                          espera_lote_segundos=0.05, consumidores=[lotes.append])
+
+    with pytest.raises(KeyError, match='EQ9999'):
+        asyncio.run(motor.executar(duracao_segundos=0.3))
+
+    assert motor.sensores_com_falha == 1
+    assert 'EQ9999' in caplog.text
+    # O sensor saudável continuou publicando
+    assert all(set(lote['equipamento_id']) == {'EQ0001'} for lote in lotes) and lotes
@@ -0,0 +1,50 @@
+import pytest
+
+from instrumentacao import RegistroMetricas
+
+
+def test_exportacao_no_formato_do_prometheus():
+    registro = RegistroMetricas(prefixo='teste')
+    registro.contador('chamadas_total', 'Chamadas', ('operacao',)).incrementar(3, operacao='b')
+    registro.contador('chamadas_total', 'Chamadas', ('operacao',)).incrementar(operacao='a')
+    registro.medidor('fila', 'Tamanho da fila').definir(7)
+    duracao = registro.histograma('duracao_segundos', 'Duração', ('operacao',), baldes=(0.1, 1.0))
+    for valor in [0.05, 0.5, 0.5, 2.0]:
+        duracao.observar(valor, operacao='x')
+
+    assert registro.exportar() == '\n'.join([
+        '# HELP teste_chamadas_total Chamadas',
+        '# TYPE teste_chamadas_total counter',
+        'teste_chamadas_total{operacao="a"} 1',
+        'teste_chamadas_total{operacao="b"} 3',
+        '# HELP teste_fila Tamanho da fila',
+        '# TYPE teste_fila gauge',
+        'teste_fila 7',
+        '# HELP teste_duracao_segundos Duração',
+        '# TYPE teste_duracao_segundos histogram',
+        'teste_duracao_segundos_bucket{operacao="x",le="0.1"} 1',
+        'teste_duracao_segundos_bucket{operacao="x",le="1"} 3',
+        'teste_duracao_segundos_bucket{operacao="x",le="+Inf"} 4',
+        'teste_duracao_segundos_sum{operacao="x"} 3.05',
+        'teste_duracao_segundos_count{operacao="x"} 4',
+    ]) + '\n'
+
+
+def test_valores_de_rotulo_e_descricao_escapados():
+    registro = RegistroMetricas(prefixo='')
+    contador = registro.contador('erros_total', 'Erros\\n por "origem"\nsegunda linha', ('origem',))
+    contador.incrementar(origem='C:\\dados\\"sensor"\nlinha 2')
+
+    ajuda, _, serie = registro.exportar().splitlines()
+
+    assert ajuda == '# HELP erros_total Erros\\\\n por "origem"\\nsegunda linha'
+    assert serie == 'erros_total{origem="C:\\\\dados\\\\\\"sensor\\"\\nlinha 2"} 1'
+
+
+def test_metrica_registrada_com_outro_tipo():
+    registro = RegistroMetricas()
+    registro.contador('itens', 'Itens')
+
+    assert registro.contador('itens', 'Itens') is registro.contador('itens', 'Itens')
+    with pytest.raises(ValueError):
+        registro.medidor('itens', 'Itens')
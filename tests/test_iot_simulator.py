@@ -0,0 +1,148 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import iot_simulator
+from iot_simulator import COLUNAS_MOVIMENTACOES, IoTSensorSimulator
+from registro_equipamentos import ESTADOS
+
+# Faixas das versões escalares originais (random.uniform por estado): (mínimo, máximo)
+FAIXAS_ORIGINAIS = {
+    'temperatura_c': {'Novo': (35, 40), 'Bom': (35, 40), 'Atenção': (40, 50), 'Crítico': (50, 60)},
+    'cpu_uso_percent': {'Novo': (10, 40), 'Bom': (10, 40), 'Atenção': (40, 70), 'Crítico': (70, 100)},
+    'ram_uso_percent': {'Novo': (20, 50), 'Bom': (20, 50), 'Atenção': (50, 80), 'Crítico': (80, 100)},
+}
+
+
+def test_simular_tempo_real_fora_de_loop_retorna_leituras():
+    simulator = IoTSensorSimulator(num_equipamentos=40)
+
+    leituras = simulator.simular_tempo_real(duracao_segundos=0.3, intervalo_segundos=0.05, amostra=3)
+
+    assert len(leituras) > 0
+    assert leituras['equipamento_id'].nunique() <= 3
+
+
+def test_simular_tempo_real_com_loop_rodando_retorna_tarefa():
+    simulator = IoTSensorSimulator(num_equipamentos=40)
+    em_uso = simulator.equipamentos.loc[simulator.equipamentos['em_uso'] == True, 'id']
+
+    async def em_notebook():
+        # Como no Jupyter: a chamada síncrona acontece com um loop já rodando
+        tarefa = simulator.simular_tempo_real(duracao_segundos=0.3, intervalo_segundos=0.05, amostra=None)
+        assert isinstance(tarefa, asyncio.Task)
+        return await tarefa
+
+    leituras = asyncio.run(em_notebook())
+    assert set(leituras['equipamento_id']) <= set(em_uso)
+    assert leituras['equipamento_id'].nunique() > 3
+
+
+def test_num_falhas_acumulado_nunca_diminui():
+    simulator = IoTSensorSimulator(num_equipamentos=40, rng=np.random.default_rng(0))
+
+    historico = pd.concat(simulator.gerar_dados_historicos_em_lotes(dias=30, tamanho_lote=100), ignore_index=True)
+    por_equipamento = historico.groupby('equipamento_id', sort=False)['num_falhas']
+    assert (por_equipamento.diff().dropna() >= 0).all()
+    assert (por_equipamento.last() > por_equipamento.first()).any()
+
+    equipamento_id = historico['equipamento_id'].iloc[0]
+    leituras = [simulator.gerar_metricas_uso(equipamento_id)['num_falhas'] for _ in range(5)]
+    assert leituras == sorted(leituras)
+
+
+@pytest.mark.parametrize('estado', ESTADOS)
+def test_metricas_uso_e_lote_seguem_as_faixas_originais(estado):
+    simulator = IoTSensorSimulator(num_equipamentos=20, rng=np.random.default_rng(0))
+    equipamento_id = simulator.equipamentos['id'].iloc[0]
+    simulator.atualizar_estado(equipamento_id, estado)
+    equipamento = simulator.equipamentos.iloc[[0]]
+
+    individuais = pd.DataFrame([simulator.gerar_metricas_uso(equipamento_id) for _ in range(500)])
+    lote = simulator.gerar_metricas_lote(equipamento, num_leituras=500)
+
+    for coluna, faixas in FAIXAS_ORIGINAIS.items():
+        minimo, maximo = faixas[estado]
+        for valores in [individuais[coluna].to_numpy(), lote[coluna].ravel()]:
+            assert minimo <= valores.min() and valores.max() <= maximo
+            # Uniforme na faixa: média no centro e quase toda a faixa coberta
+            assert abs(valores.mean() - (minimo + maximo) / 2) < 0.05 * (maximo - minimo)
+            assert valores.max() - valores.min() > 0.95 * (maximo - minimo)
+
+    idade = equipamento['idade_meses'].iloc[0]
+    for valores in [individuais['disco_uso_percent'].to_numpy(), lote['disco_uso_percent'].ravel()]:
+        assert min(100, idade * 1.5) <= valores.min() and valores.max() <= min(100, idade * 1.5 + 20)
+
+
+def test_metricas_uso_reprodutiveis_com_a_semente():
+    def leituras(semente):
+        simulator = IoTSensorSimulator(num_equipamentos=30, rng=np.random.default_rng(semente))
+        ids = simulator.equipamentos['id'].tolist()
+        leituras = [simulator.gerar_metricas_uso(equipamento_id) for equipamento_id in ids]
+        leituras.append(simulator.gerar_sensor_temperatura_ambiente('Almoxarifado A'))
+        lote = next(simulator.simular_tempo_real_em_lotes(duracao_segundos=1, intervalo_segundos=0, amostra=5))
+        return ([{chave: valor for chave, valor in leitura.items() if chave != 'timestamp'} for leitura in leituras],
+                lote.drop(columns='timestamp'))
+
+    primeiras, lote_a = leituras(7)
+    segundas, lote_b = leituras(7)
+
+    assert primeiras == segundas
+    pd.testing.assert_frame_equal(lote_a, lote_b)
+    assert primeiras != leituras(8)[0]
+
+
+class _DatetimeFixo(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 3, 1, 12, 0, 0, 123456)
+
+
+def test_historico_em_lotes_igual_ao_de_uma_vez(monkeypatch):
+    monkeypatch.setattr(iot_simulator, 'datetime', _DatetimeFixo)
+    simulator = IoTSensorSimulator(num_equipamentos=40, rng=np.random.default_rng(0))
+
+    unico = simulator.gerar_dados_historicos(dias=20, rng=np.random.default_rng(1))
+    lotes = list(simulator.gerar_dados_historicos_em_lotes(dias=20, tamanho_lote=150, rng=np.random.default_rng(1)))
+    em_lotes = pd.concat(lotes, ignore_index=True)
+
+    assert len(lotes) > 1
+    assert list(em_lotes.columns) == list(unico.columns)
+    for coluna in ['equipamento_id', 'timestamp', 'estado', 'idade_meses']:
+        assert em_lotes[coluna].tolist() == unico[coluna].tolist()
+    # O contador de falhas continua de um lote para o seguinte
+    for historico in [unico, em_lotes]:
+        assert (historico.groupby('equipamento_id', sort=False)['num_falhas'].diff().dropna() >= 0).all()
+    for antes, depois in zip(lotes, lotes[1:]):
+        ultima = antes[antes['timestamp'] == antes['timestamp'].iloc[-1]].set_index('equipamento_id')['num_falhas']
+        primeira = depois[depois['timestamp'] == depois['timestamp'].iloc[0]].set_index('equipamento_id')['num_falhas']
+        assert (primeira.loc[ultima.index] >= ultima).all()
+
+
+def test_movimentacoes_em_lotes_iguais_as_de_uma_vez(monkeypatch):
+    monkeypatch.setattr(iot_simulator, 'datetime', _DatetimeFixo)
+    simulator = IoTSensorSimulator(num_equipamentos=40, rng=np.random.default_rng(0))
+
+    unico = simulator.gerar_movimentacoes_historicas(dias=30, num_movimentacoes=95, rng=np.random.default_rng(1))
+    em_lotes = pd.concat(simulator.gerar_movimentacoes_historicas_em_lotes(
+        dias=30, tamanho_lote=20, num_movimentacoes=95, rng=np.random.default_rng(1)))
+
+    assert list(unico.columns) == list(em_lotes.columns) == COLUNAS_MOVIMENTACOES
+    assert em_lotes.index.tolist() == unico.index.tolist() == list(range(95))
+    assert em_lotes['timestamp'].tolist() == unico['timestamp'].tolist() == sorted(unico['timestamp'])
+    for movimentacoes in [unico, em_lotes]:
+        categorias = simulator.equipamentos.set_index('id')['categoria']
+        assert (movimentacoes['categoria'].to_numpy() == categorias.loc[movimentacoes['equipamento_id']].to_numpy()).all()
+        assert ((movimentacoes['tipo'] == 'SAIDA') == movimentacoes['localizacao_destino'].str.startswith('Em Uso')).all()
+
+
+def test_sem_movimentacoes_retorna_dataframe_vazio():
+    simulator = IoTSensorSimulator(num_equipamentos=10, rng=np.random.default_rng(0))
+
+    assert list(simulator.gerar_movimentacoes_historicas_em_lotes(dias=30, num_movimentacoes=0)) == []
+    vazio = simulator.gerar_movimentacoes_historicas(dias=30, num_movimentacoes=0)
+
+    assert len(vazio) == 0 and list(vazio.columns) == COLUNAS_MOVIMENTACOES
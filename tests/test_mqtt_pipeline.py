@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from iot_simulator import IoTSensorSimulator
+from mqtt_pipeline import (TIPO_AMBIENTE, TIPO_METRICAS, codificar_ambiente, codificar_metricas,
+                           decodificar)
+
+
+def test_metricas_ida_e_volta():
+    leituras = pd.DataFrame({
+        'equipamento_id': ['EQ0001', 'EQ0420'],
+        'timestamp': ['2025-01-01T08:00:00.000000', '2025-01-01T08:00:05.250000'],
+        'temperatura_c': [45.25, 61.5],
+        'cpu_uso_percent': [12.5, 88.75],
+        'ram_uso_percent': [40.0, 73.25],
+        'disco_uso_percent': [55.5, 91.0],
+        'bateria_saude_percent': [98.5, 70.25],
+        'num_falhas': [0, 3],
+        'estado': ['Bom', 'Crítico'],
+        'idade_meses': [12, 47.5],
+    })
+
+    tipo, _, decodificadas = decodificar(codificar_metricas(leituras))
+
+    assert tipo == TIPO_METRICAS
+    pd.testing.assert_frame_equal(decodificadas, leituras, check_dtype=False)
+
+
+def test_metricas_sem_idade_voltam_com_idade_ausente():
+    leituras = pd.DataFrame({
+        'equipamento_id': ['EQ0001'],
+        'timestamp': ['2025-01-01T08:00:00.000000'],
+        'temperatura_c': [45.25],
+        'cpu_uso_percent': [12.5],
+        'ram_uso_percent': [40.0],
+        'disco_uso_percent': [55.5],
+        'bateria_saude_percent': [np.nan],
+        'num_falhas': [1],
+        'estado': ['Atenção'],
+    })
+
+    _, _, decodificadas = decodificar(codificar_metricas(leituras))
+
+    assert decodificadas['idade_meses'].isna().all()
+    pd.testing.assert_frame_equal(decodificadas.drop(columns='idade_meses'), leituras, check_dtype=False)
+
+
+def test_metricas_com_estado_desconhecido():
+    leituras = {
+        'equipamento_id': 'EQ0001', 'timestamp': '2025-01-01T08:00:00', 'temperatura_c': 45.0,
+        'cpu_uso_percent': 12.5, 'ram_uso_percent': 40.0, 'disco_uso_percent': 55.5,
+        'bateria_saude_percent': None, 'num_falhas': 1, 'estado': 'Descartado', 'idade_meses': 3,
+    }
+
+    with pytest.raises(ValueError, match='Estado'):
+        codificar_metricas([leituras])
+
+
+def test_metricas_do_simulador_ida_e_volta():
+    simulator = IoTSensorSimulator(num_equipamentos=5, rng=np.random.default_rng(0))
+    leituras = pd.DataFrame([simulator.gerar_metricas_uso(f'EQ{i:04d}') for i in range(1, 6)])
+    # Bateria ausente (None fora dos notebooks) volta como NaN
+    leituras['bateria_saude_percent'] = leituras['bateria_saude_percent'].astype(float)
+
+    _, _, decodificadas = decodificar(codificar_metricas(leituras))
+
+    pd.testing.assert_frame_equal(decodificadas[leituras.columns], leituras, check_dtype=False, atol=1e-2)
+
+
+def test_ambiente_ida_e_volta():
+    leituras = pd.DataFrame({
+        'localizacao': ['Almoxarifado A', 'Em Uso - RH'],
+        'timestamp': ['2025-01-01T08:00:00.000000', '2025-01-01T08:10:00.000000'],
+        'temperatura_c': [22.5, 24.75],
+        'umidade_percent': [45.0, 51.5],
+    })
+
+    tipo, _, decodificadas = decodificar(codificar_ambiente(leituras))
+
+    assert tipo == TIPO_AMBIENTE
+    pd.testing.assert_frame_equal(decodificadas, leituras, check_dtype=False)
+
+
+def test_payload_desconhecido():
+    with pytest.raises(ValueError):
+        decodificar(b'XX' + bytes(32))
+
+
+def test_lote_vazio():
+    _, _, decodificadas = decodificar(codificar_metricas(pd.DataFrame(columns=[
+        'equipamento_id', 'timestamp', 'temperatura_c', 'cpu_uso_percent', 'ram_uso_percent',
+        'disco_uso_percent', 'bateria_saude_percent', 'num_falhas', 'estado'])))
+    assert len(decodificadas) == 0
+    assert np.issubdtype(decodificadas['num_falhas'].dtype, np.integer)
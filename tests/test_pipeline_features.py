@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline_features import PipelineFeatures
+
+FEATURES = ['temperatura_c', 'cpu_uso_percent', 'ram_uso_percent', 'disco_uso_percent', 'num_falhas']
+
+
+def test_de_array_aceita_matriz_pronta_ou_leituras_brutas():
+    pipeline = PipelineFeatures(FEATURES)
+    matriz = np.zeros((3, len(pipeline.colunas)))
+    np.testing.assert_array_equal(pipeline.de_array(matriz, pipeline.colunas), matriz)
+
+    leituras = pipeline.de_array(np.ones((len(pipeline.colunas), 5)), pipeline.colunas)
+    assert isinstance(leituras, pd.DataFrame)
+    assert list(leituras.columns) == FEATURES
+
+
+def test_de_array_inclui_colunas_externas_ao_pipeline():
+    pipeline = PipelineFeatures(FEATURES)
+    colunas = pipeline.colunas + ['idade_meses']
+    assert pipeline.colunas_entrada(colunas) == FEATURES + ['idade_meses']
+    assert list(pipeline.de_array(np.ones((2, 6)), colunas).columns) == FEATURES + ['idade_meses']
+
+
+@pytest.mark.parametrize('formato', [(3, 7), (5,), (2, 3, 5)])
+def test_de_array_rejeita_outros_formatos(formato):
+    pipeline = PipelineFeatures(FEATURES)
+    with pytest.raises(ValueError):
+        pipeline.de_array(np.ones(formato), pipeline.colunas)
+
+
+def test_horas_desde_falha_conta_a_partir_do_aumento_de_num_falhas():
+    leituras = pd.DataFrame({
+        'equipamento_id': ['EQ0001'] * 5 + ['EQ0002'] * 2,
+        'timestamp': pd.date_range('2025-01-01', periods=5, freq='6h').append(
+            pd.date_range('2025-01-01', periods=2, freq='6h')).strftime('%Y-%m-%dT%H:%M:%S'),
+        **{coluna: 1.0 for coluna in FEATURES[:-1]},
+        # EQ0001: total acumulado que aumenta na segunda e na quarta leitura
+        'num_falhas': [2, 3, 3, 4, 4, 5, 5],
+    })
+
+    horas = PipelineFeatures(FEATURES).transformar(leituras)['horas_desde_falha'].to_numpy()
+
+    # A primeira leitura de cada equipamento não é falha nova, mesmo com num_falhas > 0
+    sem_falha = 24 * 365
+    np.testing.assert_array_equal(horas, [sem_falha, 0, 6, 0, 6, sem_falha, sem_falha])
+
+
+@pytest.mark.parametrize('leituras_por_lote', [1, 5])
+def test_historico_recente_reproduz_features_do_historico_completo(leituras_por_lote):
+    from iot_simulator import IoTSensorSimulator
+    from pipeline_features import HistoricoRecente
+
+    historico = IoTSensorSimulator(num_equipamentos=20).gerar_dados_historicos(dias=15)
+    # Falhas acumuladas por equipamento, para haver eventos antes das leituras guardadas
+    historico['num_falhas'] = historico.groupby('equipamento_id')['num_falhas'].cumsum()
+    pipeline = PipelineFeatures(FEATURES)
+    esperado = pipeline.transformar(historico, usar_cache=False)
+
+    recente = HistoricoRecente(pipeline)
+    # Lotes com uma ou várias leituras de cada equipamento, em ordem de tempo
+    instantes = pd.Index(sorted(historico['timestamp'].unique()))
+    lote_de = instantes.get_indexer(historico['timestamp']) // leituras_por_lote
+    obtido = pd.concat([recente.transformar(lote) for _, lote in historico.groupby(lote_de)])
+    assert recente.num_equipamentos == historico['equipamento_id'].nunique()
+
+    pd.testing.assert_frame_equal(obtido.loc[esperado.index], esperado)
+
+
+def test_horas_ate_proxima_falha():
+    leituras = pd.DataFrame({
+        'equipamento_id': ['EQ0001'] * 4 + ['EQ0002'] * 2,
+        'timestamp': pd.date_range('2025-01-01', periods=4, freq='6h').append(
+            pd.date_range('2025-01-01', periods=2, freq='6h')).strftime('%Y-%m-%dT%H:%M:%S'),
+        **{coluna: 1.0 for coluna in FEATURES[:-1]},
+        'num_falhas': [0, 0, 1, 1, 3, 3],
+    })
+
+    horas = PipelineFeatures(FEATURES).horas_ate_proxima_falha(leituras).to_numpy()
+
+    # Depois da última falha (e em equipamentos sem falha) o tempo não é observado
+    np.testing.assert_array_equal(horas, [12, 6, np.nan, np.nan, np.nan, np.nan])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from iot_simulator import IoTSensorSimulator
+from registro_equipamentos import RegistroEquipamentos, categorizar, codificar_id
+
+
+@pytest.mark.parametrize('equipamento_id', ['XX0001', 'EQ', 'EQabc', 'EQ-1', 'EQ 12', 'EQ²', 1, None])
+def test_codificar_id_invalido_levanta_key_error(equipamento_id):
+    with pytest.raises(KeyError):
+        codificar_id(equipamento_id)
+
+
+def test_obter_id_invalido_levanta_key_error():
+    registro = RegistroEquipamentos.gerar(10, rng=np.random.default_rng(0))
+
+    assert codificar_id('EQ0007') == 7
+    with pytest.raises(KeyError):
+        registro.obter('EQxyz')
+
+
+def test_para_dataframe_categorico_menor_e_com_os_mesmos_valores():
+    registro = RegistroEquipamentos.gerar(5_000, rng=np.random.default_rng(0))
+    categorico = registro.para_dataframe()
+    objeto = registro.para_dataframe(categorico=False)
+
+    for coluna in ['categoria', 'fabricante', 'localizacao', 'estado']:
+        assert isinstance(categorico[coluna].dtype, pd.CategoricalDtype)
+        assert categorico[coluna].tolist() == objeto[coluna].tolist()
+    assert list(categorico.columns) == list(objeto.columns)
+    assert (categorico.memory_usage(deep=True).sum()
+            < objeto.memory_usage(deep=True).sum())
+
+
+def test_categorizar_inclui_valores_desconhecidos():
+    df = pd.DataFrame({
+        'categoria': ['Notebook', 'Tablet'],
+        'fabricante': ['Dell', 'HP'],
+        'localizacao': ['Almoxarifado A', 'Em Uso - RH'],
+        'estado': ['Bom', 'Bom'],
+    })
+
+    categorizado = categorizar(df)
+
+    assert categorizado['categoria'].tolist() == ['Notebook', 'Tablet']
+    assert 'Tablet' in categorizado['categoria'].cat.categories
+
+
+def test_simulador_usa_colunas_categoricas_e_aceita_valores_novos():
+    simulator = IoTSensorSimulator(num_equipamentos=50, rng=np.random.default_rng(0))
+    assert isinstance(simulator.equipamentos['localizacao'].dtype, pd.CategoricalDtype)
+
+    simulator.simular_movimentacao('EQ0001', 'Em Uso - Financeiro')
+    simulator.atualizar_estado('EQ0001', 'Descartado')
+
+    assert simulator.obter_equipamento('EQ0001')['localizacao'] == 'Em Uso - Financeiro'
+    assert simulator.obter_equipamento('EQ0001')['estado'] == 'Descartado'
+    assert simulator.contadores.verificar_consistencia(simulator.equipamentos, corrigir=False) == []
+
+
+def test_nivel_estoque_sem_categorias_vazias():
+    simulator = IoTSensorSimulator(num_equipamentos=50, rng=np.random.default_rng(0))
+    equipamentos = simulator.equipamentos
+    categoria = equipamentos['categoria'].iloc[0]
+    for equipamento_id in equipamentos.loc[equipamentos['categoria'] == categoria, 'id']:
+        simulator.simular_movimentacao(equipamento_id, 'Em Uso - TI')
+
+    estoque = simulator.obter_nivel_estoque_atual()
+
+    assert categoria in simulator.equipamentos['categoria'].cat.categories
+    assert categoria not in estoque['categoria'].tolist()
+    assert (estoque['quantidade'] > 0).all()
+    pd.testing.assert_frame_equal(
+        estoque.astype({'categoria': str}).sort_values('categoria', ignore_index=True),
+        simulator.contadores.nivel_estoque(), check_dtype=False)
@@ -0,0 +1,81 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_models import ClassificacaoEstado, DeteccaoAnomalias, ManutencaoPreditiva, RepositorioModelos, TempoAteFalha
+from iot_simulator import IoTSensorSimulator
+from treinamento import OrquestradorTreinamento
+
+
+@pytest.fixture(scope='module')
+def df_metricas():
+    return IoTSensorSimulator(num_equipamentos=30, rng=np.random.default_rng(0)).gerar_dados_historicos(dias=10)
+
+
+def test_features_gravadas_uma_vez_e_mapeadas_em_memoria(df_metricas, tmp_path, monkeypatch):
+    preparos, matrizes, diretorios = [], {}, []
+    compartilhar = OrquestradorTreinamento._compartilhar_features
+    mkdtemp = tempfile.mkdtemp
+
+    def compartilhar_espiao(self, df, diretorio, preparo):
+        preparos.append(preparo)
+        return compartilhar(self, df, diretorio, preparo)
+
+    def mkdtemp_espiao(*args, **kwargs):
+        diretorios.append(mkdtemp(*args, **kwargs))
+        return diretorios[-1]
+
+    def espiar(classe):
+        treinar_arrays = classe.treinar_arrays
+
+        def treinar_arrays_espiao(self, X, *args, **kwargs):
+            matrizes[classe.__name__] = X
+            return treinar_arrays(self, X, *args, **kwargs)
+        monkeypatch.setattr(classe, 'treinar_arrays', treinar_arrays_espiao)
+
+    monkeypatch.setattr(OrquestradorTreinamento, '_compartilhar_features', compartilhar_espiao)
+    monkeypatch.setattr(tempfile, 'mkdtemp', mkdtemp_espiao)
+    for classe in OrquestradorTreinamento.MODELOS.values():
+        espiar(classe)
+
+    # Um processo: o treinamento roda aqui e os espiões enxergam as matrizes recebidas
+    repositorio = RepositorioModelos(str(tmp_path))
+    orquestrador = OrquestradorTreinamento(n_processos=1, repositorio=repositorio)
+    treinados = orquestrador.treinar(df_metricas)
+
+    # Classificação e anomalias não têm preparo próprio: usam a matriz da manutenção
+    assert sorted(preparo.__name__ for preparo in preparos) == ['ManutencaoPreditiva', 'TempoAteFalha']
+    assert all(isinstance(X, np.memmap) for X in matrizes.values())
+    assert matrizes['DeteccaoAnomalias'].filename == matrizes['ManutencaoPreditiva'].filename
+    assert matrizes['ClassificacaoEstado'].filename == matrizes['ManutencaoPreditiva'].filename
+    assert matrizes['TempoAteFalha'].filename != matrizes['ManutencaoPreditiva'].filename
+    assert not os.path.exists(diretorios[0])
+
+    assert list(treinados) == list(OrquestradorTreinamento.MODELOS)
+    assert treinados['manutencao'].modelo_tempo is treinados['tempo_falha']
+    for nome, classe in OrquestradorTreinamento.MODELOS.items():
+        assert isinstance(treinados[nome], classe) and treinados[nome].is_trained
+        assert repositorio.carregar(nome, classe) is not None
+
+
+def test_relatorio_por_modelo_com_processos_paralelos(df_metricas):
+    modelos = {'manutencao': ManutencaoPreditiva, 'anomalias': DeteccaoAnomalias,
+               'classificacao': ClassificacaoEstado, 'tempo_falha': TempoAteFalha}
+    sequencial = OrquestradorTreinamento(n_processos=1).treinar(df_metricas, modelos)
+    orquestrador = OrquestradorTreinamento(n_processos=2, n_jobs=1)
+    paralelo = orquestrador.treinar(df_metricas, modelos)
+
+    relatorio = orquestrador.relatorio
+    assert relatorio.index.tolist() == list(modelos)
+    assert list(relatorio.columns) == ['pid', 'treino_s', 'processo_s']
+    assert (relatorio['processo_s'] >= relatorio['treino_s']).all() and (relatorio['treino_s'] > 0).all()
+    assert os.getpid() not in set(relatorio['pid'])
+
+    leituras = df_metricas.head(50)
+    pd.testing.assert_frame_equal(paralelo['manutencao'].prever_lote(leituras),
+                                  sequencial['manutencao'].prever_lote(leituras))
+    # Artefato trazido do processo de trabalho não fica preso ao diretório temporário
+    assert not isinstance(paralelo['manutencao'].model.estimators_[0].tree_.value, np.memmap)